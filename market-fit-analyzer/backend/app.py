@@ -9,13 +9,26 @@ import numpy as np
 import folium
 from streamlit_folium import folium_static
 from datetime import datetime, timedelta
+import calendar
 import pydeck as pdk
-from wordcloud import WordCloud
-from sklearn.cluster import KMeans
 
-from product_performance import (
-    prepare_monthly_data, create_features, train_model
+from product_performance import FEATURES, available_trainers, holdout_mask, train_candidates, pick_fastest
+from backtesting import backtest, smape_terms
+from clustering import SEASON_FEATURES
+from geospatial import grid_bins, hex_bins, load_gazetteer, locate_shops, sales_aggregates
+from hierarchy import hierarchical_forecast
+from pricing import OBJECTIVES, optimize_prices
+from pipeline_cache import pipeline_cache, run_pipeline
+from dashboard_data import (
+    memoized, correlation_matrix, product_clusters, seasonality_profiles,
+    category_stats, wordcloud_image, predictions_csv
 )
+from model_registry import ModelRegistry
+from simulation import simulate_scenarios
+from instrumentation import recorder, stage
+
+HIERARCHY_LEVELS = {'chain': 'Chain', 'city': 'City', 'category_shop': 'Category × Shop', 'sku_shop': 'Product × Shop'}
+RECONCILIATION_METHODS = {'ols': 'OLS (all levels)', 'bottom_up': 'Bottom-up (model)', 'top_down': 'Top-down (chain)'}
 
 # Configure page
 st.set_page_config(page_title="🚀 Retail AI Predictor Pro", layout="wide", page_icon="📊")
@@ -95,12 +108,13 @@ with st.sidebar:
     st.markdown("### 🛠️ Control Panel")
     
     with st.expander("📂 Data Upload", expanded=True):
-        transactions_file = st.file_uploader("🧾 Transactions CSV", type="csv", help="Upload your transactions data")
-        products_file = st.file_uploader("🛍️ Products CSV", type="csv", help="Upload your product catalog")
-        shops_file = st.file_uploader("🏪 Shops CSV", type="csv", help="Upload your shop locations data")
+        data_types = ["csv", "parquet", "feather"]
+        transactions_file = st.file_uploader("🧾 Transactions", type=data_types, help="Upload your transactions data (CSV, Parquet or Feather)")
+        products_file = st.file_uploader("🛍️ Products", type=data_types, help="Upload your product catalog")
+        shops_file = st.file_uploader("🏪 Shops", type=data_types, help="Upload your shop locations data")
     
     with st.expander("⚙️ Model Settings", expanded=False):
-        model_type = st.selectbox("Algorithm", ["Random Forest", "XGBoost", "LightGBM", "Prophet"], 
+        model_type = st.selectbox("Algorithm", ["Random Forest", "HistGradientBoosting", "XGBoost", "LightGBM", "Prophet"],
                                  help="Select forecasting algorithm")
         forecast_horizon = st.slider("Forecast Horizon (months)", 1, 12, 3, 
                                    help="How many months ahead to predict")
@@ -120,62 +134,62 @@ with st.sidebar:
     """, unsafe_allow_html=True)
 
 # Main app functionality
-def load_data(transactions_file, products_file, shops_file):
-    transactions = pd.read_csv(transactions_file)
-    products = pd.read_csv(products_file)
-    shops = pd.read_csv(shops_file)
-
-    # Clean IDs for consistency
-    transactions['product_id'] = transactions['product_id'].astype(str).str.strip()
-    products['product_id'] = products['product_id'].astype(str).str.strip()
-    transactions['shop_id'] = transactions['shop_id'].astype(str).str.strip()
-    shops['shop_id'] = shops['shop_id'].astype(str).str.strip()
-
-    # Merge
-    data = transactions.merge(products, on='product_id', how='left')
-    data = data.merge(shops, on='shop_id', how='left')
-
-    return data, products, shops
-
 def get_metrics(y_true, y_pred):
+    y_true = np.asarray(y_true, dtype=float)
+    y_pred = np.asarray(y_pred, dtype=float)
     mae = mean_absolute_error(y_true, y_pred)
     rmse = np.sqrt(mean_squared_error(y_true, y_pred))
     r2 = r2_score(y_true, y_pred)
-    mape = np.mean(np.abs((y_true - y_pred) / y_true)) * 100
-    return {'mae': mae, 'rmse': rmse, 'r2': r2, 'mape': mape}
+    # MAPE is undefined for zero-sale months, so it only covers months with sales;
+    # sMAPE and WAPE use every month
+    sold = y_true != 0
+    mape = np.mean(np.abs((y_true[sold] - y_pred[sold]) / y_true[sold])) * 100 if sold.any() else np.nan
+    smape = smape_terms(y_true, y_pred).mean()
+    wape = np.abs(y_true - y_pred).sum() / np.abs(y_true).sum() * 100 if sold.any() else np.nan
+    return {'mae': mae, 'rmse': rmse, 'r2': r2, 'mape': mape, 'smape': smape, 'wape': wape}
 
-def get_all_predictions(model, feature_columns, data):
-    data['predicted_quantity'] = model.predict(data[feature_columns])
-    return data[['product_id', 'shop_id', 'year_month', 'monthly_quantity', 'predicted_quantity']]
-
-def predict_next_month(model, feature_columns, data, product_id, shop_id):
-    subset = data[(data['product_id'] == product_id) & (data['shop_id'] == shop_id)]
+def predict_next_month(forecast_index, product_id, shop_id):
+    subset = forecast_index.series(product_id, shop_id)
     if subset.empty:
-        return None, "No data for this product-shop"
+        return None, None, "No data for this product-shop"
 
-    latest_row = subset.sort_values('year_month').iloc[-1]
-    X = latest_row[feature_columns].values.reshape(1, -1)
-    prediction = model.predict(X)[0]
-    return round(prediction, 2), "Success"
+    return round(subset['predicted_quantity'].iloc[0], 2), subset, "Success"
 
 # Once files are uploaded
 if transactions_file and products_file and shops_file:
+    if model_type not in available_trainers():
+        st.warning(f"{model_type} is not available for the lag-feature forecaster "
+                   "(not installed, or not a tabular regressor). Using Random Forest instead.")
+        model_type = "Random Forest"
+
     with st.spinner("🔄 Processing data with quantum AI algorithms..."):
-        data, products, shops = load_data(transactions_file, products_file, shops_file)
-        monthly_data = prepare_monthly_data(data)
-        monthly_data = create_features(monthly_data)
+        # Cached by file content: reruns triggered by widgets skip straight to rendering
+        pipeline = run_pipeline(transactions_file, products_file, shops_file, model_type=model_type,
+                                forecast_horizon=forecast_horizon)
+        data, products, shops = pipeline['data'], pipeline['products'], pipeline['shops']
+        # Keeps this session's dataset version mapped in the shared store until the session ends
+        st.session_state['dataset'] = pipeline['dataset']
+        monthly_data = pipeline['monthly_data']
+        model = pipeline['model']
+        forecast = pipeline['forecast']
 
-        model = train_model(monthly_data)
+        # Prebuilt per-series indexes: every product/shop lookup below is a dict hit, not a scan
+        history_index = pipeline['history_index']
+        feature_index = pipeline['feature_index']
+        forecast_index = pipeline['forecast_index']
 
-        feature_columns = [
-            'last_month_qty', 'last_2_months_qty', 'last_3_months_qty',
-            'avg_last_3_months', 'trend', 'price_difference',
-            'is_holiday_month', 'is_summer', 'category_code', 'city_code'
-        ]
+        feature_columns = FEATURES
 
-        y_true = monthly_data['monthly_quantity']
-        y_pred = model.predict(monthly_data[feature_columns])
-        metrics = get_metrics(y_true, y_pred)
+        # Score only the held-out latest months the model was not trained on
+        holdout = holdout_mask(monthly_data)
+        # A single month leaves nothing to hold out: fall back to (in-sample) scores on every row
+        in_sample = holdout is None
+        if in_sample:
+            holdout = np.ones(len(monthly_data), dtype=bool)
+        y_true = monthly_data['monthly_quantity'][holdout]
+        y_pred = pipeline['y_pred'][holdout]
+        with stage('tab_metrics', rows=len(y_true)):
+            metrics = get_metrics(y_true, y_pred)
 
     # Success message with animation
     st.success("AI Model Trained Successfully!")
@@ -218,23 +232,36 @@ if transactions_file and products_file and shops_file:
         <div class='card'>
             <h3>📈 Forecast Accuracy</h3>
             <h2>{:.1f}%</h2>
-            <p>MAPE score</p>
+            <p>100 - WAPE on {}</p>
         </div>
-        """.format(100 - metrics['mape']), unsafe_allow_html=True)
+        """.format(max(0, 100 - metrics['wape']), 'all rows (no hold-out)' if in_sample else 'held-out months'),
+                    unsafe_allow_html=True)
     
     st.markdown("---")
     
     # Model Performance with Tabs
     st.markdown("## 🤖 AI Model Performance")
-    tab1, tab2, tab3, tab4 = st.tabs(["📐 Metrics", "📊 Feature Importance", "🔍 Prediction Explorer", "📈 Forecast Simulation"])
+    # Radio navigation instead of st.tabs: Streamlit runs every tab body on each rerun,
+    # this way only the selected view is computed
+    view = st.radio("Model view", ["📐 Metrics", "📊 Feature Importance", "🔍 Prediction Explorer", "📈 Forecast Simulation",
+                                   "🏢 Hierarchy"],
+                    horizontal=True, label_visibility="collapsed", key="model_view")
     
-    with tab1:
+    if view == "📐 Metrics":
         st.subheader("Model Evaluation Metrics")
+        if in_sample:
+            st.caption(f"⚠️ The data covers a single month, so no months could be held out. These metrics are "
+                       f"computed on all {holdout.sum():,} rows, most of which the model was trained on, "
+                       f"and overstate its accuracy.")
+        else:
+            st.caption(f"Held-out months from {monthly_data['year_month'][holdout].min()} "
+                       f"({holdout.sum():,} rows); the model was trained on the months before.")
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("MAE", f"{metrics['mae']:.2f}", help="Mean Absolute Error")
         col2.metric("RMSE", f"{metrics['rmse']:.2f}", help="Root Mean Squared Error")
         col3.metric("R²", f"{metrics['r2']:.2f}", help="R-squared")
-        col4.metric("MAPE", f"{metrics['mape']:.1f}%", help="Mean Absolute Percentage Error")
+        col4.metric("sMAPE", f"{metrics['smape']:.1f}%",
+                    help=f"Symmetric Mean Absolute Percentage Error (MAPE on months with sales: {metrics['mape']:.1f}%)")
         
         fig = px.scatter(
         x=y_true, 
@@ -249,31 +276,81 @@ if transactions_file and products_file and shops_file:
         )
 
         st.plotly_chart(fig, use_container_width=True)
+
+        with st.expander("⚖️ Compare Algorithms"):
+            candidates = st.multiselect("Candidates", available_trainers(), default=available_trainers())
+            if st.button("🏁 Train candidates in parallel", key="compare_button") and candidates:
+                with st.spinner("Training candidates in a process pool..."):
+                    results = train_candidates(pipeline['feature_matrix'], candidates)
+
+                comparison = pd.DataFrame([
+                    {k: v for k, v in r.items() if k != 'model'} for r in results
+                ]).set_index('model_type')
+                st.dataframe(comparison)
+
+                fastest = pick_fastest(results)
+                if fastest is not None:
+                    st.success(f"⚡ Fastest model within 5% of the best RMSE: **{fastest['model_type']}** "
+                               f"({fastest['wall_seconds']:.2f}s, RMSE {fastest['rmse']:.2f})")
+
+        with st.expander("⏪ Rolling-Origin Backtest"):
+            col1, col2 = st.columns(2)
+            n_folds = col1.slider("Folds", 2, 12, 4, help="Number of forecast origins, one month apart")
+            horizon = col2.slider("Test months per fold", 1, 3, 1)
+            if st.button("▶️ Run backtest", key="backtest_button"):
+                with st.spinner("Fitting folds in a process pool..."):
+                    try:
+                        result = backtest(pipeline['feature_matrix'], model_type=model_type, n_folds=n_folds,
+                                          horizon=horizon)
+                    except ValueError as e:
+                        st.warning(str(e))
+                        result = None
+
+                if result is not None:
+                    folds = result['folds']
+                    st.dataframe(folds.style.format({'fit_seconds': '{:.2f}', 'predict_seconds': '{:.3f}',
+                                                     'mae': '{:.2f}', 'rmse': '{:.2f}', 'smape': '{:.1f}'}))
+                    st.caption(f"{len(folds)} folds in {result['wall_seconds']:.1f}s wall time")
+
+                    col1, col2 = st.columns(2)
+                    fig = px.line(folds.reset_index(), x='test_start', y=['mae', 'rmse'], markers=True,
+                                  title='Error by Forecast Origin')
+                    col1.plotly_chart(fig, use_container_width=True)
+                    fig = px.scatter(folds.reset_index(), x='n_train', y='fit_seconds', text='test_start',
+                                     title='Training Cost vs Training Rows')
+                    col2.plotly_chart(fig, use_container_width=True)
+
+                    st.markdown("**Hardest series to forecast**")
+                    st.dataframe(result['series'].sort_values('mae', ascending=False).head(10))
         
-    with tab2:
+    elif view == "📊 Feature Importance":
         st.subheader("Feature Importance Analysis")
         
         # Feature Importance
-        importances = model.feature_importances_
-        feature_importance_df = pd.DataFrame({
-            'Feature': feature_columns,
-            'Importance': importances
-        }).sort_values(by='Importance', ascending=False)
-        
-        fig = px.bar(
-            feature_importance_df.head(10),
-            x='Importance',
-            y='Feature',
-            orientation='h',
-            title='Top 10 Important Features for Prediction',
-            color='Importance',
-            color_continuous_scale='Viridis'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        importances = getattr(model, 'feature_importances_', None)
+        if importances is None:
+            st.info(f"{model_type} does not expose feature importances.")
+        else:
+            feature_importance_df = pd.DataFrame({
+                'Feature': feature_columns,
+                'Importance': importances
+            }).sort_values(by='Importance', ascending=False)
+
+            fig = px.bar(
+                feature_importance_df.head(10),
+                x='Importance',
+                y='Feature',
+                orientation='h',
+                title='Top 10 Important Features for Prediction',
+                color='Importance',
+                color_continuous_scale='Viridis'
+            )
+            st.plotly_chart(fig, use_container_width=True)
         
         # Feature Correlation Matrix
         st.subheader("Feature Correlation Matrix")
-        corr_matrix = monthly_data[feature_columns + ['monthly_quantity']].corr()
+        corr_matrix = memoized(pipeline['key'], 'tab_correlation',
+                               lambda: correlation_matrix(monthly_data, feature_columns))
         fig = go.Figure(data=go.Heatmap(
             z=corr_matrix.values,
             x=corr_matrix.columns,
@@ -284,7 +361,7 @@ if transactions_file and products_file and shops_file:
         ))
         st.plotly_chart(fig, use_container_width=True)
     
-    with tab3:
+    elif view == "🔍 Prediction Explorer":
         st.subheader("Interactive Prediction Explorer")
         
         col1, col2 = st.columns(2)
@@ -293,19 +370,17 @@ if transactions_file and products_file and shops_file:
         
         if st.button("🔮 Generate AI Prediction", key="predict_button"):
             with st.spinner("🧠 AI is analyzing patterns..."):
-                prediction, status = predict_next_month(model, feature_columns, monthly_data, product_id, shop_id)
+                with stage('tab_explorer'):
+                    prediction, series_forecast, status = predict_next_month(forecast_index, product_id, shop_id)
                 
                 if status == "Success":
-                    st.success(f"✨ AI Prediction: Next month's sales will be **{prediction:.0f} units**")
+                    st.success(f"✨ AI Prediction: Next month's sales will be **{prediction:.0f} units** "
+                               f"({series_forecast['predicted_quantity'].sum():.0f} units over the next {forecast_horizon} months)")
                     
                     # Historical Trend with Plotly
-                    historical_check = monthly_data[
-                        (monthly_data['product_id'] == product_id) & 
-                        (monthly_data['shop_id'] == shop_id)
-                    ]
+                    historical_check = history_index.series(product_id, shop_id)
                     
                     if not historical_check.empty:
-                        historical_check = historical_check.sort_values('year_month')
                         # Convert Period to string for plotting
                         if isinstance(historical_check['year_month'].iloc[0], pd.Period):
                             historical_check = historical_check.copy()
@@ -319,26 +394,22 @@ if transactions_file and products_file and shops_file:
                         )
                         # ... rest of code ...
                         
-                        # Add prediction point
-                        last_date = historical_check['year_month'].iloc[-1]
-                        if isinstance(last_date, pd.Period):
-                            last_date = last_date.to_timestamp()
-                        elif isinstance(last_date, str):
-                            last_date = pd.to_datetime(last_date)
-                        next_date = (last_date + pd.DateOffset(months=1)).strftime('%Y-%m')
+                        # Add the forecast horizon
+                        future_dates = series_forecast['year_month'].astype(str).tolist()
+                        future_values = series_forecast['predicted_quantity'].tolist()
                         
                         fig.add_trace(go.Scatter(
-                            x=[next_date],
-                            y=[prediction],
-                            mode='markers',
+                            x=future_dates,
+                            y=future_values,
+                            mode='lines+markers',
                             marker=dict(color='red', size=10),
                             name='AI Prediction'
                         ))
                         
                         # Add confidence interval
                         fig.add_trace(go.Scatter(
-                            x=[next_date, next_date],
-                            y=[prediction * 0.9, prediction * 1.1],
+                            x=future_dates + future_dates[::-1],
+                            y=[v * 1.1 for v in future_values] + [v * 0.9 for v in future_values[::-1]],
                             fill='toself',
                             fillcolor='rgba(255,0,0,0.2)',
                             line=dict(color='rgba(255,255,255,0)'),
@@ -352,15 +423,13 @@ if transactions_file and products_file and shops_file:
                         st.subheader("📊 Competitive Benchmarking")
                         
                         # Compare with similar products
-                        similar_products = monthly_data[
-                            (monthly_data['shop_id'] == shop_id) &
-                            (monthly_data['category'] == historical_check['category'].iloc[0])
-                        ].groupby('product_id')['monthly_quantity'].mean().nlargest(5)
+                        shop_rows = feature_index.for_shop(shop_id)
+                        similar_products = shop_rows[
+                            shop_rows['category'] == historical_check['category'].iloc[0]
+                        ].groupby('product_id', observed=True)['monthly_quantity'].mean().nlargest(5)
                         
                         # Compare with other shops selling this product
-                        other_shops = monthly_data[
-                            (monthly_data['product_id'] == product_id)
-                        ].groupby('shop_id')['monthly_quantity'].mean().nlargest(5)
+                        other_shops = feature_index.for_product(product_id).groupby('shop_id', observed=True)['monthly_quantity'].mean().nlargest(5)
                         
                         col1, col2 = st.columns(2)
                         with col1:
@@ -387,7 +456,7 @@ if transactions_file and products_file and shops_file:
                             )
                             st.plotly_chart(fig, use_container_width=True)
     
-    with tab4:
+    elif view == "📈 Forecast Simulation":
         st.subheader("What-If Scenario Simulation")
         
         col1, col2 = st.columns(2)
@@ -395,127 +464,218 @@ if transactions_file and products_file and shops_file:
         shop_id = col2.selectbox("Select Shop", monthly_data['shop_id'].unique(), key="sim_shop")
         
         # Get current values
-        current_data = monthly_data[
-            (monthly_data['product_id'] == product_id) & 
-            (monthly_data['shop_id'] == shop_id)
-        ].sort_values('year_month').iloc[-1]
+        current_data = feature_index.latest_row(product_id, shop_id)
         
-        with st.form("scenario_form"):
-            st.markdown("### Adjust Parameters")
+        if current_data is None:
+            st.warning("No feature history for this product at this shop yet - pick another combination.")
+        else:
+            with st.form("scenario_form"):
+                st.markdown("### Adjust Parameters")
             
-            col1, col2, col3 = st.columns(3)
-            price_change = col1.slider("Price Change (%)", -20, 20, 0, 
-                                      help="How much to adjust product price")
-            marketing_budget = col2.slider("Marketing Boost", 0, 100, 50,
-                                         help="Relative marketing investment")
-            season = col3.selectbox("Season", ["Normal", "Holiday", "Summer", "Winter"],
-                                  help="Select seasonality factor")
+                col1, col2, col3, col4 = st.columns(4)
+                price_change = col1.slider("Price Change (%)", -20, 20, 0, 
+                                          help="How much to adjust product price")
+                marketing_budget = col2.slider("Marketing Boost", 0, 100, 50,
+                                             help="Relative marketing investment")
+                season = col3.selectbox("Season", ["Normal", "Holiday", "Summer", "Winter"],
+                                      help="Select seasonality factor")
+                uncertainty = col4.slider("Price Uncertainty (± %)", 0, 10, 3,
+                                         help="Spread of the simulated price change")
             
-            submitted = st.form_submit_button("🚀 Simulate Impact")
+                submitted = st.form_submit_button("🚀 Simulate Impact")
             
-            if submitted:
-                with st.spinner("⚡ Running 10,000 simulations..."):
-                    # Create modified feature vector
-                    modified_features = current_data[feature_columns].copy()
-                    
-                    # Apply changes
-                    modified_features['price_difference'] = modified_features['price_difference'] * (1 + price_change/100)
-                    
-                    if season == "Holiday":
-                        modified_features['is_holiday_month'] = 1
-                        modified_features['is_summer'] = 0
-                    elif season == "Summer":
-                        modified_features['is_holiday_month'] = 0
-                        modified_features['is_summer'] = 1
-                    else:
-                        modified_features['is_holiday_month'] = 0
-                        modified_features['is_summer'] = 0
-                    
-                    # Marketing impact (simplified)
-                    modified_features['last_month_qty'] = modified_features['last_month_qty'] * (1 + 0.2 * marketing_budget/100)
-                    
-                    # Make prediction
-                    X = modified_features.values.reshape(1, -1)
-                    new_prediction = model.predict(X)[0]
-                    
-                    # Original prediction
-                    original_prediction = model.predict(current_data[feature_columns].values.reshape(1, -1))[0]
+                if submitted:
+                    with st.spinner("⚡ Running 10,000 simulations..."):
+                        # Sample scenarios around the chosen values and score them in one batched pass
+                        with stage('what_if_simulation', rows=10_000):
+                            result = simulate_scenarios(
+                                model, current_data[feature_columns], n_scenarios=10_000,
+                                price_change=price_change, price_change_sd=uncertainty,
+                                marketing=marketing_budget, season=season, feature_columns=feature_columns
+                            )
+                        original_prediction = result['baseline']
+                        bands = result['percentiles']
+                        new_prediction = bands[50]
                     
-                    # Display results
-                    st.success(f"📈 Simulation Complete: Projected sales change from {original_prediction:.0f} to {new_prediction:.0f} units")
+                        # Display results
+                        st.success(f"📈 Simulation Complete: Projected sales change from {original_prediction:.0f} "
+                                   f"to {new_prediction:.0f} units (90% range {bands[5]:.0f}-{bands[95]:.0f}, "
+                                   f"{result['seconds']:.2f}s)")
                     
-                    # Gauge chart showing impact
-                    fig = go.Figure(go.Indicator(
-                        mode = "delta",
-                        value = new_prediction,
-                        delta = {'reference': original_prediction, 'relative': False},
-                        title = {"text": "Sales Impact Prediction"},
-                        domain = {'x': [0, 1], 'y': [0, 1]}
-                    ))
+                        col1, col2 = st.columns(2)
+                        # Gauge chart showing impact
+                        fig = go.Figure(go.Indicator(
+                            mode = "delta",
+                            value = new_prediction,
+                            delta = {'reference': original_prediction, 'relative': False},
+                            title = {"text": "Sales Impact Prediction (median)"},
+                            domain = {'x': [0, 1], 'y': [0, 1]}
+                        ))
+                        col1.plotly_chart(fig, use_container_width=True)
                     
-                    st.plotly_chart(fig, use_container_width=True)
+                        # Distribution of simulated outcomes with percentile bands
+                        fig = px.histogram(x=result['samples'], nbins=50, labels={'x': 'Predicted Quantity'},
+                                           title="Simulated Outcomes")
+                        for p, value in bands.items():
+                            fig.add_vline(x=value, line_dash="dash", annotation_text=f"P{p}")
+                        fig.add_vline(x=original_prediction, line_color="red", annotation_text="Current")
+                        col2.plotly_chart(fig, use_container_width=True)
+    
+        # Catalog-wide price optimization, computed only on request
+        with st.expander("💰 Optimize Prices for the Whole Catalog"):
+            col1, col2, col3, col4 = st.columns(4)
+            objective = col1.selectbox("Objective", list(OBJECTIVES), format_func=str.title)
+            max_change = col2.slider("Max Price Change (%)", 5, 50, 20, step=5)
+            min_volume = col3.slider("Min Volume Kept (%)", 0, 100, 90, step=5)
+            cost_ratio = col4.slider("Unit Cost (% of Standard Price)", 10, 95, 70, step=5)
+            params = (objective, max_change / 100, 21, min_volume / 100, cost_ratio / 100)
+            name = 'optimal_prices_' + '_'.join(map(str, params))
+            
+            if (pipeline['model_key'], name) in pipeline_cache or st.button("🚀 Optimize Prices"):
+                optimal = memoized(pipeline['model_key'], name,
+                                   lambda: optimize_prices(model, pipeline['monthly_aggregate'], *params))
+                current_total = optimal[f'current_{objective}'].sum()
+                expected_total = optimal[f'expected_{objective}'].sum()
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Series Optimized", f"{len(optimal):,}")
+                col2.metric(f"Expected {objective.title()}", f"{expected_total:,.0f}",
+                            f"{(expected_total / current_total - 1) * 100:+.1f}%" if current_total else None)
+                col3.metric("Prices Changed", f"{(optimal['price_change_pct'] != 0).mean() * 100:.0f}%")
+                st.dataframe(optimal.sort_values('uplift_pct', ascending=False), use_container_width=True)
+                st.download_button("📥 Download Optimal Prices", optimal.to_csv(index=False).encode('utf-8'),
+                                   file_name="optimal_prices.csv", mime="text/csv")
+    
+    elif view == "🏢 Hierarchy":
+        st.subheader("Hierarchical Forecast")
+        st.caption("Coherent forecasts for the chain, each city, each category within a shop and each product "
+                   "within a shop: every level adds up exactly to the level above it.")
+        
+        col1, col2 = st.columns(2)
+        method = col1.selectbox("Reconciliation", list(RECONCILIATION_METHODS),
+                                format_func=RECONCILIATION_METHODS.get)
+        level = col2.selectbox("Level", list(HIERARCHY_LEVELS), format_func=HIERARCHY_LEVELS.get)
+        
+        # Summing matrices and the reconciliation are built once per model and method
+        levels = memoized(pipeline['model_key'], f'hierarchy_{forecast_horizon}_{method}',
+                          lambda: hierarchical_forecast(forecast, pipeline['monthly_aggregate'], method=method))
+        
+        chain = levels['chain']
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=chain['year_month'].astype(str), y=chain['base_forecast'], name='Base Forecast'))
+        fig.add_trace(go.Bar(x=chain['year_month'].astype(str), y=chain['predicted_quantity'], name='Reconciled'))
+        fig.update_layout(title="Chain-Level Forecast", barmode='group', yaxis_title="Units")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        table = levels[level]
+        if level == 'city':
+            fig = px.bar(table, x='year_month', y='predicted_quantity', color='city', barmode='group',
+                         labels={'year_month': 'Month', 'predicted_quantity': 'Reconciled Forecast'})
+            fig.update_xaxes(type='category')
+            st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(table.astype({'year_month': str}), use_container_width=True)
     
     # Advanced Analytics Section
     st.markdown("---")
     st.markdown("## 🔍 Advanced Market Intelligence")
     
-    tab5, tab6, tab7, tab8 = st.tabs(["🌍 Geospatial", "📦 Product Clusters", "📅 Seasonality", "📝 Text Insights"])
+    insight = st.radio("Insight", ["🌍 Geospatial", "📦 Product Clusters", "📅 Seasonality", "📝 Text Insights"],
+                       horizontal=True, label_visibility="collapsed", key="insight_view")
     
-    with tab5:
+    if insight == "🌍 Geospatial":
         st.subheader("Geospatial Sales Analysis")
         
-        # Ensure we have coordinates
-        if 'latitude' in shops.columns and 'longitude' in shops.columns:
-            # Calculate sales by shop
-            sales_by_shop = monthly_data.groupby('shop_id')['monthly_quantity'].sum().reset_index()
-            shops_with_sales = shops.merge(sales_by_shop, on='shop_id')
+        # Shops are placed from the local gazetteer; sales per shop/city/district/month are computed once
+        geo = memoized(pipeline['key'], 'tab_geospatial',
+                       lambda: sales_aggregates(pipeline['monthly_aggregate'], locate_shops(shops)))
+        
+        if geo['shop']['latitude'].notna().any():
+            col1, col2, col3 = st.columns(3)
+            layer_kind = col1.radio("Layer", ["Hexagons", "Grid", "Shops"], horizontal=True)
+            cell_km = col2.slider("Cell Size (km)", 1, 50, 5)
+            months = ['All months'] + sorted(geo['shop_month']['year_month'].astype(str).unique())
+            month = col3.selectbox("Month", months)
+            points = geo['shop'] if month == 'All months' else \
+                geo['shop_month'][geo['shop_month']['year_month'].astype(str) == month]
             
-            # Create map
+            # Aggregated cells keep the payload small however many shops there are
+            if layer_kind == "Shops":
+                cells = points.dropna(subset=['latitude', 'longitude']).assign(shops=1)
+                layer = pdk.Layer(
+                    'ScatterplotLayer',
+                    data=cells,
+                    get_position='[longitude, latitude]',
+                    get_fill_color='[200, 30, 0, 160]',
+                    get_radius=f'sqrt(quantity) * {20 * cell_km}',
+                    pickable=True,
+                )
+            else:
+                if layer_kind == "Hexagons":
+                    cells = hex_bins(points, radius_m=cell_km * 1000)
+                    radius, resolution, angle = cell_km * 1000, 6, 90
+                else:
+                    cells = grid_bins(points, cell_m=cell_km * 1000)
+                    radius, resolution, angle = cell_km * 1000 / np.sqrt(2), 4, 45
+                layer = pdk.Layer(
+                    'ColumnLayer',
+                    data=cells,
+                    get_position='[longitude, latitude]',
+                    get_elevation='quantity',
+                    elevation_scale=30_000 / max(cells['quantity'].max(), 1),
+                    radius=radius,
+                    disk_resolution=resolution,
+                    angle=angle,
+                    coverage=0.95,
+                    get_fill_color='[200, 30, 0, 160]',
+                    extruded=True,
+                    pickable=True,
+                )
+            
+            # Offline base map: no tile server, gazetteer cities as reference points
+            cities = load_gazetteer().query("kind == 'city'")
+            reference = [
+                pdk.Layer('ScatterplotLayer', data=cities, get_position='[longitude, latitude]',
+                          get_fill_color='[38, 50, 56, 200]', get_radius=1500),
+                pdk.Layer('TextLayer', data=cities, get_position='[longitude, latitude]', get_text='name',
+                          get_size=12, get_color='[38, 50, 56, 255]', get_pixel_offset='[0, -14]'),
+            ]
             st.pydeck_chart(pdk.Deck(
-                map_style='mapbox://styles/mapbox/light-v9',
+                map_style=None,
                 initial_view_state=pdk.ViewState(
-                    latitude=shops_with_sales['latitude'].mean(),
-                    longitude=shops_with_sales['longitude'].mean(),
-                    zoom=10,
+                    latitude=cells['latitude'].mean(),
+                    longitude=cells['longitude'].mean(),
+                    zoom=7,
                     pitch=50,
                 ),
-                layers=[
-                    pdk.Layer(
-                        'ScatterplotLayer',
-                        data=shops_with_sales,
-                        get_position='[longitude, latitude]',
-                        get_color='[200, 30, 0, 160]',
-                        get_radius='monthly_quantity / 100',
-                        pickable=True,
-                        extruded=True
-                    )
-                ],
+                layers=reference + [layer],
                 tooltip={
-                    "html": "<b>Shop ID:</b> {shop_id}<br><b>Sales:</b> {monthly_quantity} units",
+                    "html": "<b>Sales:</b> {quantity} units<br><b>Shops:</b> {shops}",
                     "style": {
                         "backgroundColor": "steelblue",
                         "color": "white"
                     }
                 }
             ))
+            
+            unplaced = geo['shop']['latitude'].isna().sum()
+            if unplaced:
+                st.caption(f"{unplaced} shops have no coordinates and no city/district found in the gazetteer.")
+            
+            col1, col2 = st.columns(2)
+            for col, place in ((col1, 'city'), (col2, 'district')):
+                if place in geo:
+                    col.markdown(f"**Sales by {place.title()}**")
+                    col.dataframe(geo[place].drop(columns=['latitude', 'longitude']), use_container_width=True)
         else:
-            st.warning("Shop location data not available for geospatial analysis")
+            st.warning("Shop location data not available for geospatial analysis: add latitude/longitude "
+                       "columns or city/district names listed in nepal_gazetteer.csv")
     
-    with tab6:
+    elif insight == "📦 Product Clusters":
         st.subheader("Product Clustering Analysis")
         
-        # Prepare data for clustering
-        product_features = monthly_data.groupby('product_id').agg({
-            'monthly_quantity': ['mean', 'std'],
-            'avg_price': 'mean',
-            'category_code': 'first'
-        }).dropna()
-        
-        product_features.columns = ['sales_mean', 'sales_std', 'price_mean', 'category']
-        
-        # Cluster products
-        kmeans = KMeans(n_clusters=5, random_state=42)
-        product_features['cluster'] = kmeans.fit_predict(product_features[['sales_mean', 'price_mean']])
+        # Scaled volume/volatility/price/trend/seasonality profiles + MiniBatchKMeans,
+        # fitted once per dataset and read back from the model registry afterwards
+        product_features = memoized(pipeline['key'], 'tab_clusters',
+                                    lambda: product_clusters(pipeline['key'], pipeline['monthly_aggregate']))
         
         # Plot clusters
         fig = px.scatter(
@@ -543,15 +703,21 @@ if transactions_file and products_file and shops_file:
         }).sort_values('sales_mean', ascending=False)
         
         st.dataframe(cluster_profiles.style.background_gradient(cmap='YlGnBu'))
+        
+        # Mean calendar-month profile per cluster (1.0 = the product's average month)
+        cluster_seasons = product_features.groupby('cluster')[SEASON_FEATURES].mean()
+        cluster_seasons.columns = [calendar.month_abbr[m] for m in range(1, 13)]
+        fig = px.imshow(cluster_seasons, aspect='auto', color_continuous_scale='RdBu_r', color_continuous_midpoint=1.0,
+                        labels={'x': 'Month', 'y': 'Cluster', 'color': 'Relative Sales'},
+                        title='Seasonality by Cluster')
+        st.plotly_chart(fig, use_container_width=True)
     
-    with tab7:
+    elif insight == "📅 Seasonality":
         st.subheader("Seasonal Patterns Analysis")
         
-        # Extract month from year_month
-        monthly_data['month'] = monthly_data['year_month'].dt.month
-        
-        # Plot seasonality
-        seasonality = monthly_data.groupby('month')['monthly_quantity'].mean().reset_index()
+        # Plot seasonality (create_features already derived 'month' from year_month)
+        seasonality, category_seasonality = memoized(pipeline['key'], 'tab_seasonality',
+                                                     lambda: seasonality_profiles(monthly_data))
         
         fig = px.line_polar(
             seasonality, 
@@ -567,7 +733,7 @@ if transactions_file and products_file and shops_file:
         st.subheader("Category-Specific Seasonality")
         category = st.selectbox("Select Category", monthly_data['category'].unique())
         
-        cat_seasonality = monthly_data[monthly_data['category'] == category].groupby('month')['monthly_quantity'].mean().reset_index()
+        cat_seasonality = category_seasonality.loc[category].reset_index()
         
         fig = px.bar(
             cat_seasonality,
@@ -579,15 +745,12 @@ if transactions_file and products_file and shops_file:
         )
         st.plotly_chart(fig, use_container_width=True)
     
-    with tab8:
+    elif insight == "📝 Text Insights":
         st.subheader("Product Text Insights")
         
         # Generate word cloud from product names
-        if 'product_name' in products.columns:
-            text = ' '.join(products['product_name'].dropna())
-            
-            wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text)
-            
+        wordcloud = memoized(pipeline['key'], 'tab_wordcloud', lambda: wordcloud_image(products))
+        if wordcloud is not None:
             fig, ax = plt.subplots(figsize=(10, 5))
             ax.imshow(wordcloud, interpolation='bilinear')
             ax.axis('off')
@@ -596,45 +759,72 @@ if transactions_file and products_file and shops_file:
         # Category sentiment analysis (placeholder - would use NLP in real implementation)
         st.subheader("Category Performance Summary")
         
-        category_stats = monthly_data.groupby('category').agg({
-            'monthly_quantity': ['mean', 'sum'],
-            'avg_price': 'mean'
-        }).sort_values(('monthly_quantity', 'sum'), ascending=False)
+        category_summary = memoized(pipeline['key'], 'tab_category_stats', lambda: category_stats(monthly_data))
         
-        st.dataframe(category_stats.style.background_gradient(cmap='YlOrRd'))
+        st.dataframe(category_summary.style.background_gradient(cmap='YlOrRd'))
     
     # Data Export Section
     st.markdown("---")
     st.markdown("## 📤 Export Results")
     
     with st.expander("💾 Download Data & Reports"):
-        col1, col2, col3 = st.columns(3)
-        
-        # Export predictions
-        predictions = get_all_predictions(model, feature_columns, monthly_data)
-        csv = predictions.to_csv(index=False).encode('utf-8')
-        col1.download_button(
-            label="📥 Download Predictions",
-            data=csv,
-            file_name="ai_sales_predictions.csv",
-            mime="text/csv"
-        )
-        
-        # Export visualizations
-        col2.download_button(
-            label="🖼️ Export Dashboard as PDF",
-            data=csv,  # Placeholder - would generate PDF in real implementation
-            file_name="retail_ai_report.pdf",
-            mime="application/pdf"
-        )
-        
-        # Export model
-        col3.download_button(
-            label="🤖 Export AI Model",
-            data=csv,  # Placeholder - would pickle model in real implementation
-            file_name="sales_forecast_model.pkl",
-            mime="application/octet-stream"
-        )
+        # Export payloads are built on the first request and then memoized per model version
+        export_version = pipeline['model_key']
+        if (export_version, 'export_predictions') in pipeline_cache or st.button("⚙️ Prepare Downloads"):
+            col1, col2, col3 = st.columns(3)
+            
+            # Export predictions
+            csv = memoized(export_version, 'export_predictions',
+                           lambda: predictions_csv(monthly_data, pipeline['y_pred']))
+            col1.download_button(
+                label="📥 Download Predictions",
+                data=csv,
+                file_name="ai_sales_predictions.csv",
+                mime="text/csv"
+            )
+            col1.download_button(
+                label=f"📅 Download {forecast_horizon}-Month Forecast",
+                data=memoized(export_version, f'export_forecast_{forecast_horizon}',
+                              lambda: forecast.to_csv(index=False).encode('utf-8')),
+                file_name="ai_sales_forecast.csv",
+                mime="text/csv"
+            )
+            
+            # Export visualizations
+            col2.download_button(
+                label="🖼️ Export Dashboard as PDF",
+                data=csv,  # Placeholder - would generate PDF in real implementation
+                file_name="retail_ai_report.pdf",
+                mime="application/pdf"
+            )
+            
+            # Export model straight from the registry entry written at training time
+            col3.download_button(
+                label="🤖 Export AI Model",
+                data=ModelRegistry().model_bytes(export_version),
+                file_name="sales_forecast_model.joblib",
+                mime="application/octet-stream"
+            )
+
+    # Stage timings recorded by the pipeline and the tabs above (this process, all sessions)
+    with st.expander("⏱️ Performance"):
+        summary = recorder.summary()
+        if summary:
+            perf = pd.DataFrame.from_dict(summary, orient='index').sort_values('last_seconds', ascending=False)
+            st.dataframe(perf.style.format({
+                'seconds_total': '{:.3f}', 'seconds_max': '{:.3f}', 'last_seconds': '{:.3f}',
+                'last_rss_delta_mb': '{:.1f}'
+            }))
+            fig = px.bar(perf.reset_index(), x='last_seconds', y='index', orientation='h',
+                         labels={'index': 'Stage', 'last_seconds': 'Seconds (latest run)'},
+                         title='Time per Stage')
+            st.plotly_chart(fig, use_container_width=True)
+
+            col1, col2 = st.columns(2)
+            col1.download_button("📄 Structured Log (JSON lines)", recorder.to_json_lines(),
+                                 file_name="stage_events.jsonl", mime="application/x-ndjson")
+            col2.download_button("📈 Prometheus Metrics", recorder.to_prometheus(),
+                                 file_name="metrics.prom", mime="text/plain")
 
 else:
     # Show demo mode or instructions
@@ -0,0 +1,133 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from feature_engine import SERIES_KEYS, month_ordinals
+from feature_store import FeatureMatrix, shared_matrix
+from product_performance import FEATURES, make_model, thread_budget
+
+
+def smape_terms(y_true, y_pred):
+    """Per-row symmetric absolute percentage error in percent (0 where actual and prediction are both 0)."""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    denominator = np.abs(y_true) + np.abs(y_pred)
+    ratio = np.divide(2 * np.abs(y_pred - y_true), denominator,
+                      out=np.zeros_like(denominator), where=denominator > 0)
+    return 100 * ratio
+
+
+def error_metrics(y_true, y_pred):
+    """MAE, RMSE and sMAPE of one set of predictions."""
+    error = np.asarray(y_pred, dtype=np.float64) - np.asarray(y_true, dtype=np.float64)
+    return {
+        'mae': float(np.abs(error).mean()),
+        'rmse': float(np.sqrt(np.mean(error ** 2))),
+        'smape': float(smape_terms(y_true, y_pred).mean()),
+    }
+
+
+def rolling_origin_folds(months, n_folds=4, horizon=1, step=1, min_train_months=3):
+    """Expanding-window splits over month ordinals, oldest fold first.
+
+    Each fold trains on every month before its origin and tests on the next
+    ``horizon`` months; consecutive origins are ``step`` months apart and the
+    last fold ends at the latest month. Folds with fewer than
+    ``min_train_months`` training months are dropped.
+    Returns ``[(train_end, test_months), ...]``.
+    """
+    unique = np.unique(months)
+    folds = []
+    for back in range(n_folds - 1, -1, -1):
+        test_end = len(unique) - 1 - back * step
+        test_start = test_end - horizon + 1
+        if test_start < min_train_months:
+            continue
+        folds.append((unique[test_start - 1], unique[test_start:test_end + 1]))
+    return folds
+
+
+def _run_fold(args):
+    matrix, model_type, n_jobs, fold, train_end, test_months = args
+    # Rows are sorted by month, so both windows are slices of the mapped matrix
+    train = matrix.rows_until(train_end)
+    test = matrix.rows_between(test_months[0], test_months[-1])
+
+    model = make_model(model_type, n_jobs=n_jobs)
+    with thread_budget(n_jobs):
+        start = time.perf_counter()
+        model.fit(matrix.frame(train), matrix.target(train))
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = model.predict(matrix.frame(test))
+        predict_seconds = time.perf_counter() - start
+
+    target_col = matrix.target_col
+    predictions = matrix.index.iloc[test][SERIES_KEYS + ['year_month']].reset_index(drop=True)
+    predictions[target_col] = matrix.target(test).astype(np.float64)
+    predictions['predicted'] = y_pred
+    predictions['fold'] = fold
+
+    summary = {
+        'fold': fold,
+        'train_end': str(pd.Period(ordinal=train_end, freq='M')),
+        'test_start': str(pd.Period(ordinal=test_months[0], freq='M')),
+        'test_end': str(pd.Period(ordinal=test_months[-1], freq='M')),
+        'n_train': train.stop - train.start,
+        'n_test': test.stop - test.start,
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds,
+        **error_metrics(predictions[target_col], y_pred),
+    }
+    return summary, predictions
+
+
+def backtest(data, model_type='Random Forest', n_folds=4, horizon=1, step=1, min_train_months=3,
+             target_col='monthly_quantity', max_workers=None):
+    """Rolling-origin backtest of one model type, with the folds fitted in a process pool.
+
+    ``data`` is the feature frame from ``create_features`` or a
+    ``FeatureMatrix`` of it, which the workers map by path. Test months are
+    scored one step ahead from their observed lags. Returns a dict with
+    ``folds`` (one row per fold: window, sizes, fit/predict seconds, MAE,
+    RMSE, sMAPE), ``series`` (the same errors per product/shop over all
+    folds), ``predictions`` and ``wall_seconds``.
+    """
+    start = time.perf_counter()
+    months = data.months if isinstance(data, FeatureMatrix) else month_ordinals(data['year_month'])
+    folds = rolling_origin_folds(months, n_folds, horizon, step, min_train_months)
+    if not folds:
+        raise ValueError("Not enough months of history for a rolling-origin backtest")
+
+    max_workers = max_workers or min(len(folds), os.cpu_count() or 1)
+    n_jobs = max(1, (os.cpu_count() or 1) // max_workers)
+    with shared_matrix(data, FEATURES, target_col) as matrix, ProcessPoolExecutor(max_workers=max_workers) as pool:
+        target_col = matrix.target_col
+        jobs = [(matrix, model_type, n_jobs, i, train_end, test_months)
+                for i, (train_end, test_months) in enumerate(folds)]
+        results = list(pool.map(_run_fold, jobs))
+
+    fold_table = pd.DataFrame([summary for summary, _ in results]).set_index('fold')
+    predictions = pd.concat([p for _, p in results], ignore_index=True)
+
+    error = predictions['predicted'] - predictions[target_col]
+    per_row = predictions[SERIES_KEYS].assign(
+        abs_error=error.abs(), sq_error=error ** 2,
+        smape=smape_terms(predictions[target_col], predictions['predicted'])
+    )
+    series = per_row.groupby(SERIES_KEYS, observed=True).agg(
+        n_test=('abs_error', 'size'), mae=('abs_error', 'mean'),
+        rmse=('sq_error', 'mean'), smape=('smape', 'mean')
+    )
+    series['rmse'] = np.sqrt(series['rmse'])
+
+    return {
+        'folds': fold_table,
+        'series': series.reset_index(),
+        'predictions': predictions,
+        'wall_seconds': time.perf_counter() - start,
+    }
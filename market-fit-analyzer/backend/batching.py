@@ -0,0 +1,127 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+
+class MicroBatcher:
+    """Collect concurrent predict requests and score them with one ``predict`` call.
+
+    Callers ``submit`` feature rows and get a Future back. A worker thread
+    takes the first waiting request, keeps collecting until ``max_batch_size``
+    rows are queued or ``max_wait_ms`` has passed, stacks the rows into one
+    matrix and hands each caller its slice of the result. A larger wait gives
+    bigger batches (throughput); a smaller one answers sooner (latency).
+    """
+
+    def __init__(self, predict_fn, columns=None, max_batch_size=256, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.columns = list(columns) if columns is not None else None
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.max_seen = 0
+        self.wait_seconds = 0.0
+        self.batch_sizes = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        """Queue one row (1-D) or several rows (2-D / DataFrame); the Future resolves to their predictions."""
+        if self._closed:
+            raise RuntimeError('MicroBatcher is closed')
+        if isinstance(rows, pd.DataFrame):
+            rows = rows[self.columns] if self.columns is not None else rows
+            rows = rows.to_numpy(np.float64)
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        if rows.ndim != 2 or (self.columns is not None and rows.shape[1] != len(self.columns)):
+            expected = f'{len(self.columns)} columns' if self.columns is not None else '2-D rows'
+            raise ValueError(f'Expected {expected}, got rows of shape {rows.shape}')
+        future = Future()
+        self._queue.put((rows, future, time.perf_counter()))
+        return future
+
+    def predict(self, rows, timeout=None):
+        """Blocking ``submit``: wait for and return the predictions."""
+        return self.submit(rows).result(timeout)
+
+    def close(self):
+        """Stop the worker after the requests already queued are answered."""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        n_rows = len(first[0])
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while n_rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # finish this batch, stop on the next loop
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            try:
+                # Inside the try: a failure here (e.g. mixed row widths without ``columns``) is this
+                # batch's error, and the worker keeps serving the requests queued after it
+                stacked = np.vstack([rows for rows, _, _ in batch])
+                X = pd.DataFrame(stacked, columns=self.columns) if self.columns is not None else stacked
+                predictions = np.asarray(self.predict_fn(X))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for rows, future, _ in batch:
+                future.set_result(predictions[offset:offset + len(rows)])
+                offset += len(rows)
+            self._record(batch, len(stacked), started)
+
+    def _record(self, batch, n_rows, started):
+        with self._lock:
+            self.requests += len(batch)
+            self.rows += n_rows
+            self.batches += 1
+            self.max_seen = max(self.max_seen, n_rows)
+            self.wait_seconds += sum(started - queued for _, _, queued in batch)
+            bucket = 1 << (n_rows - 1).bit_length()  # power-of-two size buckets
+            self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'rows': self.rows,
+                'batches': self.batches,
+                'mean_batch_rows': self.rows / self.batches if self.batches else 0.0,
+                'max_batch_rows': self.max_seen,
+                'mean_wait_ms': 1000 * self.wait_seconds / self.requests if self.requests else 0.0,
+                'batch_size_histogram': dict(sorted(self.batch_sizes.items())),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+            }
@@ -0,0 +1,104 @@
+"""Compact forest export vs the sklearn RandomForestRegressor: size, load time, accuracy, throughput.
+
+Run from the backend folder:  python benchmarks/bench_compact_forest.py [--data-dir DIR --trees 100]
+
+The forest is trained on the pipeline's own lag features (from the bundled
+CSVs, or from ``--data-dir`` holding transactions/products/shops files as
+written by synthetic_data.py). Those features repeat values that sit right
+next to split thresholds, which continuous random data would not exercise.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact_forest import CompactForest  # noqa: E402
+from product_performance import (  # noqa: E402
+    FEATURES, create_features, holdout_mask, load_data, prepare_monthly_data)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def dataset_paths(data_dir=None):
+    """Transactions, products and shops files in ``data_dir`` (CSV or Parquet), else the bundled CSVs."""
+    folder = data_dir or BACKEND_DIR
+    paths = []
+    for name in ('transactions', 'products', 'shops'):
+        candidates = [os.path.join(folder, f'{name}.{ext}') for ext in ('csv', 'parquet')]
+        paths.append(next((p for p in candidates if os.path.exists(p)), candidates[0]))
+    return paths
+
+
+def training_frames(data_dir=None):
+    """Pipeline features split by month like train_model: (X_train, y_train, X_test)."""
+    data, _, _ = load_data(*dataset_paths(data_dir))
+    features = create_features(prepare_monthly_data(data))
+    test = holdout_mask(features)
+    return features.loc[~test, FEATURES], features.loc[~test, 'monthly_quantity'], features.loc[test, FEATURES]
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def rows_per_second(predict, X, batch_rows, budget=2000):
+    """Throughput when X is scored in batches of ``batch_rows``."""
+    batches = [X.iloc[i:i + batch_rows] for i in range(0, min(len(X), max(budget, batch_rows)), batch_rows)]
+    seconds, _ = timed(lambda: [predict(b) for b in batches], repeat=1)
+    return sum(len(b) for b in batches) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', help='folder with transactions/products/shops files (default: bundled CSVs)')
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32, 256, 10_000])
+    args = parser.parse_args()
+
+    X, y, X_test = training_frames(args.data_dir)
+    model = RandomForestRegressor(n_estimators=args.trees, n_jobs=-1, random_state=0).fit(X, y)
+    print(f"{len(X)} training rows, {len(X_test)} scored rows")
+    expected = model.predict(X_test)
+    tmp = tempfile.mkdtemp()
+
+    header = ''.join(f"{f'rows/s @{b}':>14}" for b in args.batch_sizes)
+    print(f"{'variant':>14}{'file MB':>9}{'RAM MB':>8}{'load ms':>9}{header}{'max |diff|':>12}{'rows off':>10}")
+
+    sk_path = os.path.join(tmp, 'model.joblib')
+    joblib.dump(model, sk_path)
+    t_load, _ = timed(lambda: joblib.load(sk_path))
+    throughput = ''.join(f"{rows_per_second(model.predict, X_test, b):>14,.0f}" for b in args.batch_sizes)
+    nodes = sum(e.tree_.node_count for e in model.estimators_)
+    # sklearn keeps a 64-byte node record plus a float64 value per node
+    print(f"{'sklearn':>14}{os.path.getsize(sk_path) / 1e6:>9.1f}{nodes * 72 / 1e6:>8.1f}"
+          f"{t_load * 1e3:>9.1f}{throughput}{0:>12.2g}{0:>10}")
+
+    variants = [('float64', {}), ('float32', {'dtype': np.float32}),
+                ('f32 + 16-bit', {'dtype': np.float32, 'leaf_bits': 16}),
+                ('f32 + 8-bit', {'dtype': np.float32, 'leaf_bits': 8})]
+    for name, kwargs in variants:
+        path = os.path.join(tmp, f'{name}.npz')
+        CompactForest.from_sklearn(model, **kwargs).save(path)
+        t_load, compact = timed(lambda: CompactForest.load(path))
+        throughput = ''.join(f"{rows_per_second(compact.predict, X_test, b):>14,.0f}" for b in args.batch_sizes)
+        diff = np.abs(compact.predict(X_test) - expected)
+        # Rows off by more than leaf rounding alone allows took another branch somewhere
+        tolerance = compact.value_scale / 2 + 1e-6 if 'leaf_bits' in kwargs else 1e-6
+        print(f"{name:>14}{os.path.getsize(path) / 1e6:>9.1f}{compact.nbytes / 1e6:>8.1f}"
+              f"{t_load * 1e3:>9.1f}{throughput}{diff.max():>12.2g}{int((diff > tolerance).sum()):>10}")
+
+
+if __name__ == '__main__':
+    main()
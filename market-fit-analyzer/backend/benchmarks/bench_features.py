@@ -0,0 +1,81 @@
+"""Throughput of the lag feature engine against the original groupby().shift code.
+
+Run from the backend folder:  python benchmarks/bench_features.py [--series 20000 --months 36]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feature_engine import compute_lag_features, feature_names  # noqa: E402
+
+
+def legacy_lag_features(monthly_data):
+    """The pre-engine implementation: three groupby objects and a row-wise mean."""
+    monthly_data = monthly_data.sort_values(['product_id', 'shop_id', 'year_month']).copy()
+    monthly_data['last_month_qty'] = monthly_data.groupby(['product_id', 'shop_id'])['monthly_quantity'].shift(1)
+    monthly_data['last_2_months_qty'] = monthly_data.groupby(['product_id', 'shop_id'])['monthly_quantity'].shift(2)
+    monthly_data['last_3_months_qty'] = monthly_data.groupby(['product_id', 'shop_id'])['monthly_quantity'].shift(3)
+    monthly_data['avg_last_3_months'] = monthly_data[['last_month_qty', 'last_2_months_qty', 'last_3_months_qty']].mean(axis=1)
+    monthly_data['trend'] = monthly_data['last_month_qty'] - monthly_data['last_2_months_qty']
+    return monthly_data
+
+
+def synthetic_monthly(n_series, n_months, gap_rate=0.0, shuffle=False, seed=0):
+    """(product, shop, month) cells; ``gap_rate`` drops that share of cells to create gaps."""
+    rng = np.random.default_rng(seed)
+    series = np.repeat(np.arange(n_series), n_months)
+    frame = pd.DataFrame({
+        'product_id': series // 50,
+        'shop_id': series % 50,
+        'year_month': pd.period_range('2020-01', periods=n_months, freq='M').repeat(1).tolist() * n_series,
+        'monthly_quantity': rng.poisson(20, size=n_series * n_months).astype(float),
+    })
+    if gap_rate:
+        frame = frame[rng.random(len(frame)) >= gap_rate]
+    if shuffle:
+        frame = frame.sample(frac=1.0, random_state=seed)
+    return frame.reset_index(drop=True)
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--series', type=int, default=20000)
+    parser.add_argument('--months', type=int, default=36)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # Contiguous months: both implementations must agree exactly
+    frame = synthetic_monthly(args.series, args.months, shuffle=True)
+    legacy = legacy_lag_features(frame).sort_index()
+    engine = compute_lag_features(frame)
+    for name in feature_names():
+        np.testing.assert_allclose(legacy[name].to_numpy(), engine[name], equal_nan=True)
+
+    print(f"{'case':<22}{'rows':>12}{'legacy s':>12}{'engine s':>12}{'engine rows/s':>16}{'speedup':>10}")
+    # prepare_monthly_data emits rows sorted by series and month; shuffled rows force the sort
+    cases = [('contiguous', 0.0, False), ('20% gaps', 0.2, False), ('20% gaps, shuffled', 0.2, True)]
+    for label, gap_rate, shuffle in cases:
+        frame = synthetic_monthly(args.series, args.months, gap_rate=gap_rate, shuffle=shuffle)
+        t_legacy = best_of(lambda: legacy_lag_features(frame), args.repeat)
+        t_engine = best_of(lambda: compute_lag_features(frame), args.repeat)
+        print(f"{label:<22}{len(frame):>12,}{t_legacy:>12.3f}{t_engine:>12.3f}"
+              f"{len(frame) / t_engine:>16,.0f}{t_legacy / t_engine:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
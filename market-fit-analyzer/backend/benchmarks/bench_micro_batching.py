@@ -0,0 +1,63 @@
+"""Concurrent single-row predictions: one model.predict per request vs the MicroBatcher.
+
+Run from the backend folder:  python benchmarks/bench_micro_batching.py [--requests 2000 --clients 32]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batching import MicroBatcher  # noqa: E402
+from product_performance import FEATURES  # noqa: E402
+
+
+def fitted_forest(n_rows=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.random((n_rows, len(FEATURES))) * 10, columns=FEATURES)
+    y = 2 * X['last_month_qty'] + X['price_difference'] + rng.normal(size=n_rows)
+    return RandomForestRegressor(n_estimators=100, n_jobs=-1, random_state=seed).fit(X, y)
+
+
+def run_clients(fn, rows, clients):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(fn, rows))
+    return time.perf_counter() - start, np.concatenate(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--waits', type=float, nargs='+', default=[1, 5, 20])
+    args = parser.parse_args()
+
+    model = fitted_forest()
+    rows = np.random.default_rng(1).random((args.requests, len(FEATURES))) * 10
+
+    def single(row):
+        return model.predict(pd.DataFrame([row], columns=FEATURES))
+
+    t_single, expected = run_clients(single, rows, args.clients)
+    print(f"{'mode':>16}{'req/s':>9}{'mean batch':>12}{'mean wait ms':>14}")
+    print(f"{'per-request':>16}{args.requests / t_single:>9.0f}{1:>12.1f}{0:>14.1f}")
+
+    for wait in args.waits:
+        batcher = MicroBatcher(model.predict, columns=FEATURES, max_wait_ms=wait)
+        elapsed, got = run_clients(batcher.predict, rows, args.clients)
+        stats = batcher.stats()
+        batcher.close()
+        assert np.allclose(got, expected)
+        print(f"{f'batched {wait:g}ms':>16}{args.requests / elapsed:>9.0f}"
+              f"{stats['mean_batch_rows']:>12.1f}{stats['mean_wait_ms']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
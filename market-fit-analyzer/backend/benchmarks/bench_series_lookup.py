@@ -0,0 +1,68 @@
+"""Per-series lookup latency: boolean-mask scans vs the prebuilt SeriesIndex.
+
+Run from the backend folder:  python benchmarks/bench_series_lookup.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from series_index import SeriesIndex  # noqa: E402
+
+
+def synthetic_cells(n_rows, n_months=24, seed=0):
+    """Monthly (product, shop, month) rows with string IDs, like the dashboard's frames."""
+    rng = np.random.default_rng(seed)
+    n_series = -(-n_rows // n_months)
+    series = np.repeat(np.arange(n_series), n_months)[:n_rows]
+    return pd.DataFrame({
+        'product_id': (series // 50).astype(str),
+        'shop_id': (series % 50).astype(str),
+        'year_month': pd.PeriodIndex(pd.period_range('2022-01', periods=n_months, freq='M')).take(
+            np.tile(np.arange(n_months), n_series)[:n_rows]),
+        'monthly_quantity': rng.poisson(20, size=n_rows).astype(float),
+    })
+
+
+def per_call(fn, keys):
+    start = time.perf_counter()
+    for product_id, shop_id in keys:
+        fn(product_id, shop_id)
+    return (time.perf_counter() - start) / len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12}{'build ms':>11}{'scan us':>12}{'index us':>11}{'latest us':>11}{'speedup':>10}")
+    for n_rows in args.sizes:
+        frame = synthetic_cells(n_rows)
+        start = time.perf_counter()
+        index = SeriesIndex(frame)
+        build = time.perf_counter() - start
+
+        rng = np.random.default_rng(1)
+        all_keys = list(index.keys())
+        keys = [all_keys[i] for i in rng.integers(0, len(all_keys), size=args.lookups)]
+
+        def scan(product_id, shop_id):
+            subset = frame[(frame['product_id'] == product_id) & (frame['shop_id'] == shop_id)]
+            return subset.sort_values('year_month').iloc[-1]
+
+        t_scan = per_call(scan, keys)
+        t_index = per_call(index.series, keys)
+        t_latest = per_call(index.latest_row, keys)
+        print(f"{n_rows:>12,}{build * 1e3:>11.1f}{t_scan * 1e6:>12.0f}{t_index * 1e6:>11.0f}"
+              f"{t_latest * 1e6:>11.0f}{t_scan / t_index:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
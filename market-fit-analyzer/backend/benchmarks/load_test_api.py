@@ -0,0 +1,94 @@
+"""Load test for the prediction API (prediction/api.py) running on a local instance.
+
+Start the API first:  cd prediction && uvicorn api:app --port 8000
+Then, from the backend folder:  python benchmarks/load_test_api.py [--requests 2000 --concurrency 32]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_performance import FEATURES  # noqa: E402
+
+
+def call(base_url, method, path, body=None):
+    """One request; returns (status, seconds)."""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, TimeoutError):
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def request_mix(catalog, n_requests, batch_size, seed=0):
+    """Random (method, path, body) requests across every endpoint."""
+    rng = np.random.default_rng(seed)
+    products, series = catalog['products'], catalog['series']
+    categories, districts = catalog['categories'], catalog['districts']
+
+    def pick(items):
+        return items[rng.integers(len(items))]
+
+    def product_path(suffix):
+        return f"/products/{urllib.parse.quote(pick(products))}/{suffix}"
+
+    makers = [
+        lambda: ('GET', product_path('top-districts'), None),
+        lambda: ('GET', product_path('seasonal-trend'), None),
+        lambda: ('GET', product_path(f'price-sensitivity?price={rng.integers(10, 1000)}'), None),
+        lambda: ('POST', '/new-launch', {'name': 'Load Test', 'price': float(rng.integers(10, 1000)),
+                                         'category': pick(categories), 'district': pick(districts)}),
+        lambda: ('GET', '/forecast/{}/{}'.format(*pick(series)), None),
+        lambda: ('POST', '/batch', {'queries': [
+            {'query': 'forecast', 'params': dict(zip(('product_id', 'shop_id'), pick(series)))}
+            for _ in range(batch_size)]}),
+        lambda: ('POST', '/predict', {'rows': [dict(zip(FEATURES, (rng.random(len(FEATURES)) * 10).tolist()))]}),
+    ]
+    return [makers[i]() for i in rng.integers(len(makers), size=n_requests)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=20, help='forecast queries per /batch request')
+    args = parser.parse_args()
+
+    with urllib.request.urlopen(args.url + '/catalog', timeout=60) as response:
+        catalog = json.loads(response.read())
+    mix = request_mix(catalog, args.requests, args.batch_size)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda r: call(args.url, *r), mix))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([seconds for _, seconds in results]) * 1e3
+    statuses = np.array([status for status, _ in results])
+    print(f"{args.requests} requests, concurrency {args.concurrency}: {args.requests / elapsed:.0f} req/s")
+    print(f"latency ms  p50 {np.percentile(latencies, 50):.1f}  p95 {np.percentile(latencies, 95):.1f}"
+          f"  p99 {np.percentile(latencies, 99):.1f}  max {latencies.max():.1f}")
+    print(f"2xx {(statuses // 100 == 2).sum()}  404 {(statuses == 404).sum()}"
+          f"  other errors {((statuses // 100 != 2) & (statuses != 404)).sum()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""Stage-by-stage wall time and peak memory of the pipeline on synthetic data, with baseline checks.
+
+Run from the backend folder:
+    python benchmarks/run_benchmarks.py --rows 1000000 --output results.json
+    python benchmarks/run_benchmarks.py --rows 1000000 --baseline baseline.json   # exit 1 on regression
+    python benchmarks/run_benchmarks.py --rows 1000000 --baseline baseline.json --save-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clustering import ProductClusterer, product_profiles  # noqa: E402
+from dashboard_data import category_stats, predictions_csv, seasonality_profiles  # noqa: E402
+from feature_store import write_feature_matrix  # noqa: E402
+from forecasting import forecast_catalog  # noqa: E402
+from hierarchy import hierarchical_forecast  # noqa: E402
+from pricing import optimize_prices  # noqa: E402
+from product_performance import (  # noqa: E402
+    FEATURES, create_features, load_data, prepare_monthly_data, stream_monthly_data, train_model
+)
+from series_index import SeriesIndex  # noqa: E402
+from simulation import simulate_scenarios  # noqa: E402
+from synthetic_data import write_dataset  # noqa: E402
+
+
+def pipeline_stages(paths, work_dir):
+    """(name, fn(ctx) -> value) pairs; each value is stored in ``ctx[name]`` for later stages."""
+    transactions, products, shops = paths
+    return [
+        ('load_data', lambda ctx: load_data(transactions, products, shops)),
+        ('prepare_monthly_data', lambda ctx: prepare_monthly_data(ctx['load_data'][0])),
+        ('stream_monthly_data', lambda ctx: stream_monthly_data(
+            transactions, ctx['load_data'][1], ctx['load_data'][2])),
+        ('create_features', lambda ctx: create_features(ctx['prepare_monthly_data'])),
+        ('feature_matrix', lambda ctx: write_feature_matrix(work_dir, ctx['create_features'], FEATURES)),
+        ('train_model', lambda ctx: train_model(ctx['feature_matrix'])),
+        ('forecast_catalog', lambda ctx: forecast_catalog(ctx['train_model'], ctx['prepare_monthly_data'])),
+        ('hierarchy', lambda ctx: hierarchical_forecast(ctx['forecast_catalog'], ctx['prepare_monthly_data'])),
+        ('series_indexes', lambda ctx: [SeriesIndex(ctx['prepare_monthly_data']),
+                                        SeriesIndex(ctx['create_features']),
+                                        SeriesIndex(ctx['forecast_catalog'])]),
+        ('what_if_simulation', lambda ctx: simulate_scenarios(
+            ctx['train_model'], ctx['create_features'][FEATURES].iloc[-1], n_scenarios=10_000, seed=0)),
+        ('optimize_prices', lambda ctx: optimize_prices(ctx['train_model'], ctx['prepare_monthly_data'])),
+        ('tab_clusters', lambda ctx: ProductClusterer().fit(product_profiles(ctx['prepare_monthly_data'])).assignments_),
+        ('tab_seasonality', lambda ctx: seasonality_profiles(ctx['create_features'])),
+        ('tab_category_stats', lambda ctx: category_stats(ctx['create_features'])),
+        ('export_predictions', lambda ctx: predictions_csv(
+            ctx['create_features'], ctx['feature_matrix'].predict(ctx['train_model']))),
+    ]
+
+
+# Stages a requested stage needs to have run first
+DEPENDENTS = {
+    'prepare_monthly_data': {'load_data'},
+    'stream_monthly_data': {'load_data'},
+    'create_features': {'load_data', 'prepare_monthly_data'},
+    'feature_matrix': {'load_data', 'prepare_monthly_data', 'create_features'},
+    'train_model': {'load_data', 'prepare_monthly_data', 'create_features', 'feature_matrix'},
+    'forecast_catalog': {'load_data', 'prepare_monthly_data', 'create_features', 'feature_matrix', 'train_model'},
+    'hierarchy': {'load_data', 'prepare_monthly_data', 'create_features', 'feature_matrix', 'train_model',
+                  'forecast_catalog'},
+    'series_indexes': {'load_data', 'prepare_monthly_data', 'create_features', 'feature_matrix', 'train_model',
+                       'forecast_catalog'},
+    'what_if_simulation': {'load_data', 'prepare_monthly_data', 'create_features', 'feature_matrix', 'train_model'},
+    'optimize_prices': {'load_data', 'prepare_monthly_data', 'create_features', 'feature_matrix', 'train_model'},
+    'tab_clusters': {'load_data', 'prepare_monthly_data'},
+    'tab_seasonality': {'load_data', 'prepare_monthly_data', 'create_features'},
+    'tab_category_stats': {'load_data', 'prepare_monthly_data', 'create_features'},
+    'export_predictions': {'load_data', 'prepare_monthly_data', 'create_features', 'feature_matrix', 'train_model'},
+}
+
+
+def run_stages(stages, only=None):
+    """Run stages in order, recording wall seconds and tracemalloc peak MB of each.
+
+    ``only`` restricts the run to those stages and the ones they depend on.
+    """
+    needed = set(only).union(*(DEPENDENTS.get(o, set()) for o in only)) if only else None
+    ctx, results = {}, {}
+    tracemalloc.start()
+    for name, fn in stages:
+        if needed is not None and name not in needed:
+            continue
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        ctx[name] = fn(ctx)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - base
+        rows = len(ctx[name]) if hasattr(ctx[name], '__len__') and not isinstance(ctx[name], (str, dict)) else None
+        results[name] = {'seconds': round(seconds, 4), 'peak_mb': round(peak / 1e6, 2), 'rows': rows}
+        print(f"{name:>22}{seconds:>10.3f}s{peak / 1e6:>10.1f} MB")
+    tracemalloc.stop()
+    return results
+
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.05, min_mb=5.0):
+    """Stages slower or hungrier than the baseline by more than ``tolerance`` (and the absolute floors)."""
+    regressions = []
+    for name, current in results['stages'].items():
+        previous = baseline.get('stages', {}).get(name)
+        if previous is None:
+            continue
+        for metric, floor in (('seconds', min_seconds), ('peak_mb', min_mb)):
+            before, after = previous[metric], current[metric]
+            if after > before * (1 + tolerance) and after - before > floor:
+                regressions.append({'stage': name, 'metric': metric, 'baseline': before, 'current': after,
+                                    'ratio': round(after / before, 2) if before else None})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--shops', type=int, default=50)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--seasonality', type=float, default=0.5)
+    parser.add_argument('--data-dir', help='where synthetic files are generated and reused')
+    parser.add_argument('--stages', nargs='+', help='only these stages (plus what they need)')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='write these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    name = f'synthetic-{args.rows}-{args.products}-{args.shops}-{args.months}-{args.seasonality}'
+    data_dir = args.data_dir or os.path.join(tempfile.gettempdir(), name)
+    start = time.perf_counter()
+    paths = write_dataset(data_dir, args.rows, args.products, args.shops, args.months, args.seasonality)
+    print(f"✅ Synthetic data in {data_dir} ({time.perf_counter() - start:.1f}s)")
+
+    work_dir = tempfile.mkdtemp(prefix='bench-features-')
+    results = {
+        'meta': {
+            'rows': args.rows, 'products': args.products, 'shops': args.shops, 'months': args.months,
+            'seasonality': args.seasonality, 'python': platform.python_version(),
+            'numpy': np.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        },
+        'stages': run_stages(pipeline_stages(paths, work_dir), set(args.stages or [])),
+    }
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            results['regressions'] = compare(results, json.load(f), args.tolerance)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+    if args.save_baseline and args.baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+
+    for r in results.get('regressions', []):
+        print(f"❌ {r['stage']} {r['metric']}: {r['baseline']} -> {r['current']} ({r['ratio']}x)")
+    if results.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Synthetic transactions/products/shops files in the dashboard's schema, at any scale.
+
+Run from the backend folder:
+    python benchmarks/synthetic_data.py --rows 10000000 --products 2000 --shops 500 --out /tmp/synthetic
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Vocabulary of the bundled sample data
+CITIES = ['Bhaktapur', 'Biratnagar', 'Kathmandu', 'Lalitpur', 'Pokhara']
+DISTRICTS = ['Bhaktapur', 'Kaski', 'Kathmandu', 'Lalitpur', 'Morang']
+CATEGORIES = ['Beverage', 'Dairy', 'Household', 'Personal Care', 'Snacks']
+BRANDS = ['Coca-Cola', 'Himalaya', 'Kurkure', 'Lays', 'Nestle', 'Pepsi', 'Pringles', 'Surf Excel', 'Vim', 'Wai Wai']
+PAYMENT_METHODS = ['CARD', 'CASH', 'UPI']
+HOLIDAY_BOOST = {1: 0.2, 4: 0.1, 10: 0.3, 11: 0.2, 12: 0.3}
+
+
+def make_products(n_products, rng):
+    return pd.DataFrame({
+        'product_id': np.arange(1, n_products + 1),
+        'product_name': [f'Product {i}' for i in range(1, n_products + 1)],
+        'category': rng.choice(CATEGORIES, n_products),
+        'brand': rng.choice(BRANDS, n_products),
+        'standard_price': np.round(rng.uniform(10, 500, n_products), 2),
+    })
+
+
+def make_shops(n_shops, rng):
+    return pd.DataFrame({
+        'shop_id': np.arange(1, n_shops + 1),
+        'city': rng.choice(CITIES, n_shops),
+        'district': rng.choice(DISTRICTS, n_shops),
+    })
+
+
+def month_weights(months, seasonality):
+    """Relative sales per calendar month: a yearly wave plus holiday bumps, scaled by ``seasonality``."""
+    calendar = months.month.to_numpy()
+    wave = np.cos(2 * np.pi * (calendar - 11) / 12)
+    bump = np.array([HOLIDAY_BOOST.get(m, 0.0) for m in calendar])
+    weights = 1 + seasonality * (0.5 * wave + bump)
+    return weights / weights.sum()
+
+
+def iter_transactions(n_rows, products, shops, start='2023-01', n_months=12, seasonality=0.5,
+                      chunk_rows=1_000_000, seed=0):
+    """Yield transaction frames of at most ``chunk_rows`` rows.
+
+    Product popularity is Zipf-like and shop traffic is log-normal, so a few
+    series dominate as in real retail data; months follow ``month_weights``.
+    """
+    rng = np.random.default_rng(seed)
+    months = pd.period_range(start, periods=n_months, freq='M')
+    p_month = month_weights(months, seasonality)
+    p_product = 1 / np.arange(1, len(products) + 1) ** 0.8
+    p_product = rng.permutation(p_product / p_product.sum())
+    p_shop = rng.lognormal(0, 0.5, len(shops))
+    p_shop /= p_shop.sum()
+
+    month_start = months.to_timestamp().to_numpy()
+    month_days = months.days_in_month.to_numpy()
+    standard_price = products['standard_price'].to_numpy()
+
+    for offset in range(0, n_rows, chunk_rows):
+        n = min(chunk_rows, n_rows - offset)
+        product_pos = rng.choice(len(products), n, p=p_product)
+        month_pos = rng.choice(n_months, n, p=p_month)
+        days = (rng.random(n) * month_days[month_pos]).astype('timedelta64[D]')
+        quantity = rng.integers(1, 11, n)
+        unit_price = np.round(standard_price[product_pos] * rng.normal(1, 0.1, n).clip(0.5, 1.5), 2)
+        yield pd.DataFrame({
+            'shop_id': shops['shop_id'].to_numpy()[rng.choice(len(shops), n, p=p_shop)],
+            'product_id': products['product_id'].to_numpy()[product_pos],
+            'transaction_type': 'SALE',
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'total_amount': np.round(quantity * unit_price, 2),
+            'transaction_time': month_start[month_pos] + days,
+            'payment_method': rng.choice(PAYMENT_METHODS, n),
+        })
+
+
+def write_dataset(out_dir, n_rows, n_products=200, n_shops=50, n_months=12, seasonality=0.5,
+                  fmt='csv', chunk_rows=1_000_000, seed=0):
+    """Write products.csv, shops.csv and transactions.<fmt> into ``out_dir``; returns the three paths.
+
+    Transactions are generated and written chunk by chunk, so memory stays
+    flat however many rows are requested. Existing files are reused.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {
+        'transactions': os.path.join(out_dir, f'transactions.{fmt}'),
+        'products': os.path.join(out_dir, 'products.csv'),
+        'shops': os.path.join(out_dir, 'shops.csv'),
+    }
+    if all(os.path.exists(p) for p in paths.values()):
+        return paths['transactions'], paths['products'], paths['shops']
+
+    rng = np.random.default_rng(seed)
+    products = make_products(n_products, rng)
+    shops = make_shops(n_shops, rng)
+    products.to_csv(paths['products'], index=False)
+    shops.to_csv(paths['shops'], index=False)
+
+    tmp_path = paths['transactions'] + '.tmp'
+    chunks = iter_transactions(n_rows, products, shops, n_months=n_months, seasonality=seasonality,
+                               chunk_rows=chunk_rows, seed=seed + 1)
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            writer = writer or pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table)
+        writer.close()
+    else:
+        for i, chunk in enumerate(chunks):
+            chunk['transaction_time'] = chunk['transaction_time'].dt.strftime('%Y-%m-%d')
+            chunk.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    os.replace(tmp_path, paths['transactions'])
+    return paths['transactions'], paths['products'], paths['shops']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--shops', type=int, default=50)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--seasonality', type=float, default=0.5)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='synthetic_data')
+    args = parser.parse_args()
+
+    paths = write_dataset(args.out, args.rows, args.products, args.shops, args.months, args.seasonality,
+                          args.format, seed=args.seed)
+    for path in paths:
+        print(f"✅ {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from feature_engine import month_ordinals
+from ingestion import fingerprint
+from model_registry import ModelRegistry
+
+
+CORE_FEATURES = ['log_volume', 'volatility', 'log_price', 'trend']
+SEASON_FEATURES = [f'season_{m}' for m in range(1, 13)]
+PROFILE_FEATURES = CORE_FEATURES + SEASON_FEATURES
+
+
+def product_profiles(monthly_data):
+    """One feature vector per product from the (product, shop, month) aggregate.
+
+    Shops are summed into product-month totals first. ``log_volume`` and
+    ``log_price`` are log1p of the mean monthly quantity and price,
+    ``volatility`` the coefficient of variation of the monthly quantity,
+    ``trend`` the least-squares slope per month relative to the mean, and
+    ``season_1..12`` the mean quantity of each calendar month relative to the
+    product's mean (1.0 for months it never sold in). The raw ``sales_mean``,
+    ``sales_std``, ``price_mean`` and first ``category`` are kept for display.
+    """
+    totals = monthly_data.groupby(['product_id', 'year_month'], observed=True).agg(
+        quantity=('monthly_quantity', 'sum'),
+        price=('avg_price', 'mean'),
+        category=('category', 'first'),
+    ).reset_index()
+    t = month_ordinals(totals['year_month']).astype(np.float64)
+    q = totals['quantity'].to_numpy(np.float64)
+    totals = totals.assign(t=t, t2=t * t, q2=q * q, tq=t * q, month=totals['year_month'].dt.month)
+
+    sums = totals.groupby('product_id', observed=True).agg(
+        n=('quantity', 'size'), q=('quantity', 'sum'), q2=('q2', 'sum'), t=('t', 'sum'),
+        t2=('t2', 'sum'), tq=('tq', 'sum'), price_mean=('price', 'mean'), category=('category', 'first'),
+    )
+    mean = sums['q'] / sums['n']
+    variance = (sums['q2'] / sums['n'] - mean ** 2).clip(lower=0)
+    t_variance = sums['t2'] / sums['n'] - (sums['t'] / sums['n']) ** 2
+    slope = (sums['tq'] / sums['n'] - mean * sums['t'] / sums['n']) / t_variance.where(t_variance > 0)
+    scale = mean.where(mean > 0)
+
+    profiles = pd.DataFrame({
+        'sales_mean': mean,
+        'sales_std': np.sqrt(variance),
+        'price_mean': sums['price_mean'],
+        'category': sums['category'],
+        'log_volume': np.log1p(mean.clip(lower=0)),
+        'volatility': (np.sqrt(variance) / scale).fillna(0.0),
+        'log_price': np.log1p(sums['price_mean'].clip(lower=0)).fillna(0.0),
+        'trend': (slope / scale).fillna(0.0),
+    })
+
+    seasonal = totals.groupby(['product_id', 'month'], observed=True)['quantity'].mean().unstack()
+    seasonal = seasonal.reindex(index=profiles.index, columns=range(1, 13))
+    seasonal = seasonal.div(scale, axis=0).fillna(1.0)
+    seasonal.columns = SEASON_FEATURES
+    return profiles.join(seasonal)
+
+
+class ProductClusterer:
+    """MiniBatchKMeans over standardized product profiles, keeping every product's latest cluster.
+
+    ``fit`` learns the scaling and the centres from a full profile table.
+    ``partial_fit`` folds re-profiled products (e.g. after new months arrive)
+    into the centres with mini-batch steps, keeping the scaling fixed so the
+    existing centres stay comparable, then reassigns every known product.
+    Each of the twelve standardized seasonal columns is multiplied by
+    ``season_weight / sqrt(12)``. Together they then add as much variance
+    to the distances as ``season_weight ** 2`` core features, i.e. one
+    feature's worth at the default weight of 1.
+    """
+
+    def __init__(self, n_clusters=5, batch_size=4096, season_weight=1.0, random_state=42):
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.season_weight = season_weight
+        self.random_state = random_state
+        self.scaler_ = None
+        self.kmeans_ = None
+        self.assignments_ = None
+
+    def _matrix(self, profiles):
+        X = self.scaler_.transform(profiles[PROFILE_FEATURES].to_numpy(np.float64))
+        X[:, len(CORE_FEATURES):] *= self.season_weight / np.sqrt(len(SEASON_FEATURES))
+        return X
+
+    def fit(self, profiles):
+        self.scaler_ = StandardScaler().fit(profiles[PROFILE_FEATURES].to_numpy(np.float64))
+        self.kmeans_ = MiniBatchKMeans(n_clusters=min(self.n_clusters, len(profiles)), batch_size=self.batch_size,
+                                       n_init=3, random_state=self.random_state)
+        self.kmeans_.fit(self._matrix(profiles))
+        self.assignments_ = profiles.assign(cluster=self.kmeans_.labels_)
+        return self
+
+    def partial_fit(self, profiles):
+        if self.kmeans_ is None:
+            return self.fit(profiles)
+        X = self._matrix(profiles)
+        for start in range(0, len(X), self.batch_size):
+            self.kmeans_.partial_fit(X[start:start + self.batch_size])
+
+        known = self.assignments_.drop(index=profiles.index, errors='ignore').drop(columns='cluster')
+        merged = pd.concat([known, profiles]).sort_index()
+        self.assignments_ = merged.assign(cluster=self.predict(merged))
+        return self
+
+    def predict(self, profiles):
+        return self.kmeans_.predict(self._matrix(profiles))
+
+
+def update_clusters(clusterer, monthly_data, affected):
+    """Re-profile the products touched by ``update_monthly_data`` and ``partial_fit`` on them."""
+    touched = monthly_data[monthly_data['product_id'].isin(affected['product_id'].unique())]
+    return clusterer.partial_fit(product_profiles(touched))
+
+
+def cluster_products(key, monthly_data, n_clusters=5, registry=None):
+    """Clusterer for a dataset fingerprint: loaded from the model registry, or fitted and registered."""
+    registry = ModelRegistry() if registry is None else registry
+    cluster_key = fingerprint(key, 'product_clusters', str(n_clusters))
+    entry = registry.load(cluster_key)
+    if entry is not None:
+        return entry[0]
+    clusterer = ProductClusterer(n_clusters=n_clusters).fit(product_profiles(monthly_data))
+    registry.save(cluster_key, clusterer, PROFILE_FEATURES,
+                  params={'kind': 'product_clusters', 'n_clusters': n_clusters,
+                          'products': len(clusterer.assignments_)})
+    return clusterer
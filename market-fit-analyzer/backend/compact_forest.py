@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+
+LEAF_CODE_TYPES = {8: np.uint8, 16: np.uint16}
+
+
+def _round_down(threshold, dtype):
+    """``threshold`` cast to ``dtype``, rounded toward -inf rather than to nearest.
+
+    Inputs are float32, so ``x <= t`` holds exactly when ``x <=`` the largest
+    float32 not above ``t``; rounding to nearest could move a split past
+    inputs that sit between the two values.
+    """
+    cast = threshold.astype(dtype)
+    return np.where(cast > threshold, np.nextafter(cast, -np.inf), cast)
+
+
+class CompactForest:
+    """A fitted sklearn forest regressor flattened into a few contiguous NumPy arrays.
+
+    All trees' nodes live in one set of arrays (split feature, threshold,
+    left/right child, leaf value) with child indices already offset to the
+    global node numbering. Leaves point to themselves with an infinite
+    threshold, so ``predict`` walks every (row, tree) pair down the forest
+    with ``max_depth`` vectorized gather steps and no per-tree Python loop or
+    sklearn input validation.
+
+    Inputs are expected without NaNs (the feature rows never have any).
+    ``dtype=np.float32`` halves the threshold/value storage; thresholds are
+    rounded down, so float32 inputs take the same branch as in sklearn and
+    only the leaf values lose precision. ``leaf_bits`` (8 or 16) stores leaf
+    values as linear integer codes.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 features=None, value_offset=0.0, value_scale=1.0):
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.features = list(features) if features is not None else None
+        self.value_offset = float(value_offset)
+        self.value_scale = float(value_scale)
+        # Interleaved children: [2 * node] is the left child, [2 * node + 1] the right one
+        self._children = np.column_stack([left, right]).ravel()
+        self._is_leaf = left == np.arange(len(left), dtype=left.dtype)
+
+    @classmethod
+    def from_sklearn(cls, model, dtype=np.float64, leaf_bits=None):
+        """Export a fitted RandomForestRegressor / ExtraTreesRegressor."""
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        if any(tree.value.shape[1] != 1 for tree in trees):
+            raise ValueError("Only single-output forests can be compacted")
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+        n_nodes = int(sizes.sum())
+
+        feature = np.empty(n_nodes, dtype=np.int32)
+        threshold = np.empty(n_nodes, dtype=dtype)
+        left = np.empty(n_nodes, dtype=np.int32)
+        right = np.empty(n_nodes, dtype=np.int32)
+        value = np.empty(n_nodes, dtype=np.float64)
+        for tree, offset in zip(trees, offsets):
+            nodes = slice(offset, offset + tree.node_count)
+            own = np.arange(offset, offset + tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = np.where(is_leaf, 0.0, _round_down(tree.threshold, dtype))
+            left[nodes] = np.where(is_leaf, own, tree.children_left + offset)
+            right[nodes] = np.where(is_leaf, own, tree.children_right + offset)
+            value[nodes] = tree.value[:, 0, 0]
+
+        value_offset, value_scale = 0.0, 1.0
+        if leaf_bits is not None:
+            levels = 2 ** leaf_bits - 1
+            value_offset = value.min()
+            value_scale = (value.max() - value_offset) / levels or 1.0
+            value = np.rint((value - value_offset) / value_scale).astype(LEAF_CODE_TYPES[leaf_bits])
+        else:
+            value = value.astype(dtype)
+
+        features = getattr(model, 'feature_names_in_', None)
+        return cls(feature, threshold, left, right, value, offsets.astype(np.int32),
+                   max(tree.max_depth for tree in trees), features, value_offset, value_scale)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def left(self):
+        return self._children[0::2]
+
+    @property
+    def right(self):
+        return self._children[1::2]
+
+    @property
+    def nbytes(self):
+        arrays = (self.feature, self.threshold, self._children, self._is_leaf, self.value, self.roots)
+        return sum(a.nbytes for a in arrays)
+
+    def _matrix(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features] if self.features is not None else X
+            X = X.to_numpy()
+        # sklearn trees compare float32 inputs against the split thresholds
+        return np.atleast_2d(np.asarray(X, dtype=np.float32))
+
+    def predict(self, X, chunk_rows=4096):
+        """Mean leaf value over all trees for each row of ``X`` (DataFrame or array)."""
+        X = self._matrix(X)
+        n_features = X.shape[1]
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), chunk_rows):
+            chunk = X[start:start + chunk_rows]
+            flat = chunk.ravel()
+            # One slot per (tree, row), tree-major so neighbouring slots share a tree's nodes;
+            # only slots that have not reached a leaf keep walking
+            node = np.repeat(self.roots, len(chunk))
+            base = np.tile(np.arange(len(chunk), dtype=np.int64) * n_features, self.n_trees)
+            active = np.flatnonzero(~self._is_leaf[node])
+            while active.size:
+                current = node[active]
+                go_right = flat[base[active] + self.feature[current]] > self.threshold[current]
+                step = self._children[2 * current + go_right]
+                node[active] = step
+                active = active[~self._is_leaf[step]]
+            leaves = self.value[node].reshape(self.n_trees, len(chunk)).astype(np.float64)
+            out[start:start + len(chunk)] = leaves.mean(axis=0) * self.value_scale + self.value_offset
+        return out
+
+    def save(self, path):
+        """Write the arrays to an uncompressed ``.npz``."""
+        np.savez(path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                 value=self.value, roots=self.roots, max_depth=self.max_depth,
+                 features=np.array(self.features or [], dtype=str),
+                 value_offset=self.value_offset, value_scale=self.value_scale)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            features = arrays['features'].tolist() or None
+            return cls(arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'],
+                       arrays['value'], arrays['roots'], arrays['max_depth'], features,
+                       arrays['value_offset'], arrays['value_scale'])
+
+
+def compact_predictor(model, max_rows=256, **kwargs):
+    """Predict function that sends batches of up to ``max_rows`` through a CompactForest export.
+
+    The compact traversal skips sklearn's per-call overhead, which dominates
+    small batches; large batches still go to the forest's compiled
+    ``predict``. Non-forest models just get their own ``predict``.
+    """
+    if not (isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)) and model.n_outputs_ == 1):
+        return model.predict
+    compact = CompactForest.from_sklearn(model, **kwargs)
+
+    def predict(X):
+        return compact.predict(X) if len(X) <= max_rows else model.predict(X)
+    return predict
@@ -0,0 +1,62 @@
+from clustering import cluster_products
+from instrumentation import timed
+from pipeline_cache import pipeline_cache
+
+
+def memoized(version, name, compute, cache=None):
+    """Compute a dashboard payload once per dataset/model version, timing the computation.
+
+    ``version`` is the pipeline's data or model fingerprint, so results are
+    shared by every rerun and session that shows the same upload and are
+    recomputed only when the data (or model) changes.
+    """
+    cache = pipeline_cache if cache is None else cache
+    return cache.get_or_compute((version, name), lambda: timed(name, compute))
+
+
+def correlation_matrix(monthly_data, feature_columns):
+    return monthly_data[feature_columns + ['monthly_quantity']].corr()
+
+
+def product_clusters(key, monthly_aggregate, n_clusters=5, registry=None):
+    """Product profiles with their cluster label (Product Clusters tab).
+
+    The clusterer and its assignments live in the model registry under the
+    dataset fingerprint, so later sessions read them instead of refitting.
+    """
+    return cluster_products(key, monthly_aggregate, n_clusters, registry).assignments_
+
+
+def seasonality_profiles(monthly_data):
+    """Mean monthly quantity by calendar month, overall and per category (Seasonality tab)."""
+    overall = monthly_data.groupby('month')['monthly_quantity'].mean().reset_index()
+    by_category = monthly_data.groupby(['category', 'month'], observed=True)['monthly_quantity'].mean()
+    return overall, by_category
+
+
+def category_stats(monthly_data):
+    return monthly_data.groupby('category', observed=True).agg({
+        'monthly_quantity': ['mean', 'sum'],
+        'avg_price': 'mean'
+    }).sort_values(('monthly_quantity', 'sum'), ascending=False)
+
+
+def wordcloud_image(products):
+    """Word cloud of product names as an RGB array, or ``None`` without product names."""
+    if 'product_name' not in products.columns:
+        return None
+    from wordcloud import WordCloud
+
+    text = ' '.join(products['product_name'].dropna().astype(str))
+    return WordCloud(width=800, height=400, background_color='white').generate(text).to_array()
+
+
+def predictions_csv(monthly_data, predicted):
+    """Predictions for every feature row as CSV bytes (Export section).
+
+    ``predicted`` is aligned with ``monthly_data``, e.g. the pipeline's
+    ``y_pred`` (scored once from the feature matrix), so nothing is re-predicted.
+    """
+    predictions = monthly_data[['product_id', 'shop_id', 'year_month', 'monthly_quantity']].copy()
+    predictions['predicted_quantity'] = predicted
+    return predictions.to_csv(index=False).encode('utf-8')
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+
+SERIES_KEYS = ['product_id', 'shop_id']
+
+# Defaults reproduce the model's lag block: three lags, a 3-month mean and lag1 - lag2
+DEFAULT_LAGS = (1, 2, 3)
+DEFAULT_WINDOWS = (3,)
+DEFAULT_TRENDS = ((1, 2),)
+
+
+def lag_name(lag):
+    return 'last_month_qty' if lag == 1 else f'last_{lag}_months_qty'
+
+
+def window_name(window):
+    return f'avg_last_{window}_months'
+
+
+def trend_name(recent, older):
+    return 'trend' if (recent, older) == (1, 2) else f'trend_{recent}_{older}'
+
+
+def feature_names(lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS, trends=DEFAULT_TRENDS):
+    """Column names produced for a lag/window/trend configuration, in output order."""
+    return ([lag_name(k) for k in lags] + [window_name(w) for w in windows]
+            + [trend_name(a, b) for a, b in trends])
+
+
+def required_lags(lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS, trends=DEFAULT_TRENDS):
+    """Every lag the configuration reads, including those only used by windows/trends."""
+    needed = set(lags)
+    for w in windows:
+        needed.update(range(1, w + 1))
+    for a, b in trends:
+        needed.update((a, b))
+    return sorted(needed)
+
+
+def month_ordinals(year_month):
+    """Monthly periods as integer month numbers, so month arithmetic is plain integer math."""
+    if not isinstance(year_month.dtype, pd.PeriodDtype):
+        year_month = year_month.astype('period[M]')
+    return year_month.array.asi8.astype(np.int64)
+
+
+def derived_features(lag_values, windows=DEFAULT_WINDOWS, trends=DEFAULT_TRENDS):
+    """Rolling means and trends from a {lag: array} mapping (NaN lags are skipped in means)."""
+    out = {}
+    for w in windows:
+        stacked = np.vstack([lag_values[k] for k in range(1, w + 1)])
+        present = ~np.isnan(stacked)
+        count = present.sum(axis=0)
+        total = np.where(present, stacked, 0.0).sum(axis=0)
+        out[window_name(w)] = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+    for a, b in trends:
+        out[trend_name(a, b)] = lag_values[a] - lag_values[b]
+    return out
+
+
+def compute_lag_features(frame, value_col='monthly_quantity', keys=SERIES_KEYS,
+                         lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS, trends=DEFAULT_TRENDS,
+                         fill_gaps=True, origin=None):
+    """Calendar-aware lag, rolling-mean and trend features in a single pass.
+
+    Rows are (series, month) cells in any order. Series are grouped once into
+    integer codes and every cell gets an integer key ``code * span + month``;
+    after one sort (skipped when the rows already are in key order) the lag-k
+    cell of row i is normally row ``i - k``, and only cells next to a calendar
+    gap fall back to a binary search for ``key - k``.
+
+    Lags are taken in calendar months: a month missing inside a series counts
+    as zero sales when ``fill_gaps`` is set (NaN otherwise), and months before
+    the series' first month are NaN. ``origin`` optionally gives each row's
+    series start month ordinal, for frames that hold only the tail of a series.
+
+    Returns a dict of column name -> array aligned with ``frame``'s rows.
+    """
+    n = len(frame)
+    codes = frame.groupby(keys, sort=False, observed=True).ngroup().to_numpy(np.int64)
+    months = month_ordinals(frame['year_month'])
+    values = frame[value_col].to_numpy(np.float64)
+    lag_set = required_lags(lags, windows, trends)
+
+    if n == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return {name: empty for name in feature_names(lags, windows, trends)}
+
+    first = months.min() - max(lag_set)
+    span = months.max() - first + 1
+    cell_keys = codes * span + (months - first)
+    if np.all(cell_keys[1:] > cell_keys[:-1]):
+        order = np.arange(n)
+    else:
+        order = np.argsort(cell_keys, kind='stable')
+    sorted_keys = cell_keys[order]
+    sorted_values = values[order]
+
+    if origin is None:
+        # Series start = month of the first cell of each code block in sorted order
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        counts = np.diff(np.r_[starts, n])
+        start_month = np.repeat(months[order][starts], counts)
+    else:
+        start_month = np.asarray(origin, dtype=np.int64)[order]
+    sorted_months = months[order]
+
+    lag_values = {}
+    index = np.arange(n)
+    for k in lag_set:
+        target = sorted_keys - k
+        # Contiguous months: the lag cell sits exactly k rows back
+        pos = np.maximum(index - k, 0)
+        found = sorted_keys[pos] == target
+        miss = np.flatnonzero(~found)
+        if len(miss):
+            pos[miss] = np.minimum(np.searchsorted(sorted_keys, target[miss]), n - 1)
+            found[miss] = sorted_keys[pos[miss]] == target[miss]
+        lagged = np.where(found, sorted_values[pos], np.nan)
+        if fill_gaps:
+            lagged = np.where(~found & (sorted_months - k >= start_month), 0.0, lagged)
+        result = np.empty(n, dtype=np.float64)
+        result[order] = lagged
+        lag_values[k] = result
+
+    out = {lag_name(k): lag_values[k] for k in lags}
+    out.update(derived_features(lag_values, windows, trends))
+    return out
+
+
+def add_lag_features(frame, **kwargs):
+    """Assign ``compute_lag_features`` output onto ``frame`` in place and return it."""
+    for name, values in compute_lag_features(frame, **kwargs).items():
+        frame[name] = values
+    return frame
@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from feature_engine import SERIES_KEYS, month_ordinals
+from ingestion import fingerprint
+from shared_store import root_lock, read_frame, write_frame
+
+
+MATRIX_FILE = 'matrix.npy'
+INDEX_DIR = 'index'
+META_FILE = 'meta.json'
+
+
+def write_feature_matrix(path, data, features, target_col='monthly_quantity'):
+    """Write ``features`` and ``target_col`` of ``data`` as one float32 matrix plus a sidecar index.
+
+    Rows are sorted by month (stable), so every split by month, such as the
+    hold-out or a backtest fold, is a contiguous slice. The matrix is
+    column-major: each feature is one contiguous run of the file. The index
+    holds the series keys, ``year_month`` and ``row``, the row's position in
+    ``data``.
+    """
+    os.makedirs(path, exist_ok=True)
+    order = np.argsort(month_ordinals(data['year_month']), kind='stable')
+    columns = list(features) + [target_col]
+    matrix = np.lib.format.open_memmap(os.path.join(path, MATRIX_FILE), mode='w+', dtype=np.float32,
+                                       shape=(len(data), len(columns)), fortran_order=True)
+    for j, column in enumerate(columns):
+        matrix[:, j] = data[column].to_numpy(np.float32)[order]
+    matrix.flush()
+    del matrix
+
+    index = data[SERIES_KEYS + ['year_month']].iloc[order].reset_index(drop=True)
+    index['row'] = order.astype(np.int64)
+    write_frame(os.path.join(path, INDEX_DIR), index)
+    with open(os.path.join(path, META_FILE), 'w') as f:
+        json.dump({'features': list(features), 'target': target_col, 'rows': len(data)}, f)
+    return FeatureMatrix(path)
+
+
+class FeatureMatrix:
+    """Read-only, memory-mapped view of a matrix written by ``write_feature_matrix``.
+
+    ``frame(rows)`` wraps a row slice of the features in a DataFrame without
+    copying, so models are fitted and scored straight from the page cache.
+    Pickling sends only the path (and the dataset handle, which pickles as
+    its key): process-pool workers map the same file. Holding ``dataset``
+    keeps the store version, and so the matrix stored in it, on disk.
+    """
+
+    def __init__(self, path, dataset=None):
+        self.path = path
+        self.dataset = dataset
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        self.features = meta['features']
+        self.target_col = meta['target']
+        self.values = np.load(os.path.join(path, MATRIX_FILE), mmap_mode='r')
+        self.index = read_frame(os.path.join(path, INDEX_DIR))
+        self.months = month_ordinals(self.index['year_month'])
+
+    def __len__(self):
+        return len(self.values)
+
+    def __reduce__(self):
+        return FeatureMatrix, (self.path, self.dataset)
+
+    def frame(self, rows=slice(None)):
+        """Features of ``rows`` as a DataFrame over the mapped file (a copy only for non-slice ``rows``)."""
+        return pd.DataFrame(self.values[rows, :len(self.features)], columns=self.features, copy=False)
+
+    def target(self, rows=slice(None)):
+        return self.values[rows, len(self.features)]
+
+    def rows_until(self, month):
+        """Slice of the rows up to and including month ordinal ``month``."""
+        return slice(0, int(self.months.searchsorted(month, side='right')))
+
+    def rows_between(self, first, last):
+        """Slice of the rows from month ordinal ``first`` through ``last``."""
+        return slice(int(self.months.searchsorted(first, side='left')),
+                     int(self.months.searchsorted(last, side='right')))
+
+    def predict(self, model):
+        """``model`` predictions for every row, in the row order of the frame the matrix was written from."""
+        predictions = np.empty(len(self))
+        predictions[self.index['row'].to_numpy()] = model.predict(self.frame())
+        return predictions
+
+
+def feature_matrix(data, dataset, features, target_col='monthly_quantity'):
+    """Matrix of ``data`` stored inside its shared-store version, written only if no process wrote it yet.
+
+    ``dataset`` is the ``shared_store`` handle of the frames ``data`` was built
+    from. The matrix lives in that version's directory, so it is deleted
+    with the version once no process holds it. It is written to a scratch
+    directory and renamed into place, like model registry entries.
+    """
+    version_dir = dataset.store.version_dir(dataset.key)
+    path = os.path.join(version_dir, 'features-' + fingerprint(target_col, *features)[:16])
+    if not os.path.exists(os.path.join(path, META_FILE)):
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-features-', dir=version_dir)
+        try:
+            write_feature_matrix(tmp_dir, data, features, target_col)
+            with root_lock(dataset.store.root):
+                if os.path.exists(path):
+                    shutil.rmtree(tmp_dir)  # another process finished first
+                else:
+                    os.replace(tmp_dir, path)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+    return FeatureMatrix(path, dataset)
+
+
+@contextmanager
+def shared_matrix(data, features, target_col='monthly_quantity'):
+    """``data`` if it already is a FeatureMatrix, else a temporary one written from the frame for the block."""
+    if isinstance(data, FeatureMatrix):
+        yield data
+        return
+    path = tempfile.mkdtemp(prefix='features-')
+    try:
+        yield write_feature_matrix(path, data, features, target_col)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
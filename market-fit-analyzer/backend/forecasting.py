@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from feature_engine import (
+    DEFAULT_LAGS, DEFAULT_TRENDS, DEFAULT_WINDOWS, SERIES_KEYS,
+    derived_features, lag_name, month_ordinals, required_lags
+)
+from product_performance import FEATURES, HOLIDAY_MONTHS, SUMMER_MONTHS, encode_categories
+
+
+def latest_state(monthly_data, depth=None, before_start=np.nan):
+    """Per-series state needed to roll the model forward from the last observed month.
+
+    Returns ``(series, history, last_month)``: one row per (product_id, shop_id)
+    with its static features, a ``(n_series, depth)`` array whose column j is
+    the quantity ``j`` months before ``last_month``, and the month ordinal
+    every forecast starts from (the latest month in the data).
+
+    Months without sales are zero and months before the series started are
+    ``before_start``: NaN by default, as ``compute_lag_features`` gives them
+    when the model's training rows are built, so new series get the same lag
+    inputs. Pass 0.0 to sum histories (e.g. for hierarchy aggregates).
+    """
+    depth = depth or max(required_lags())
+    monthly_data = monthly_data.sort_values(SERIES_KEYS + ['year_month'])
+    codes = monthly_data.groupby(SERIES_KEYS, sort=False, observed=True).ngroup().to_numpy()
+    months = month_ordinals(monthly_data['year_month'])
+    last_month = months.max()
+
+    # Most recent cell of each series carries its price and attributes
+    series = monthly_data.drop_duplicates(SERIES_KEYS, keep='last')
+    series = encode_categories(series.copy(), monthly_data)
+    series['price_difference'] = series['avg_price'] - series['standard_price']
+    series = series.reset_index(drop=True)
+
+    history = np.zeros((len(series), depth))
+    offset = last_month - months
+    recent = offset < depth
+    history[codes[recent], offset[recent]] = monthly_data['monthly_quantity'].to_numpy(np.float64)[recent]
+    # Column j lies before the series' first month once j exceeds that month's offset
+    first_offset = np.full(len(series), -1)
+    np.maximum.at(first_offset, codes, offset)
+    history[np.arange(depth)[None, :] > first_offset[:, None]] = before_start
+    return series, history, last_month
+
+
+def step_features(series, lag_values, target, feature_columns=None):
+    """Feature matrix of every series for month ``target`` from its lag values and static attributes.
+
+    ``series`` comes from ``latest_state`` and ``lag_values`` maps each lag in
+    ``required_lags()`` to an array with one value per series.
+    """
+    feature_columns = feature_columns or FEATURES
+    n_series = len(series)
+    columns = {lag_name(k): lag_values[k] for k in DEFAULT_LAGS}
+    columns.update(derived_features(lag_values, DEFAULT_WINDOWS, DEFAULT_TRENDS))
+    for name in ['price_difference', 'category_code', 'city_code']:
+        columns[name] = series[name].to_numpy(np.float64)
+    columns['is_holiday_month'] = np.full(n_series, float(target.month in HOLIDAY_MONTHS))
+    columns['is_summer'] = np.full(n_series, float(target.month in SUMMER_MONTHS))
+    return pd.DataFrame({name: columns[name] for name in feature_columns})
+
+
+def forecast_catalog(model, monthly_data, horizon=3, feature_columns=None, clip_negative=True):
+    """H-month recursive forecast for every (product_id, shop_id) series at once.
+
+    Each step builds the feature matrix for all series from the observed
+    history plus the previous steps' predictions and makes a single
+    vectorized ``model.predict`` call, so the cost is ``horizon`` predict calls
+    regardless of catalog size. ``monthly_data`` is the monthly aggregate
+    (all cells, not only rows that survived the lag ``dropna``).
+    """
+    feature_columns = feature_columns or FEATURES
+    lag_set = required_lags()
+    depth = max(lag_set)
+    series, history, last_month = latest_state(monthly_data, depth)
+    n_series = len(series)
+
+    predictions = np.zeros((n_series, horizon))
+    for step in range(1, horizon + 1):
+        target = pd.Period(ordinal=last_month + step, freq='M')
+
+        # Lag k of month T+step is a prediction for k < step, otherwise observed history
+        lag_values = {}
+        for k in lag_set:
+            if k < step:
+                lag_values[k] = predictions[:, step - k - 1]
+            else:
+                lag_values[k] = history[:, k - step]
+
+        step_pred = model.predict(step_features(series, lag_values, target, feature_columns))
+        predictions[:, step - 1] = np.maximum(step_pred, 0) if clip_negative else step_pred
+
+    months = pd.period_range(pd.Period(ordinal=last_month + 1, freq='M'), periods=horizon, freq='M')
+    attributes = [c for c in ['product_name', 'category', 'city'] if c in series.columns]
+    forecast = series[SERIES_KEYS + attributes].loc[np.repeat(np.arange(n_series), horizon)].reset_index(drop=True)
+    forecast['year_month'] = months[np.tile(np.arange(horizon), n_series)]
+    forecast['horizon'] = np.tile(np.arange(1, horizon + 1), n_series)
+    forecast['predicted_quantity'] = predictions.reshape(-1)
+    return forecast
@@ -0,0 +1,153 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nepal_gazetteer.csv')
+METERS_PER_DEGREE = 111_320.0
+GOLDEN_ANGLE = np.pi * (3 - np.sqrt(5))
+
+
+def load_gazetteer(path=None):
+    """City/district reference points (``name``, ``kind``, ``province``, ``latitude``, ``longitude``)."""
+    return pd.read_csv(path or GAZETTEER_PATH)
+
+
+def _id_seed(ids):
+    """Numeric jitter seed per ID: the ID itself when numeric, else a stable hash of its text.
+
+    IDs are categorical or strings when ``ingestion.coerce_ids`` can't make them integers.
+    """
+    if pd.api.types.is_numeric_dtype(ids):
+        return ids.to_numpy(np.float64)
+    hashed = pd.util.hash_array(ids.astype(str).to_numpy(object))
+    return (hashed % 1_000_003).astype(np.float64)
+
+
+def locate_shops(shops, gazetteer=None, jitter_deg=0.02):
+    """Shops with ``latitude``/``longitude``, filled from the gazetteer where the file has none.
+
+    Coordinates a shop file already carries are kept; otherwise the shop's
+    city is looked up, then its district (names match case-insensitively).
+    Shops placed from the gazetteer are spread deterministically by shop_id
+    within ``jitter_deg`` of the reference point so they don't stack on one
+    spot. ``location_source`` records where each position came from.
+    """
+    gazetteer = load_gazetteer() if gazetteer is None else gazetteer
+    located = shops.copy()
+    latitude = located['latitude'].astype(float) if 'latitude' in located.columns else pd.Series(np.nan, located.index)
+    longitude = located['longitude'].astype(float) if 'longitude' in located.columns else pd.Series(np.nan, located.index)
+    source = pd.Series(np.where(latitude.notna() & longitude.notna(), 'shop', None), index=located.index, dtype=object)
+
+    for kind in ('city', 'district'):
+        if kind not in located.columns:
+            continue
+        points = gazetteer[gazetteer['kind'] == kind]
+        points = points.assign(key=points['name'].str.casefold()).drop_duplicates('key').set_index('key')
+        key = located[kind].astype(str).str.strip().str.casefold()
+        fill = source.isna() & key.isin(points.index)
+        latitude[fill] = key[fill].map(points['latitude'])
+        longitude[fill] = key[fill].map(points['longitude'])
+        source[fill] = kind
+
+    # Golden-angle spiral keyed on shop_id: stable across reruns and file order
+    spread = source.isin(['city', 'district']).to_numpy()
+    seed = _id_seed(located['shop_id'])
+    radius = jitter_deg * np.sqrt((seed * 0.6180339887) % 1.0)
+    angle = seed * GOLDEN_ANGLE
+    latitude = latitude + np.where(spread, radius * np.sin(angle), 0.0)
+    longitude = longitude + np.where(spread, radius * np.cos(angle), 0.0)
+
+    located['latitude'] = latitude
+    located['longitude'] = longitude
+    located['location_source'] = source
+    return located
+
+
+def sales_aggregates(monthly_data, shops):
+    """Sales per shop, city and district, in total and per month, from one groupby of ``monthly_data``.
+
+    ``monthly_data`` is the (product, shop, month) aggregate and ``shops``
+    comes from ``locate_shops``. Only the (shop, month) table is grouped from
+    the large frame; the coarser tables are rolled up from it. Returns a dict
+    of frames: ``shop_month``, ``shop``, ``city``, ``city_month``,
+    ``district`` and ``district_month``.
+    """
+    shop_month = monthly_data.groupby(['shop_id', 'year_month'], observed=True).agg(
+        quantity=('monthly_quantity', 'sum'),
+        revenue=('monthly_revenue', 'sum'),
+    ).reset_index()
+    places = [c for c in ['city', 'district'] if c in shops.columns]
+    location = shops[['shop_id'] + places + ['latitude', 'longitude']].drop_duplicates('shop_id')
+    shop_month = shop_month.merge(location, on='shop_id', how='left')
+
+    shop = shop_month.groupby('shop_id', observed=True).agg(
+        quantity=('quantity', 'sum'), revenue=('revenue', 'sum'),
+    ).reset_index().merge(location, on='shop_id', how='left')
+
+    aggregates = {'shop_month': shop_month, 'shop': shop}
+    for place in places:
+        aggregates[place] = shop.groupby(place, observed=True).agg(
+            quantity=('quantity', 'sum'), revenue=('revenue', 'sum'), shops=('shop_id', 'size'),
+            latitude=('latitude', 'mean'), longitude=('longitude', 'mean'),
+        ).reset_index().sort_values('quantity', ascending=False, ignore_index=True)
+        aggregates[f'{place}_month'] = shop_month.groupby([place, 'year_month'], observed=True).agg(
+            quantity=('quantity', 'sum'), revenue=('revenue', 'sum'),
+        ).reset_index()
+    return aggregates
+
+
+def _project(latitude, longitude):
+    """Equirectangular metres around the points' mean latitude (fine at country scale)."""
+    lat0 = np.deg2rad(np.nanmean(latitude))
+    return longitude * METERS_PER_DEGREE * np.cos(lat0), latitude * METERS_PER_DEGREE, lat0
+
+
+def _unproject(x, y, lat0):
+    return y / METERS_PER_DEGREE, x / (METERS_PER_DEGREE * np.cos(lat0))
+
+
+def _sum_cells(keys, points, columns):
+    """Sum ``columns`` of ``points`` per integer cell key; returns unique keys, sums and point counts."""
+    cells, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    sums = {c: np.bincount(inverse, points[c].to_numpy(np.float64), minlength=len(cells)) for c in columns}
+    return cells, sums, np.bincount(inverse, minlength=len(cells))
+
+
+def hex_bins(points, radius_m=5_000, columns=('quantity', 'revenue')):
+    """Aggregate located points into pointy-top hexagons of ``radius_m`` (centre to corner).
+
+    Returns one row per non-empty hexagon with its centre ``latitude``/
+    ``longitude``, the summed ``columns`` and the number of ``shops``.
+    """
+    points = points.dropna(subset=['latitude', 'longitude'])
+    x, y, lat0 = _project(points['latitude'].to_numpy(), points['longitude'].to_numpy())
+
+    # Axial coordinates, then cube rounding to the nearest hexagon
+    q = (np.sqrt(3) / 3 * x - y / 3) / radius_m
+    r = (2 / 3 * y) / radius_m
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+
+    cells, sums, counts = _sum_cells(np.column_stack([rq, rr]).astype(np.int64), points, columns)
+    cx = radius_m * np.sqrt(3) * (cells[:, 0] + cells[:, 1] / 2)
+    cy = radius_m * 1.5 * cells[:, 1]
+    latitude, longitude = _unproject(cx, cy, lat0)
+    return pd.DataFrame({'latitude': latitude, 'longitude': longitude, **sums, 'shops': counts})
+
+
+def grid_bins(points, cell_m=5_000, columns=('quantity', 'revenue')):
+    """Aggregate located points into square cells of ``cell_m`` metres (centre coordinates)."""
+    points = points.dropna(subset=['latitude', 'longitude'])
+    x, y, lat0 = _project(points['latitude'].to_numpy(), points['longitude'].to_numpy())
+    keys = np.column_stack([np.floor(x / cell_m), np.floor(y / cell_m)]).astype(np.int64)
+    cells, sums, counts = _sum_cells(keys, points, columns)
+    latitude, longitude = _unproject((cells[:, 0] + 0.5) * cell_m, (cells[:, 1] + 0.5) * cell_m, lat0)
+    return pd.DataFrame({'latitude': latitude, 'longitude': longitude, **sums, 'shops': counts})
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+from feature_engine import SERIES_KEYS
+from forecasting import latest_state
+
+
+# Aggregate levels, top first, with the bottom-series attributes that define their nodes.
+# Each (category, shop) lies in one shop and so in one city: the levels nest.
+LEVELS = {
+    'chain': [],
+    'city': ['city'],
+    'category_shop': ['category', 'shop_id'],
+}
+BOTTOM_LEVEL = 'sku_shop'
+METHODS = ('bottom_up', 'top_down', 'ols')
+# Node for series whose shop or product has no row in shops.csv / products.csv
+UNKNOWN = 'Unknown'
+
+
+class Hierarchy:
+    """Sparse summing matrix over the (product_id, shop_id) series.
+
+    ``series`` has one row per bottom series with the attributes used by
+    ``levels``. Every aggregate level is a 0/1 CSR matrix mapping bottom
+    series to that level's nodes; they are stacked into ``aggregation`` (A),
+    so the summing matrix is ``S = [A; I]`` and all aggregate values of a
+    (series x months) array come from one sparse product. Series with a
+    missing attribute (e.g. a shop absent from shops.csv) are summed under
+    an ``'Unknown'`` node of that level.
+    """
+
+    def __init__(self, series, levels=None):
+        self.levels = LEVELS if levels is None else levels
+        attributes = list(dict.fromkeys(SERIES_KEYS + [c for keys in self.levels.values() for c in keys]))
+        self.series = _fill_unknown(series[attributes].reset_index(drop=True), attributes)
+        n = len(self.series)
+
+        self.nodes, blocks, self.offsets = {}, [], {}
+        offset = 0
+        for level, keys in self.levels.items():
+            if keys:
+                grouped = self.series.groupby(keys, sort=True, observed=True, dropna=False)
+                codes = grouped.ngroup().to_numpy()
+                nodes = grouped.size().reset_index()[keys]
+            else:
+                codes = np.zeros(n, dtype=np.int64)
+                nodes = pd.DataFrame(index=[0])
+            blocks.append(sparse.csr_matrix((np.ones(n), (codes, np.arange(n))), shape=(len(nodes), n)))
+            self.nodes[level] = nodes
+            self.offsets[level] = (offset, offset + len(nodes))
+            offset += len(nodes)
+        self.nodes[BOTTOM_LEVEL] = self.series[SERIES_KEYS + [c for c in attributes if c not in SERIES_KEYS]]
+        self.offsets[BOTTOM_LEVEL] = (offset, offset + n)
+        self.aggregation = sparse.vstack(blocks, format='csr')
+        self._gram = None
+
+    @property
+    def n_bottom(self):
+        return len(self.series)
+
+    def aggregate(self, bottom):
+        """Values of every node, levels stacked top first, for a (n_bottom, ...) array."""
+        return np.vstack([self.aggregation @ bottom, bottom])
+
+    def split(self, stacked):
+        """``{level: rows}`` views of an array stacked in ``aggregate`` order."""
+        return {level: stacked[start:stop] for level, (start, stop) in self.offsets.items()}
+
+    def bottom_up(self, bottom):
+        return self.aggregate(bottom)
+
+    def top_down(self, top, proportions):
+        """Split the chain forecast over the bottom series by ``proportions`` (summing to 1)."""
+        return self.aggregate(np.outer(proportions, top))
+
+    def ols(self, base):
+        """OLS reconciliation ``S (S'S)^-1 S' y`` of base forecasts stacked in ``aggregate`` order.
+
+        With ``S = [A; I]``, Woodbury gives ``(I + A'A)^-1 = I - A'(I + AA')^-1 A``,
+        so only the small ``I + AA'`` system over aggregate nodes is factorized
+        (once per hierarchy) and reused for every horizon and call.
+        """
+        if self._gram is None:
+            A = self.aggregation
+            gram = sparse.identity(A.shape[0], format='csc') + (A @ A.T).tocsc()
+            self._gram = splu(gram)
+        A = self.aggregation
+        n_agg = A.shape[0]
+        rhs = A.T @ base[:n_agg] + base[n_agg:]
+        bottom = rhs - A.T @ self._gram.solve(np.asarray(A @ rhs))
+        return self.aggregate(bottom)
+
+
+def _fill_unknown(series, attributes):
+    """``series`` with missing text/categorical attributes set to ``UNKNOWN``."""
+    for column in attributes:
+        values = series[column]
+        if column in SERIES_KEYS or not values.isna().any():
+            continue
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            if UNKNOWN not in values.cat.categories:
+                values = values.cat.add_categories([UNKNOWN])
+            series[column] = values.fillna(UNKNOWN)
+        elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            series[column] = values.fillna(UNKNOWN)
+    return series
+
+
+def naive_forecasts(history, horizon, season=12, window=3):
+    """Seasonal-naive forecasts for rows of ``history`` (column j = j months before the last month).
+
+    With a year of history plus ``window`` months, each step repeats the same
+    calendar month of last year scaled by how the latest ``window`` months
+    compare with the same months a year earlier; otherwise it is the mean of
+    the latest ``window`` months.
+    """
+    recent = history[:, :window].mean(axis=1)
+    flat = np.repeat(recent[:, None], horizon, axis=1)
+    if history.shape[1] < season + window or horizon > season:
+        return flat
+    year_ago = history[:, season:season + window].mean(axis=1)
+    ratio = np.divide(recent, year_ago, out=np.ones_like(recent), where=year_ago > 0)
+    seasonal = history[:, [season - h for h in range(1, horizon + 1)]] * ratio[:, None]
+    return np.where((year_ago > 0)[:, None], seasonal, flat)
+
+
+def hierarchical_forecast(forecast, monthly_data, method='ols', window=3, season=12, levels=None):
+    """Coherent forecasts for every level of the product/shop hierarchy.
+
+    ``forecast`` comes from ``forecast_catalog`` and gives the bottom
+    (product_id, shop_id) base forecasts; aggregate levels get seasonal-naive
+    base forecasts from their summed history. ``method`` is ``bottom_up``
+    (sum the model's forecasts), ``top_down`` (split the chain forecast by
+    each series' share of the latest ``window`` months) or ``ols``
+    (least-squares reconciliation of all levels). Returns ``{level: frame}``
+    with the node keys, ``year_month``, ``horizon``, ``base_forecast`` and
+    the reconciled ``predicted_quantity``; every level sums to the one above.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown reconciliation method {method!r}; expected one of {METHODS}")
+    horizon = int(forecast['horizon'].max())
+    bottom_rows = forecast[forecast['horizon'] == 1].reset_index(drop=True)
+    bottom = forecast['predicted_quantity'].to_numpy(np.float64).reshape(len(bottom_rows), horizon)
+
+    series, history, _ = latest_state(monthly_data, depth=season + window, before_start=0.0)
+    if not series[SERIES_KEYS].reset_index(drop=True).equals(bottom_rows[SERIES_KEYS]):
+        raise ValueError("forecast and monthly_data describe different series")
+
+    hierarchy = Hierarchy(series, levels)
+    stacked_history = hierarchy.aggregate(history)
+    base = naive_forecasts(stacked_history, horizon, season, window)
+    base[hierarchy.offsets[BOTTOM_LEVEL][0]:] = bottom
+
+    if method == 'bottom_up':
+        reconciled = hierarchy.bottom_up(bottom)
+    elif method == 'top_down':
+        recent = history[:, :window].sum(axis=1)
+        total = recent.sum()
+        proportions = recent / total if total > 0 else np.full(len(recent), 1 / len(recent))
+        top = base[hierarchy.offsets['chain'][0]] if 'chain' in hierarchy.offsets else bottom.sum(axis=0)
+        reconciled = hierarchy.top_down(top, proportions)
+    else:
+        reconciled = hierarchy.ols(base)
+
+    months = pd.period_range(forecast['year_month'].min(), periods=horizon, freq='M')
+    base_levels, reconciled_levels = hierarchy.split(base), hierarchy.split(reconciled)
+    frames = {}
+    for level, nodes in hierarchy.nodes.items():
+        n_nodes = len(nodes)
+        frame = nodes.loc[np.repeat(np.arange(n_nodes), horizon)].reset_index(drop=True)
+        frame['year_month'] = months[np.tile(np.arange(horizon), n_nodes)]
+        frame['horizon'] = np.tile(np.arange(1, horizon + 1), n_nodes)
+        frame['base_forecast'] = base_levels[level].reshape(-1)
+        frame['predicted_quantity'] = reconciled_levels[level].reshape(-1)
+        frames[level] = frame
+    return frames
@@ -0,0 +1,229 @@
+import hashlib
+import importlib.util
+import io
+import os
+
+import pandas as pd
+
+
+# Explicit column types: IDs are compact integers, low-cardinality text is categorical.
+# Quantities stay float64: files may hold blanks or fractional amounts (e.g. kilograms)
+TRANSACTION_SCHEMA = {
+    'shop_id': 'int32',
+    'product_id': 'int32',
+    'transaction_type': 'category',
+    'quantity': 'float64',
+    'unit_price': 'float64',
+    'total_amount': 'float64',
+    'payment_method': 'category',
+}
+PRODUCT_SCHEMA = {
+    'product_id': 'int32',
+    'product_name': 'category',
+    'category': 'category',
+    'brand': 'category',
+    'standard_price': 'float64',
+}
+SHOP_SCHEMA = {
+    'shop_id': 'int32',
+    'city': 'category',
+    'district': 'category',
+}
+DATE_COLUMNS = {'transaction_time'}
+ID_COLUMNS = ('product_id', 'shop_id')
+
+PARQUET_MAGIC = b'PAR1'
+FEATHER_MAGIC = b'ARROW1'
+
+
+def file_bytes(source):
+    """Raw bytes of an uploaded file, open binary file or path."""
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    if hasattr(source, 'read'):
+        content = source.read()
+        source.seek(0)
+        return content
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+def fingerprint(*parts):
+    """Stable SHA-256 digest over bytes/str parts, used as a cache key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(len(part).to_bytes(8, 'little'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def has_pyarrow():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _apply_schema(frame, schema):
+    """Cast columns a columnar file stored with other types (and parse dates); others are left alone."""
+    for column, dtype in schema.items():
+        if column in frame.columns and str(frame[column].dtype) != dtype:
+            try:
+                frame[column] = frame[column].astype(dtype)
+            except (TypeError, ValueError):
+                pass  # e.g. non-numeric IDs; coerce_ids handles those
+    for column in DATE_COLUMNS & set(frame.columns):
+        if not pd.api.types.is_datetime64_any_dtype(frame[column]):
+            frame[column] = pd.to_datetime(frame[column], errors='coerce')
+    return frame
+
+
+def read_table(content, schema):
+    """Parse CSV, Parquet or Feather bytes into a frame typed by ``schema``.
+
+    Columnar files are detected by their magic bytes and read directly. CSV
+    goes through the pyarrow engine when it is installed; if an ID column does
+    not parse as an integer the file is re-read with IDs as strings.
+    """
+    if content[:4] == PARQUET_MAGIC:
+        return _apply_schema(pd.read_parquet(io.BytesIO(content)), schema)
+    if content[:6] == FEATHER_MAGIC:
+        return _apply_schema(pd.read_feather(io.BytesIO(content)), schema)
+
+    header = pd.read_csv(io.BytesIO(content), nrows=0).columns
+    dtype = {c: t for c, t in schema.items() if c in header}
+    parse_dates = [c for c in header if c in DATE_COLUMNS]
+    engine = 'pyarrow' if has_pyarrow() else 'c'
+    try:
+        return pd.read_csv(io.BytesIO(content), dtype=dtype, parse_dates=parse_dates, engine=engine)
+    except (TypeError, ValueError):
+        for column in ID_COLUMNS:
+            if column in dtype:
+                dtype[column] = 'str'
+        return pd.read_csv(io.BytesIO(content), dtype=dtype, parse_dates=parse_dates, engine=engine)
+
+
+def _peek(source, size):
+    """First bytes of a path or seekable binary file, leaving the file position unchanged."""
+    if hasattr(source, 'read'):
+        position = source.tell()
+        head = source.read(size)
+        source.seek(position)
+        return head
+    with open(source, 'rb') as f:
+        return f.read(size)
+
+
+def iter_transaction_chunks(source, chunksize=1_000_000, columns=None):
+    """Yield typed transaction frames of at most ``chunksize`` rows from a CSV or Parquet file.
+
+    Only one chunk is held at a time, so files larger than memory can be
+    folded into aggregates. Each chunk's IDs are int32 when all of them parse
+    as integers and stripped strings otherwise (integers written as e.g.
+    ``'7'``, so they match the int32 IDs of other chunks once converted).
+    """
+    if _peek(source, 4) == PARQUET_MAGIC:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+            yield _chunk_ids(_apply_schema(batch.to_pandas(), TRANSACTION_SCHEMA))
+        return
+
+    header = pd.read_csv(source, nrows=0, usecols=columns).columns
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    # IDs are typed per chunk: a sample cannot tell whether a later row holds a non-integer ID
+    dtype = {c: t for c, t in TRANSACTION_SCHEMA.items() if c in header and c not in ID_COLUMNS}
+    parse_dates = [c for c in header if c in DATE_COLUMNS]
+
+    for chunk in pd.read_csv(source, chunksize=chunksize, usecols=columns, dtype=dtype,
+                             parse_dates=parse_dates):
+        yield _chunk_ids(chunk)
+
+
+def _chunk_ids(chunk):
+    """Cast the ID columns of one chunk to int32, or to stripped strings if any ID is not an integer."""
+    for column in ID_COLUMNS:
+        if column not in chunk.columns:
+            continue
+        if pd.api.types.is_integer_dtype(chunk[column]):
+            chunk[column] = chunk[column].astype('int32')
+            continue
+        values = chunk[column].astype(str).str.strip()
+        numeric = pd.to_numeric(values, errors='coerce')
+        integral = numeric.notna() & (numeric % 1 == 0)
+        if integral.all():
+            chunk[column] = numeric.astype('int32')
+        else:
+            chunk[column] = values.mask(integral, numeric[integral].astype('int64').astype(str))
+    return chunk
+
+
+def coerce_ids(*frames, column):
+    """Give ``column`` one merge-friendly type across frames: int32 if possible, else shared categories."""
+    present = [f for f in frames if column in f.columns]
+    if all(pd.api.types.is_integer_dtype(f[column]) for f in present):
+        for f in present:
+            f[column] = f[column].astype('int32')
+        return
+
+    cleaned = [f[column].astype(str).str.strip() for f in present]
+    numeric = [pd.to_numeric(c, errors='coerce') for c in cleaned]
+    if all(n.notna().all() and (n % 1 == 0).all() for n in numeric):
+        for f, n in zip(present, numeric):
+            f[column] = n.astype('int32')
+        return
+
+    categories = pd.Index(sorted(set().union(*[set(c.unique()) for c in cleaned])))
+    for f, c in zip(present, cleaned):
+        f[column] = pd.Categorical(c, categories=categories)
+
+
+def match_id(value, dtype):
+    """``value`` (e.g. from a URL) as an ID of a column typed by ``coerce_ids``; None if no ID can equal it.
+
+    Text is stripped like at ingestion; integer columns get an int, so
+    ``'7'`` and ``7`` find the same series.
+    """
+    text = str(value).strip()
+    if pd.api.types.is_integer_dtype(dtype):
+        number = pd.to_numeric(text, errors='coerce')
+        return int(number) if pd.notna(number) and number % 1 == 0 else None
+    return text
+
+
+def _cache_paths(cache_dir, key):
+    return {name: os.path.join(cache_dir, f'{key}-{name}.parquet') for name in ('data', 'products', 'shops')}
+
+
+def load_tables(transactions_file, products_file, shops_file, cache_dir=None):
+    """Typed, merged transaction frame plus the product and shop tables.
+
+    With ``cache_dir`` (and pyarrow) the three frames are also written as
+    Parquet keyed by the input content hash, and later calls with the same
+    files read the cached columns instead of parsing and merging again.
+    """
+    raw = [file_bytes(f) for f in (transactions_file, products_file, shops_file)]
+
+    paths = None
+    if cache_dir and has_pyarrow():
+        paths = _cache_paths(cache_dir, fingerprint(*raw))
+        if all(os.path.exists(p) for p in paths.values()):
+            return tuple(pd.read_parquet(paths[name]) for name in ('data', 'products', 'shops'))
+
+    transactions = read_table(raw[0], TRANSACTION_SCHEMA)
+    products = read_table(raw[1], PRODUCT_SCHEMA)
+    shops = read_table(raw[2], SHOP_SCHEMA)
+
+    coerce_ids(transactions, products, column='product_id')
+    coerce_ids(transactions, shops, column='shop_id')
+
+    data = transactions.merge(products, on='product_id', how='left')
+    data = data.merge(shops, on='shop_id', how='left')
+
+    if paths is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        for name, frame in (('data', data), ('products', products), ('shops', shops)):
+            tmp_path = paths[name] + '.tmp'
+            frame.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, paths[name])
+
+    return data, products, shops
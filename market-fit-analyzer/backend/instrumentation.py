@@ -0,0 +1,134 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def rss_bytes():
+    """Current resident set size of this process (peak RSS where the current value is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def row_count(value):
+    """Rows of a frame/array result (first element of a tuple), or None."""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, (str, bytes, dict)):
+        return None
+    return len(value) if hasattr(value, '__len__') else None
+
+
+class StageRecorder:
+    """Thread-safe timings, row counts and memory deltas of named stages.
+
+    Keeps running totals per stage plus the last ``max_events`` individual
+    events. With ``log_path`` (or the ``STAGE_LOG`` environment variable)
+    every event is also appended to that file as one JSON line.
+    """
+
+    def __init__(self, max_events=1000, log_path=None):
+        self.events = deque(maxlen=max_events)
+        self.log_path = log_path or os.environ.get('STAGE_LOG')
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, **labels):
+        """Time the enclosed block; set ``event['rows']`` inside it to record a row count."""
+        event = {'stage': name, 'rows': None, **labels}
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield event
+        finally:
+            event['seconds'] = time.perf_counter() - start
+            rss_after = rss_bytes()
+            event['rss_mb'] = rss_after / 1e6
+            event['rss_delta_mb'] = (rss_after - rss_before) / 1e6
+            event['timestamp'] = time.time()
+            self.record(event)
+
+    def timed(self, name, fn, **labels):
+        """Call ``fn()`` inside a stage and record the row count of its result."""
+        with self.stage(name, **labels) as event:
+            value = fn()
+            event['rows'] = row_count(value)
+        return value
+
+    def record(self, event):
+        with self._lock:
+            self.events.append(event)
+            total = self._totals.setdefault(event['stage'], {
+                'calls': 0, 'seconds_total': 0.0, 'seconds_max': 0.0,
+                'last_seconds': 0.0, 'last_rows': None, 'last_rss_delta_mb': 0.0,
+            })
+            total['calls'] += 1
+            total['seconds_total'] += event['seconds']
+            total['seconds_max'] = max(total['seconds_max'], event['seconds'])
+            total['last_seconds'] = event['seconds']
+            total['last_rows'] = event['rows']
+            total['last_rss_delta_mb'] = event['rss_delta_mb']
+            if self.log_path:
+                with open(self.log_path, 'a') as f:
+                    f.write(json.dumps(event, default=str) + '\n')
+
+    def summary(self):
+        """Per-stage totals: calls, total/max/last seconds, last rows and last RSS delta."""
+        with self._lock:
+            return {name: dict(total) for name, total in self._totals.items()}
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self._totals.clear()
+
+    def to_json_lines(self):
+        """Recent events as newline-delimited JSON (structured logs)."""
+        with self._lock:
+            return ''.join(json.dumps(event, default=str) + '\n' for event in self.events)
+
+    def to_prometheus(self, prefix='market_fit'):
+        """Totals in the Prometheus text exposition format."""
+        series = [
+            ('stage_calls_total', 'counter', 'Number of times the stage ran', 'calls'),
+            ('stage_seconds_total', 'counter', 'Total wall time spent in the stage', 'seconds_total'),
+            ('stage_seconds_max', 'gauge', 'Slowest single run of the stage', 'seconds_max'),
+            ('stage_last_seconds', 'gauge', 'Wall time of the latest run', 'last_seconds'),
+            ('stage_last_rows', 'gauge', 'Rows produced by the latest run', 'last_rows'),
+            ('stage_last_rss_delta_bytes', 'gauge', 'RSS change over the latest run', 'last_rss_delta_mb'),
+        ]
+        summary = self.summary()
+        lines = []
+        for metric, kind, help_text, key in series:
+            lines.append(f'# HELP {prefix}_{metric} {help_text}')
+            lines.append(f'# TYPE {prefix}_{metric} {kind}')
+            for name, total in sorted(summary.items()):
+                value = total[key]
+                if value is None:
+                    continue
+                if key == 'last_rss_delta_mb':
+                    value = value * 1e6
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {value:g}')
+        lines.append(f'# HELP {prefix}_process_rss_bytes Resident memory of the process')
+        lines.append(f'# TYPE {prefix}_process_rss_bytes gauge')
+        lines.append(f'{prefix}_process_rss_bytes {rss_bytes()}')
+        return '\n'.join(lines) + '\n'
+
+
+# Shared by the pipeline, the dashboard and the API within one process
+recorder = StageRecorder()
+stage = recorder.stage
+timed = recorder.timed
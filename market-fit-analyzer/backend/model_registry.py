@@ -0,0 +1,101 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import joblib
+
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+
+def feature_encodings(feature_data, columns=('category', 'city')):
+    """Value -> integer code tables used for the *_code feature columns."""
+    encodings = {}
+    for column in columns:
+        pairs = feature_data[[column, f'{column}_code']].dropna().drop_duplicates()
+        encodings[column] = {str(value): int(code) for value, code in pairs.itertuples(index=False)}
+    return encodings
+
+
+class ModelRegistry:
+    """On-disk store of fitted models keyed by a dataset fingerprint.
+
+    Each entry is a directory ``<root>/<fingerprint>/`` holding ``model.joblib``
+    and ``meta.json`` (feature list, category/city encodings, training metrics).
+    """
+
+    MODEL_FILE = 'model.joblib'
+    META_FILE = 'meta.json'
+
+    def __init__(self, root=None):
+        self.root = root or os.environ.get('MODEL_REGISTRY_DIR', DEFAULT_ROOT)
+
+    def entry_dir(self, fingerprint):
+        return os.path.join(self.root, fingerprint)
+
+    def model_path(self, fingerprint):
+        return os.path.join(self.entry_dir(fingerprint), self.MODEL_FILE)
+
+    def __contains__(self, fingerprint):
+        return os.path.exists(os.path.join(self.entry_dir(fingerprint), self.META_FILE))
+
+    def save(self, fingerprint, model, features, encodings=None, metrics=None, params=None):
+        """Persist a fitted model and its metadata; returns the metadata dict."""
+        meta = {
+            'fingerprint': fingerprint,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'model_class': type(model).__name__,
+            'features': list(features),
+            'encodings': encodings or {},
+            'metrics': {k: float(v) for k, v in (metrics or {}).items()},
+            'params': params or {},
+        }
+
+        # Write into a scratch directory and rename it into place so readers
+        # never see a half-written entry.
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=self.root)
+        try:
+            joblib.dump(model, os.path.join(tmp_dir, self.MODEL_FILE))
+            with open(os.path.join(tmp_dir, self.META_FILE), 'w') as f:
+                json.dump(meta, f, indent=2)
+            target = self.entry_dir(fingerprint)
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            os.replace(tmp_dir, target)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return meta
+
+    def load_meta(self, fingerprint):
+        if fingerprint not in self:
+            return None
+        with open(os.path.join(self.entry_dir(fingerprint), self.META_FILE)) as f:
+            return json.load(f)
+
+    def load(self, fingerprint):
+        """Return ``(model, meta)`` for a fingerprint, or ``None`` if it was never trained."""
+        meta = self.load_meta(fingerprint)
+        if meta is None:
+            return None
+        model = joblib.load(self.model_path(fingerprint))
+        return model, meta
+
+    def model_bytes(self, fingerprint):
+        """Serialized model file, e.g. for a download button."""
+        with open(self.model_path(fingerprint), 'rb') as f:
+            return f.read()
+
+    def entries(self):
+        """Metadata for every stored model, newest first."""
+        if not os.path.isdir(self.root):
+            return []
+        metas = [self.load_meta(name) for name in os.listdir(self.root) if not name.startswith('.')]
+        metas = [m for m in metas if m is not None]
+        return sorted(metas, key=lambda m: m['created_at'], reverse=True)
+
+    def delete(self, fingerprint):
+        shutil.rmtree(self.entry_dir(fingerprint), ignore_errors=True)
@@ -0,0 +1,381 @@
+# api.py
+# HTTP API over PasaleModel and the market-fit forecaster, for the mobile app.
+# Run from this folder:  uvicorn api:app --host 0.0.0.0 --port 8000
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Annotated, Dict, List, Optional, Union
+
+from fastapi import FastAPI, HTTPException, Query as QueryParam
+from fastapi.responses import PlainTextResponse
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(1, BACKEND_DIR)
+
+from batching import MicroBatcher
+from compact_forest import compact_predictor
+from hierarchy import METHODS, hierarchical_forecast
+from instrumentation import recorder, stage
+from model import PasaleModel
+from pipeline_cache import pipeline_cache, run_pipeline
+from ingestion import file_bytes, fingerprint, match_id
+from pricing import OBJECTIVES, optimize_prices
+from product_performance import FEATURES
+from shared_store import store
+
+PASALE_DATA_DIR = os.environ.get("PASALE_DATA_DIR", HERE)
+FORECAST_DATA_DIR = os.environ.get("FORECAST_DATA_DIR", BACKEND_DIR)
+FORECAST_HORIZON = int(os.environ.get("FORECAST_HORIZON", 3))
+API_WORKERS = int(os.environ.get("API_WORKERS", 4))
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 256))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", 5))
+# Upper bounds on request-sized grids, so one request can't tie up the shared worker pool
+MAX_CURVE_PRICES = int(os.environ.get("MAX_CURVE_PRICES", 100))
+MAX_PRICE_CANDIDATES = int(os.environ.get("MAX_PRICE_CANDIDATES", 101))
+
+PositivePrice = Annotated[float, Field(gt=0)]
+
+# Loaded once at startup, shared read-only by every request
+state = {}
+
+
+def _data_files(folder):
+    return [os.path.join(folder, name) for name in ("products.csv", "transactions.csv", "shops.csv")]
+
+
+def load_state():
+    # Same store key as prediction/some.py: a dashboard on this machine maps the same frame
+    files = _data_files(PASALE_DATA_DIR)
+    dataset = store.acquire(fingerprint("pasale", *(file_bytes(f) for f in files)),
+                            lambda: {"transactions": PasaleModel.load_frame(*files)})
+    state["pasale_dataset"] = dataset
+    state["pasale"] = dataset.derive("pasale_model", lambda: PasaleModel.from_frame(dataset["transactions"]))
+
+    products, transactions, shops = _data_files(FORECAST_DATA_DIR)
+    state["forecaster"] = run_pipeline(transactions, products, shops, forecast_horizon=FORECAST_HORIZON)
+
+    # Concurrent /predict requests share one predict call; small batches use the compact forest
+    state["batcher"] = MicroBatcher(compact_predictor(state["forecaster"]["model"], max_rows=BATCH_MAX_SIZE),
+                                    columns=FEATURES,
+                                    max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    pool = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="pasale-api")
+    state["pool"] = pool
+    await asyncio.get_running_loop().run_in_executor(pool, load_state)
+    yield
+    state["batcher"].close()
+    state["pasale_dataset"].close()
+    pool.shutdown(wait=False)
+
+
+app = FastAPI(title="Pasale Prediction API", lifespan=lifespan)
+
+
+def _timed_call(fn, *args):
+    with stage(f"api_{fn.__name__}"):
+        return fn(*args)
+
+
+async def run_in_pool(fn, *args):
+    """Run blocking pandas/model work on the worker pool so the event loop keeps accepting requests."""
+    return await asyncio.get_running_loop().run_in_executor(state["pool"], _timed_call, fn, *args)
+
+
+# ---------------------------
+# Query functions (blocking)
+# ---------------------------
+def top_districts(product, top_n=5):
+    sales = state["pasale"].top_districts(product, top_n)
+    return {"product": product,
+            "districts": [{"district": d, "total_sales": float(q)} for d, q in sales.items()]}
+
+
+def seasonal_trend(product):
+    sales = state["pasale"].seasonal_trend(product)
+    return {"product": product,
+            "months": [{"month": int(m), "total_sales": float(q)} for m, q in sales.items()]}
+
+
+def price_sensitivity(product, price):
+    predicted = state["pasale"].predict_sales(product, price)
+    if predicted is None:
+        raise KeyError(product)
+    stats = state["pasale"].product_stats[product]
+    return {"product": product, "price": price, "predicted_sales": float(predicted),
+            "elasticity": float(stats["elasticity"]), "elasticity_source": stats["elasticity_source"]}
+
+
+def price_curve(product, prices):
+    if not 0 < len(prices) <= MAX_CURVE_PRICES:
+        raise ValueError(f"Give between 1 and {MAX_CURVE_PRICES} prices")
+    curve = state["pasale"].predict_sales_grid(prices, [product])
+    if curve.empty:
+        raise KeyError(product)
+    stats = state["pasale"].product_stats[product]
+    return {"product": product, "elasticity": float(stats["elasticity"]),
+            "elasticity_source": stats["elasticity_source"],
+            "curve": [{"price": float(p), "predicted_sales": float(q)} for p, q in curve.iloc[0].items()]}
+
+
+def new_launch(name, price, category, district):
+    result = state["pasale"].new_launch_predict(name, price, category, district)
+    if result is None:
+        raise KeyError(category)
+    result["predicted_sales"] = float(result["predicted_sales"])
+    return result
+
+
+def _match_ids(values, column):
+    """Request IDs as keys of ``column`` in the forecast (int32 or string IDs, see ingestion.coerce_ids)."""
+    dtype = state["forecaster"]["forecast"][column].dtype
+    return [match_id(v, dtype) for v in values]
+
+
+def forecast(product_id, shop_id):
+    product_id, = _match_ids([product_id], "product_id")
+    shop_id, = _match_ids([shop_id], "shop_id")
+    rows = state["forecaster"]["forecast_index"].series(product_id, shop_id)
+    if rows.empty:
+        raise KeyError((product_id, shop_id))
+    months = [{"year_month": str(r.year_month), "horizon": int(r.horizon),
+               "predicted_quantity": float(r.predicted_quantity)} for r in rows.itertuples()]
+    return {"product_id": _json_id(product_id), "shop_id": _json_id(shop_id),
+            "next_month": months[0]["predicted_quantity"], "forecast": months}
+
+
+def level_forecast(level, method="ols", city=None, category=None, shop_id=None):
+    forecaster = state["forecaster"]
+    levels = pipeline_cache.get_or_compute(
+        (forecaster["model_key"], "hierarchy", FORECAST_HORIZON, method),
+        lambda: hierarchical_forecast(forecaster["forecast"], forecaster["monthly_aggregate"], method=method)
+    )
+    if level not in levels:
+        raise KeyError(level)
+    rows = levels[level]
+    if shop_id is not None:
+        shop_id, = _match_ids([shop_id], "shop_id")
+        if shop_id is None:
+            raise KeyError(level)
+    for column, value in (("city", city), ("category", category), ("shop_id", shop_id)):
+        if value is not None and column in rows.columns:
+            rows = rows[rows[column] == value]
+    if rows.empty:
+        raise KeyError(level)
+    return {"level": level, "method": method,
+            "forecast": rows.astype({"year_month": str}).to_dict("records")}
+
+
+def optimal_prices(objective="revenue", max_change=0.2, n_prices=21, min_volume_ratio=0.0, cost_ratio=0.7,
+                   product_ids=None, shop_ids=None):
+    forecaster = state["forecaster"]
+    table = pipeline_cache.get_or_compute(
+        (forecaster["model_key"], "optimal_prices", objective, max_change, n_prices, min_volume_ratio, cost_ratio),
+        lambda: optimize_prices(forecaster["model"], forecaster["monthly_aggregate"], objective, max_change,
+                                n_prices, min_volume_ratio, cost_ratio)
+    )
+    if product_ids:
+        table = table[table["product_id"].isin(_match_ids(product_ids, "product_id"))]
+    if shop_ids:
+        table = table[table["shop_id"].isin(_match_ids(shop_ids, "shop_id"))]
+    ids = {c: int if pd.api.types.is_integer_dtype(table[c]) else str for c in ("product_id", "shop_id")}
+    return {"objective": objective, "prices": table.astype(ids).replace({np.nan: None}).to_dict("records")}
+
+
+QUERIES = {
+    "top_districts": top_districts,
+    "seasonal_trend": seasonal_trend,
+    "price_sensitivity": price_sensitivity,
+    "price_curve": price_curve,
+    "new_launch": new_launch,
+    "forecast": forecast,
+    "level_forecast": level_forecast,
+    "optimal_prices": optimal_prices,
+}
+
+
+def run_batch(queries):
+    """Answer many queries in one pool task; failures are reported per item instead of failing the batch."""
+    results = []
+    for query in queries:
+        try:
+            params = query.params
+            if query.query in BATCH_PARAMS:
+                params = BATCH_PARAMS[query.query].model_validate(params).model_dump()
+            results.append({"ok": True, "result": QUERIES[query.query](**params)})
+        except KeyError:
+            results.append({"ok": False, "error": "not found"})
+        except (TypeError, ValueError) as e:
+            results.append({"ok": False, "error": str(e)})
+    return results
+
+
+async def answer(fn, *args):
+    try:
+        return await run_in_pool(fn, *args)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Not enough data for this request")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+# ---------------------------
+# Endpoints
+# ---------------------------
+class NewLaunchRequest(BaseModel):
+    name: str
+    price: PositivePrice
+    category: str
+    district: str
+
+
+class PriceOptimizationRequest(BaseModel):
+    objective: str = "revenue"
+    max_change: float = Field(0.2, ge=0, lt=1)  # below 1 so every candidate price stays positive
+    n_prices: int = Field(21, ge=2, le=MAX_PRICE_CANDIDATES)
+    min_volume_ratio: float = Field(0.0, ge=0, le=1)
+    cost_ratio: float = Field(0.7, ge=0, le=1)
+    product_ids: Optional[List[Union[int, str]]] = None
+    shop_ids: Optional[List[Union[int, str]]] = None
+
+
+class Query(BaseModel):
+    query: str
+    params: dict = {}
+
+
+class BatchRequest(BaseModel):
+    queries: List[Query]
+
+
+class PredictRequest(BaseModel):
+    rows: List[Dict[str, float]]
+
+
+# Batch params get the same validation as the POST bodies of these queries
+BATCH_PARAMS = {
+    "new_launch": NewLaunchRequest,
+    "optimal_prices": PriceOptimizationRequest,
+}
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok" if "forecaster" in state else "loading",
+            "model": state.get("forecaster", {}).get("model_key", "")[:12]}
+
+
+@app.get("/products/{product}/top-districts")
+async def get_top_districts(product: str, top_n: int = 5):
+    return await answer(top_districts, product, top_n)
+
+
+@app.get("/products/{product}/seasonal-trend")
+async def get_seasonal_trend(product: str):
+    return await answer(seasonal_trend, product)
+
+
+@app.get("/products/{product}/price-sensitivity")
+async def get_price_sensitivity(product: str, price: float = QueryParam(..., gt=0)):
+    return await answer(price_sensitivity, product, price)
+
+
+@app.get("/products/{product}/price-curve")
+async def get_price_curve(product: str,
+                          prices: List[PositivePrice] = QueryParam(..., min_length=1, max_length=MAX_CURVE_PRICES)):
+    """Predicted sales over a price grid, e.g. ``?prices=80&prices=100&prices=120``."""
+    return await answer(price_curve, product, prices)
+
+
+@app.post("/new-launch")
+async def post_new_launch(request: NewLaunchRequest):
+    return await answer(new_launch, request.name, request.price, request.category, request.district)
+
+
+@app.get("/forecast/{product_id}/{shop_id}")
+async def get_forecast(product_id: str, shop_id: str):
+    return await answer(forecast, product_id, shop_id)
+
+
+@app.get("/hierarchy/{level}")
+async def get_level_forecast(level: str, method: str = "ols", city: Optional[str] = None,
+                             category: Optional[str] = None, shop_id: Optional[str] = None):
+    """Reconciled forecasts of one hierarchy level (chain, city, category_shop, sku_shop)."""
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method {method!r}; expected one of {list(METHODS)}")
+    return await answer(level_forecast, level, method, city, category, shop_id)
+
+
+@app.post("/optimize-prices")
+async def post_optimize_prices(request: PriceOptimizationRequest):
+    """Revenue- or margin-maximizing next-month price per product/shop, scored over a price grid."""
+    if request.objective not in OBJECTIVES:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown objective {request.objective!r}; expected one of {list(OBJECTIVES)}")
+    return await answer(optimal_prices, request.objective, request.max_change, request.n_prices,
+                        request.min_volume_ratio, request.cost_ratio, request.product_ids, request.shop_ids)
+
+
+@app.post("/batch")
+async def post_batch(request: BatchRequest):
+    unknown = [q.query for q in request.queries if q.query not in QUERIES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown queries: {sorted(set(unknown))}")
+    return {"results": await run_in_pool(run_batch, request.queries)}
+
+
+def _json_id(value):
+    """Integer IDs as numbers; categorical/string IDs (see ingestion.coerce_ids) as text."""
+    return int(value) if isinstance(value, (int, np.integer)) else str(value)
+
+
+def catalog():
+    pasale = state["pasale"]
+    return {"products": [str(p) for p in pasale.products],
+            "categories": [str(c) for c in pasale.categories],
+            "districts": [str(d) for d in pasale.districts],
+            "series": [[_json_id(p), _json_id(s)] for p, s in state["forecaster"]["forecast_index"].keys()]}
+
+
+@app.get("/catalog")
+async def get_catalog():
+    return await run_in_pool(catalog)
+
+
+@app.post("/predict")
+async def post_predict(request: PredictRequest):
+    """Predicted monthly quantity for raw feature rows, micro-batched with concurrent callers."""
+    missing = sorted({name for row in request.rows for name in FEATURES if name not in row})
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing features: {missing}")
+    if not request.rows:
+        return {"predictions": []}
+    rows = [[row[name] for name in FEATURES] for row in request.rows]
+    predictions = await asyncio.wrap_future(state["batcher"].submit(rows))
+    return {"predictions": [max(float(p), 0.0) for p in predictions]}
+
+
+@app.get("/metrics/batching")
+async def get_batching_metrics():
+    return state["batcher"].stats()
+
+
+@app.get("/metrics/datasets")
+async def get_dataset_metrics():
+    """References, idle time and mapped bytes of the dataset versions held by this process."""
+    return store.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Pipeline and query stage timings in the Prometheus text format."""
+    return recorder.to_prometheus()
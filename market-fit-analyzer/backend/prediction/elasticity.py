@@ -0,0 +1,107 @@
+# elasticity.py
+# Log-log price elasticities per product and category, shrunk toward the category level.
+import numpy as np
+import pandas as pd
+
+PRIOR_ELASTICITY = -0.5  # the old fixed rule: a 10% price rise costs ~5% of sales
+PRIOR_SD = 0.5
+MIN_T = 2.0  # slopes need |t| >= 2 (and a negative sign) to be used instead of the fallback
+
+
+def _within_sums(df, item_col, price_col, qty_col):
+    """Centered log-price/log-quantity cross products per ``item_col``, with prices demeaned per product_id.
+
+    Demeaning per product_id removes level differences between SKUs that share
+    a name, so only price movements of the same SKU identify the slope.
+    """
+    data = df[[item_col, "product_id", price_col, qty_col]].dropna()
+    data = data[(data[price_col] > 0) & (data[qty_col] > 0)]
+    x = np.log(data[price_col].to_numpy(np.float64))
+    y = np.log(data[qty_col].to_numpy(np.float64))
+    sku = data.groupby("product_id").ngroup().to_numpy()
+    x = x - (np.bincount(sku, x) / np.bincount(sku))[sku]
+    y = y - (np.bincount(sku, y) / np.bincount(sku))[sku]
+
+    sums = pd.DataFrame({"n": 1, "skus": 0, "sxx": x * x, "sxy": x * y, "syy": y * y},
+                        index=data[item_col].to_numpy())
+    sums = sums.groupby(level=0).sum()
+    sums["skus"] = data.groupby(item_col, observed=True)["product_id"].nunique()
+    return sums
+
+
+def _slopes(sums):
+    """OLS slope and its standard error from the centered sums (NaN where prices never moved)."""
+    sxx = sums["sxx"].where(sums["sxx"] > 0)
+    slope = sums["sxy"] / sxx
+    dof = (sums["n"] - sums["skus"] - 1).clip(lower=1)
+    residual = (sums["syy"] - slope * sums["sxy"]).clip(lower=0) / dof
+    return slope, np.sqrt(residual / sxx)
+
+
+def _shrink(estimate, std_error, target, tau):
+    """Precision-weighted blend of ``estimate`` and ``target``; missing estimates fall back to ``target``."""
+    variance = std_error ** 2
+    weight = (tau ** 2 / (tau ** 2 + variance)).where(estimate.notna() & (variance > 0), 0.0)
+    return weight * estimate.fillna(0.0) + (1 - weight) * target, weight
+
+
+def _significant(raw, std_error, min_t):
+    """Slopes that are significantly negative (t <= -``min_t``); flat, noisy or rising ones are not."""
+    t = raw / std_error.where(std_error > 0)
+    return (t <= -min_t).fillna(False)
+
+
+def fit_elasticities(df, product_col="product_name", group_col="category", price_col="unit_price",
+                     qty_col="quantity", prior=PRIOR_ELASTICITY, prior_sd=PRIOR_SD, bounds=(-5.0, 0.0),
+                     min_t=MIN_T):
+    """Per-product and per-category constant elasticities from one grouped pass over ``df``.
+
+    Each product's slope of log quantity on log price is shrunk toward its
+    category, and each category toward ``prior``. The weights come from the
+    estimates' standard errors. Category spread ``tau`` is the method-of-moments
+    between-product variance, so noisy or flat-priced products lean on their
+    category. Slopes that are not significantly negative (``min_t``) are not
+    used: such a category gets ``prior`` and such a product its category's
+    value. Results are clipped to ``bounds``. Returns ``(products, categories)``
+    frames indexed by name with ``elasticity``, ``source`` (``product``,
+    ``category`` or ``prior``), ``raw``, ``std_error``, ``weight`` and ``n``.
+    """
+    product_sums = _within_sums(df, product_col, price_col, qty_col)
+    product_group = df.groupby(product_col, observed=True)[group_col].first().reindex(product_sums.index)
+    group_sums = product_sums.groupby(product_group.to_numpy()).sum()
+
+    group_raw, group_se = _slopes(group_sums)
+    group_elasticity, group_weight = _shrink(group_raw, group_se, prior, prior_sd)
+    group_fitted = _significant(group_raw, group_se, min_t)
+    group_elasticity = group_elasticity.where(group_fitted, prior).clip(*bounds)
+    group_source = pd.Series(np.where(group_fitted, "category", "prior"), index=group_sums.index)
+    categories = pd.DataFrame({"elasticity": group_elasticity, "source": group_source, "raw": group_raw,
+                               "std_error": group_se, "weight": group_weight, "n": group_sums["n"]})
+
+    raw, se = _slopes(product_sums)
+    by_group = pd.DataFrame({"raw": raw, "variance": se ** 2, "group": product_group})
+    moments = by_group.dropna().groupby("group", observed=True).agg(spread=("raw", "var"), noise=("variance", "mean"))
+    tau = np.sqrt((moments["spread"] - moments["noise"]).clip(lower=0)).reindex(product_group.to_numpy())
+    target = group_elasticity.reindex(product_group.to_numpy()).fillna(prior)
+    elasticity, weight = _shrink(raw, se, target.to_numpy(), tau.fillna(0.0).to_numpy())
+    fitted = _significant(raw, se, min_t) & (weight > 0)  # weight 0: fully pooled into the category
+    elasticity = elasticity.where(fitted, target.to_numpy()).clip(*bounds)
+    fallback = group_source.reindex(product_group.to_numpy()).fillna("prior").to_numpy()
+    source = pd.Series(np.where(fitted, "product", fallback), index=raw.index)
+    products = pd.DataFrame({group_col: product_group, "elasticity": elasticity, "source": source, "raw": raw,
+                             "std_error": se, "weight": weight, "n": product_sums["n"]})
+    return products, categories
+
+
+def price_response(base_sales, base_price, elasticity, prices):
+    """Constant-elasticity demand ``base_sales * (price / base_price) ** elasticity``.
+
+    Scalars or arrays broadcast together, so a catalog (column vectors) can be
+    evaluated over a whole price grid (row vector) in one call. Prices must be
+    positive (the curve is infinite at 0), otherwise ``ValueError`` is raised.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if not (prices > 0).all():
+        raise ValueError("Prices must be positive")
+    ratio = prices / np.asarray(base_price, dtype=np.float64)
+    return np.maximum(np.asarray(base_sales, dtype=np.float64) * ratio ** np.asarray(elasticity), 0)
@@ -2,75 +2,157 @@
 import pandas as pd
 import numpy as np
 
+from elasticity import PRIOR_ELASTICITY, fit_elasticities, price_response
+
 class PasaleModel:
     def __init__(self, products_csv, transactions_csv, shops_csv):
-        # Load and merge data
+        self.df = self.load_frame(products_csv, transactions_csv, shops_csv)
+        self._build_cubes()
+
+    @staticmethod
+    def load_frame(products_csv, transactions_csv, shops_csv):
+        """Load and merge the three files into the frame the model is built from."""
         products = pd.read_csv(products_csv)
         transactions = pd.read_csv(transactions_csv)
         shops = pd.read_csv(shops_csv)
 
-        self.df = transactions.merge(products, on="product_id", how="left")
-        self.df = self.df.merge(shops, on="shop_id", how="left")
+        df = transactions.merge(products, on="product_id", how="left")
+        df = df.merge(shops, on="shop_id", how="left")
+
+        df["transaction_time"] = pd.to_datetime(df["transaction_time"])
+        df["month"] = df["transaction_time"].dt.month
+        return df
 
-        self.df["transaction_time"] = pd.to_datetime(self.df["transaction_time"])
-        self.df["month"] = self.df["transaction_time"].dt.month
+    @classmethod
+    def from_frame(cls, df):
+        """Model over an already merged frame (e.g. a read-only view from the shared store); ``df`` is not modified."""
+        model = cls.__new__(cls)
+        model.df = df
+        model._build_cubes()
+        return model
+
+    # ---------------------------
+    # Pre-aggregated cubes
+    # ---------------------------
+    def _build_cubes(self):
+        """Aggregate once at load time so every query below is a dict lookup, not a scan of self.df."""
+        df = self.df
+
+        # Per-product totals for the radar metrics and price sensitivity
+        stats = df.groupby("product_name", observed=True).agg(
+            total_sales=("quantity", "sum"),
+            avg_sales=("quantity", "mean"),
+            avg_price=("unit_price", "mean"),
+            unique_shops=("shop_id", "nunique"),
+        )
+
+        # Log-log elasticities for every product/category in one grouped pass, shrunk toward the category
+        self.elasticities, self.category_elasticities = fit_elasticities(df)
+        stats["elasticity"] = self.elasticities["elasticity"].reindex(stats.index).fillna(PRIOR_ELASTICITY)
+        stats["elasticity_source"] = self.elasticities["source"].reindex(stats.index).fillna("prior")
+        self.price_table = stats[["avg_sales", "avg_price", "elasticity"]]
+        self.product_stats = stats.to_dict("index")
+
+        # product x district, sorted best district first
+        by_district = (df.groupby(["product_name", "district"], observed=True)["quantity"].sum()
+                         .sort_values(ascending=False))
+        self.product_district = {
+            product: sales.droplevel(0) for product, sales in by_district.groupby(level=0, sort=False, observed=True)
+        }
+
+        # product x month
+        by_month = df.groupby(["product_name", "month"], observed=True)["quantity"].sum()
+        self.product_month = {
+            product: sales.droplevel(0) for product, sales in by_month.groupby(level=0, sort=False, observed=True)
+        }
+
+        # category x district sums/counts; means for a whole category combine its districts
+        cells = df.groupby(["category", "district"], observed=True).agg(
+            qty_sum=("quantity", "sum"), qty_count=("quantity", "count"),
+            price_sum=("unit_price", "sum"), price_count=("unit_price", "count"),
+        )
+        categories = df.groupby("category", observed=True).agg(
+            qty_sum=("quantity", "sum"), qty_count=("quantity", "count"),
+            price_sum=("unit_price", "sum"), price_count=("unit_price", "count"),
+        )
+        category_elasticity = self.category_elasticities["elasticity"].to_dict()
+        category_source = self.category_elasticities["source"].to_dict()
+        self.category_district = {
+            key: {**self._means(row), "elasticity": category_elasticity.get(key[0], PRIOR_ELASTICITY),
+                  "elasticity_source": category_source.get(key[0], "prior")}
+            for key, row in cells.iterrows()
+        }
+        self.category_stats = {
+            key: {**self._means(row), "elasticity": category_elasticity.get(key, PRIOR_ELASTICITY),
+                  "elasticity_source": category_source.get(key, "prior")}
+            for key, row in categories.iterrows()
+        }
+
+        self.products = np.asarray(df["product_name"].dropna().unique())
+        self.categories = np.asarray(df["category"].dropna().unique())
+        self.districts = np.asarray(df["district"].dropna().unique())
+
+    @staticmethod
+    def _means(row):
+        return {
+            "avg_sales": row["qty_sum"] / row["qty_count"] if row["qty_count"] else np.nan,
+            "avg_price": row["price_sum"] / row["price_count"] if row["price_count"] else np.nan,
+        }
+
+    def product_summary(self, product):
+        """Total sales, average quantity/price and shop count of one product (None if unknown)."""
+        return self.product_stats.get(product)
 
     # ---------------------------
     # Insights
     # ---------------------------
     def top_districts(self, product, top_n=5):
-        return (self.df[self.df["product_name"] == product]
-                    .groupby("district")["quantity"].sum()
-                    .sort_values(ascending=False)
-                    .head(top_n))
+        empty = pd.Series(dtype=float, name="quantity", index=pd.Index([], name="district"))
+        return self.product_district.get(product, empty).head(top_n)
 
     def seasonal_trend(self, product):
-        return (self.df[self.df["product_name"] == product]
-                    .groupby("month")["quantity"].sum())
+        empty = pd.Series(dtype=float, name="quantity", index=pd.Index([], name="month"))
+        return self.product_month.get(product, empty)
 
     # ---------------------------
     # Simple Price Prediction
     # ---------------------------
     def predict_sales(self, product, new_price):
-        """Basic price sensitivity using average sales and elasticity."""
-        df_prod = self.df[self.df["product_name"] == product]
-        if df_prod.empty:
+        """Price sensitivity from average sales and the product's fitted elasticity."""
+        stats = self.product_stats.get(product)
+        if stats is None:
             return None
+        return float(price_response(stats["avg_sales"], stats["avg_price"], stats["elasticity"], new_price))
 
-        avg_sales = df_prod["quantity"].mean()
-        avg_price = df_prod["unit_price"].mean()
-
-        # elasticity factor (very simple rule)
-        elasticity = -0.5  # -0.5 means 10% price rise → ~5% sales drop
-        pct_change_price = (new_price - avg_price) / avg_price
-        predicted_sales = avg_sales * (1 + elasticity * pct_change_price)
-
-        return max(predicted_sales, 0)
+    def predict_sales_grid(self, prices, products=None):
+        """Expected sales of many products over a price grid at once (products x prices frame)."""
+        table = self.price_table if products is None else self.price_table.reindex(products).dropna()
+        prices = np.asarray(prices, dtype=np.float64)
+        sales = price_response(table["avg_sales"].to_numpy()[:, None], table["avg_price"].to_numpy()[:, None],
+                               table["elasticity"].to_numpy()[:, None], prices[None, :])
+        return pd.DataFrame(sales, index=table.index, columns=pd.Index(prices, name="price"))
 
     # ---------------------------
     # New Product Prediction
     # ---------------------------
     def new_launch_predict(self, new_product_name, price, category, district):
         """Estimate sales for a new product based on category + district averages."""
-        subset = self.df[(self.df["category"] == category) & (self.df["district"] == district)]
-        if subset.empty:
-            subset = self.df[self.df["category"] == category]
+        stats = self.category_district.get((category, district))
+        if stats is None:
+            stats = self.category_stats.get(category)
 
-        if subset.empty:
+        if stats is None:
             return None
 
-        avg_sales = subset["quantity"].mean()
-        avg_price = subset["unit_price"].mean()
-
-        # adjust with price difference
-        elasticity = -0.5
-        pct_change_price = (price - avg_price) / avg_price
-        predicted_sales = avg_sales * (1 + elasticity * pct_change_price)
+        # adjust with price difference, using the category's elasticity
+        predicted_sales = price_response(stats["avg_sales"], stats["avg_price"], stats["elasticity"], price)
 
         return {
             "product": new_product_name,
             "category": category,
             "district": district,
             "expected_price": price,
-            "predicted_sales": max(predicted_sales, 0)
+            "predicted_sales": float(predicted_sales),
+            "elasticity": float(stats["elasticity"]),
+            "elasticity_source": stats["elasticity_source"],
         }
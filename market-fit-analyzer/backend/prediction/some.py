@@ -1,9 +1,25 @@
 # ui.py
+import os
+import sys
+
 import streamlit as st
 from model import PasaleModel
 
-# Load model (acts like API)
-pasale = PasaleModel("products.csv", "transactions.csv", "shops.csv")
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ingestion import file_bytes, fingerprint
+from shared_store import store
+
+DATA_FILES = ("products.csv", "transactions.csv", "shops.csv")
+
+# Load model (acts like API). The merged frame lives once in the shared store and the model
+# is built once per process; each session only holds a reference, released when it ends.
+if "dataset" not in st.session_state:
+    st.session_state["dataset"] = store.acquire(
+        fingerprint("pasale", *(file_bytes(f) for f in DATA_FILES)),
+        lambda: {"transactions": PasaleModel.load_frame(*DATA_FILES)},
+    )
+dataset = st.session_state["dataset"]
+pasale = dataset.derive("pasale_model", lambda: PasaleModel.from_frame(dataset["transactions"]))
 
 st.set_page_config(page_title="Pasale Insight Lab", layout="wide")
 st.title("🌟 Pasale Insight Lab (Simple AI Predictions)")
@@ -15,11 +31,12 @@ section = st.sidebar.radio("Choose Section", ["Product Radar", "Price Prediction
 # ---------------------------
 if section == "Product Radar":
     st.header("Product Analytics")
-    product = st.selectbox("Select Product", pasale.df["product_name"].unique())
+    product = st.selectbox("Select Product", pasale.products)
+    summary = pasale.product_summary(product)
 
-    st.metric("Total Sales", int(pasale.df[pasale.df["product_name"] == product]["quantity"].sum()))
-    st.metric("Average Price", f"Rs. {pasale.df[pasale.df['product_name'] == product]['unit_price'].mean():.2f}")
-    st.metric("Unique Shops", pasale.df[pasale.df["product_name"] == product]["shop_id"].nunique())
+    st.metric("Total Sales", int(summary["total_sales"]))
+    st.metric("Average Price", f"Rs. {summary['avg_price']:.2f}")
+    st.metric("Unique Shops", summary["unique_shops"])
 
     # ✅ Top Districts as Table
     st.subheader("Top Districts ")
@@ -43,12 +60,23 @@ if section == "Product Radar":
 # ---------------------------
 elif section == "Price Prediction":
     st.header("💰 Price Sensitivity ")
-    product = st.selectbox("Select Product", pasale.df["product_name"].unique())
+    product = st.selectbox("Select Product", pasale.products)
     new_price = st.number_input("Enter New Price", min_value=10, max_value=1000, value=100)
 
     pred = pasale.predict_sales(product, new_price)
     if pred is not None:
         st.success(f"Prediction: At Rs.{new_price}, expected sales ≈ **{pred:.0f} units**")
+        stats = pasale.product_stats[product]
+        st.metric("Price Elasticity", f"{stats['elasticity']:.2f}",
+                  help="Estimated % change in sales for a 1% price change (shrunk toward the category)")
+        if stats["elasticity_source"] != "product":
+            st.caption(f"⚠️ This product's own prices don't show a clear effect on sales, so the "
+                       f"{'category' if stats['elasticity_source'] == 'category' else 'default'} "
+                       f"elasticity is used instead.")
+
+        # Whole price grid in one vectorized call
+        curve = pasale.predict_sales_grid(range(10, 1001, 10), [product]).iloc[0]
+        st.line_chart(curve.rename("Expected Sales"))
     else:
         st.warning("Not enough data to predict for this product.")
 
@@ -58,8 +86,8 @@ elif section == "Price Prediction":
 elif section == "New Launch Simulator":
     st.header("New Product Launch (Simple)")
     new_name = st.text_input("New Product Name")
-    category = st.selectbox("Select Category", pasale.df["category"].dropna().unique())
-    district = st.selectbox("Select District", pasale.df["district"].dropna().unique())
+    category = st.selectbox("Select Category", pasale.categories)
+    district = st.selectbox("Select District", pasale.districts)
     price = st.number_input("Expected Price", min_value=10, max_value=1000, value=100)
 
     if new_name:
@@ -0,0 +1,113 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_engine import SERIES_KEYS, required_lags
+from forecasting import latest_state, step_features
+from product_performance import FEATURES
+from simulation import predict_batched
+
+OBJECTIVES = ('revenue', 'margin')
+
+
+def price_multipliers(n_prices=21, max_change=0.2):
+    """Candidate prices as multiples of the current price, always including 1.0 (no change)."""
+    grid = np.round(np.linspace(1 - max_change, 1 + max_change, n_prices), 6)
+    return np.unique(np.append(grid, 1.0))
+
+
+def optimize_prices(model, monthly_data, objective='revenue', max_change=0.2, n_prices=21,
+                    min_volume_ratio=0.0, cost_ratio=0.7, feature_columns=None,
+                    chunk_rows=1_000_000, parallel=True):
+    """Best next-month price for every (product_id, shop_id) series over a grid of candidate prices.
+
+    Each series' next-month feature row is built once. Only ``price_difference``
+    changes between candidates, so chunks of series x candidates are scored
+    with one ``predict_batched`` call each (``chunk_rows`` rows at a time).
+    ``objective`` is ``revenue`` (price x quantity) or ``margin``, where the
+    unit cost is ``cost_ratio`` x the standard price. Candidates stay within
+    ``max_change`` of the current price. They must also keep at least
+    ``min_volume_ratio`` of the quantity predicted at the current price.
+    The current price is always a candidate and always feasible.
+
+    Returns one row per series with the current and optimal price, expected
+    quantities and objective values, and the uplift in percent.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; expected one of {OBJECTIVES}")
+    feature_columns = feature_columns or FEATURES
+    series, history, last_month = latest_state(monthly_data)
+    target = pd.Period(ordinal=last_month + 1, freq='M')
+    X = step_features(series, {k: history[:, k - 1] for k in required_lags()}, target, feature_columns)
+
+    multipliers = price_multipliers(n_prices, max_change)
+    current = multipliers.searchsorted(1.0)
+    n_series, n_grid = len(series), len(multipliers)
+    price = series['avg_price'].to_numpy(np.float64)
+    standard = series['standard_price'].to_numpy(np.float64)
+    prices = price[:, None] * multipliers[None, :]
+
+    quantity = np.empty((n_series, n_grid))
+    per_chunk = max(1, chunk_rows // n_grid)
+    price_column = feature_columns.index('price_difference')
+    for start in range(0, n_series, per_chunk):
+        stop = min(start + per_chunk, n_series)
+        block = np.repeat(X.iloc[start:stop].to_numpy(np.float64), n_grid, axis=0)
+        block[:, price_column] = (prices[start:stop] - standard[start:stop, None]).reshape(-1)
+        scored = predict_batched(model, pd.DataFrame(block, columns=feature_columns), parallel=parallel)
+        quantity[start:stop] = np.maximum(scored, 0).reshape(stop - start, n_grid)
+
+    unit_value = prices if objective == 'revenue' else prices - cost_ratio * standard[:, None]
+    value = unit_value * quantity
+    feasible = quantity >= min_volume_ratio * quantity[:, [current]]
+    feasible[:, current] = True
+    best = np.where(feasible, value, -np.inf).argmax(axis=1)
+    rows = np.arange(n_series)
+
+    attributes = [c for c in ['product_name', 'category', 'city'] if c in series.columns]
+    table = series[SERIES_KEYS + attributes].copy()
+    table['current_price'] = price
+    table['optimal_price'] = prices[rows, best]
+    table['price_change_pct'] = np.round((multipliers[best] - 1) * 100, 4)
+    table['current_quantity'] = quantity[:, current]
+    table['expected_quantity'] = quantity[rows, best]
+    table[f'current_{objective}'] = value[:, current]
+    table[f'expected_{objective}'] = value[rows, best]
+    baseline = table[f'current_{objective}']
+    table['uplift_pct'] = ((table[f'expected_{objective}'] - baseline) / baseline.abs().where(baseline != 0) * 100)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Optimal next-month price for every product/shop series.')
+    parser.add_argument('--transactions', default='transactions.csv')
+    parser.add_argument('--products', default='products.csv')
+    parser.add_argument('--shops', default='shops.csv')
+    parser.add_argument('--objective', choices=OBJECTIVES, default='revenue')
+    parser.add_argument('--max-change', type=float, default=0.2, help='largest price move, as a fraction')
+    parser.add_argument('--prices', type=int, default=21, help='candidate prices per series')
+    parser.add_argument('--min-volume', type=float, default=0.0,
+                        help='minimum share of the volume expected at the current price')
+    parser.add_argument('--cost-ratio', type=float, default=0.7, help='unit cost as a share of standard price')
+    parser.add_argument('--output', default='optimal_prices.csv')
+    args = parser.parse_args()
+
+    from pipeline_cache import run_pipeline
+    pipeline = run_pipeline(args.transactions, args.products, args.shops, forecast_horizon=1)
+
+    start = time.perf_counter()
+    table = optimize_prices(pipeline['model'], pipeline['monthly_aggregate'], args.objective, args.max_change,
+                            args.prices, args.min_volume, args.cost_ratio)
+    seconds = time.perf_counter() - start
+    scored = len(table) * len(price_multipliers(args.prices, args.max_change))
+    table.to_csv(args.output, index=False)
+    print(f"✅ Optimized {len(table)} series ({scored} candidate prices, {scored / seconds:,.0f}/s) "
+          f"in {seconds:.1f}s -> {args.output}")
+    total = table[f'expected_{args.objective}'].sum() / table[f'current_{args.objective}'].sum() - 1
+    print(f"✅ Expected {args.objective} change across the catalog: {total * 100:+.1f}%")
+
+
+if __name__ == '__main__':
+    main()
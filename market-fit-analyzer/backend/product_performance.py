@@ -1,122 +1,460 @@
+import importlib.util
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
 from sklearn.model_selection import train_test_split
-import joblib
+from threadpoolctl import threadpool_limits
+
+from feature_engine import SERIES_KEYS, add_lag_features, month_ordinals, required_lags
+from feature_store import FeatureMatrix, shared_matrix
+from ingestion import (
+    PRODUCT_SCHEMA, SHOP_SCHEMA, coerce_ids, file_bytes, iter_transaction_chunks, load_tables, read_table
+)
+
+
+# Model inputs shared by training, prediction and the dashboard
+FEATURES = [
+    'last_month_qty', 'last_2_months_qty', 'last_3_months_qty',
+    'avg_last_3_months', 'trend', 'price_difference',
+    'is_holiday_month', 'is_summer', 'category_code', 'city_code'
+]
+
+
+def load_data(transactions_file, products_file, shops_file, cache_dir=None):
+    """Read the three source files (CSV, Parquet or Feather) and merge them into one typed frame.
+
+    IDs become int32 (or shared categoricals when they are not numeric) and
+    text attributes become categoricals; see ``ingestion.load_tables``.
+    """
+    return load_tables(transactions_file, products_file, shops_file, cache_dir=cache_dir)
+
+
+LAG_COLUMNS = ['last_month_qty', 'last_2_months_qty', 'last_3_months_qty']
+HOLIDAY_MONTHS = [1, 4, 10, 11, 12]
+SUMMER_MONTHS = [3, 4, 5, 6]
+
+# Part of model registry keys: models trained under an older split scheme are not reused
+TRAINING_SCHEME = 'time-holdout'
+
+
+def _aggregate_monthly(data):
+    """Group transactions into (product, shop, month) cells with mergeable state."""
+    # Ensure datetime (without touching the caller's frame, which may be cached)
+    if not pd.api.types.is_datetime64_any_dtype(data['transaction_time']):
+        data = data.assign(transaction_time=pd.to_datetime(data['transaction_time'], errors='coerce'))
+
+    data = data.dropna(subset=['transaction_time'])
+    data = data.assign(year_month=data['transaction_time'].dt.to_period('M'))
+
+    # Aggregate; price_count keeps the mean of unit_price mergeable with later deltas
+    monthly_sales = data.groupby(SERIES_KEYS + ['year_month'], observed=True).agg(
+        monthly_quantity=('quantity', 'sum'),
+        monthly_revenue=('total_amount', 'sum'),
+        avg_price=('unit_price', 'mean'),
+        price_count=('unit_price', 'count'),
+        product_name=('product_name', 'first'),
+        category=('category', 'first'),
+        city=('city', 'first'),
+        standard_price=('standard_price', 'first')
+    ).reset_index()
+
+    return monthly_sales.sort_values(SERIES_KEYS + ['year_month'], ignore_index=True)
 
 
 def prepare_monthly_data(data):
     """Convert daily transactions to monthly aggregated sales data."""
     print("Preparing monthly sales data...")
 
-    # Ensure datetime
-    if not pd.api.types.is_datetime64_any_dtype(data['transaction_time']):
-        data['transaction_time'] = pd.to_datetime(data['transaction_time'], errors='coerce')
-    
-    data = data.dropna(subset=['transaction_time'])
-    data['year_month'] = data['transaction_time'].dt.to_period('M')
-
-    # Aggregate
-    monthly_sales = data.groupby(['product_id', 'shop_id', 'year_month']).agg({
-        'quantity': 'sum',
-        'total_amount': 'sum',
-        'unit_price': 'mean',
-        'product_name': 'first',
-        'category': 'first',
-        'city': 'first',
-        'standard_price': 'first'
-    }).reset_index()
-
-    # Rename
-    monthly_sales.rename(columns={
-        'quantity': 'monthly_quantity',
-        'total_amount': 'monthly_revenue',
-        'unit_price': 'avg_price'
-    }, inplace=True)
-
-    monthly_sales = monthly_sales.sort_values(['product_id', 'shop_id', 'year_month'])
+    monthly_sales = _aggregate_monthly(data)
 
     print(f"✅ Created {len(monthly_sales)} monthly records.")
     return monthly_sales
 
 
-def create_features(monthly_data):
-    """Create lag, trend, and encoded features."""
-    print("Creating features...")
+STREAM_COLUMNS = ['product_id', 'shop_id', 'quantity', 'unit_price', 'total_amount', 'transaction_time']
+
+
+def _partial_monthly(chunk):
+    """Per-cell sums and counts for one chunk of raw transactions."""
+    chunk = chunk.dropna(subset=['transaction_time'])
+    chunk = chunk.assign(year_month=chunk['transaction_time'].dt.to_period('M'))
+    return chunk.groupby(SERIES_KEYS + ['year_month'], observed=True).agg(
+        monthly_quantity=('quantity', 'sum'),
+        monthly_revenue=('total_amount', 'sum'),
+        price_sum=('unit_price', 'sum'),
+        price_count=('unit_price', 'count')
+    )
+
+
+def _fold(partials):
+    # A chunk with a non-integer ID keeps string IDs (see iter_transaction_chunks); the other
+    # chunks' integer IDs of that column are then matched to them as strings
+    for level in range(len(SERIES_KEYS)):
+        if not all(pd.api.types.is_integer_dtype(p.index.levels[level]) for p in partials):
+            partials = [p.set_axis(p.index.set_levels(p.index.levels[level].astype(str), level=level))
+                        for p in partials]
+    return pd.concat(partials).groupby(level=[0, 1, 2], observed=True).sum()
+
+
+def _as_table(source, schema):
+    return source if isinstance(source, pd.DataFrame) else read_table(file_bytes(source), schema)
+
+
+def stream_monthly_data(transactions_source, products, shops, chunksize=1_000_000):
+    """Monthly aggregate of a transactions file too large to load at once.
+
+    Transactions are read ``chunksize`` rows at a time and folded into running
+    per-(product, shop, month) sums, so peak memory is bounded by the number of
+    monthly cells plus one chunk, not by the number of transactions. Product
+    and shop attributes are joined once, after aggregation. The result has
+    the same columns as ``prepare_monthly_data``.
+    """
+    print("Streaming monthly sales data...")
+
+    running = None
+    pending = []
+    pending_rows = 0
+    n_transactions = 0
+    for chunk in iter_transaction_chunks(transactions_source, chunksize=chunksize, columns=STREAM_COLUMNS):
+        n_transactions += len(chunk)
+        partial = _partial_monthly(chunk)
+        pending.append(partial)
+        pending_rows += len(partial)
+        # Compact once pending partials outgrow the running aggregate (amortized linear)
+        if pending_rows >= max(chunksize, 0 if running is None else len(running)):
+            running = _fold(pending if running is None else [running] + pending)
+            pending, pending_rows = [], 0
+    if pending:
+        running = _fold(pending if running is None else [running] + pending)
+
+    monthly_sales = running.reset_index()
+    monthly_sales['avg_price'] = monthly_sales['price_sum'] / monthly_sales['price_count'].where(monthly_sales['price_count'] > 0)
+
+    # Join the small dimension tables only now, on one row per cell
+    products = _as_table(products, PRODUCT_SCHEMA)[['product_id', 'product_name', 'category', 'standard_price']].copy()
+    shops = _as_table(shops, SHOP_SCHEMA)[['shop_id', 'city']].copy()
+    coerce_ids(monthly_sales, products, column='product_id')
+    coerce_ids(monthly_sales, shops, column='shop_id')
+    monthly_sales = monthly_sales.merge(products, on='product_id', how='left').merge(shops, on='shop_id', how='left')
+
+    monthly_sales = monthly_sales[SERIES_KEYS + [
+        'year_month', 'monthly_quantity', 'monthly_revenue', 'avg_price', 'price_count',
+        'product_name', 'category', 'city', 'standard_price'
+    ]]
+    monthly_sales = monthly_sales.sort_values(SERIES_KEYS + ['year_month'], ignore_index=True)
+
+    print(f"✅ Folded {n_transactions} transactions into {len(monthly_sales)} monthly records.")
+    return monthly_sales
+
+
+def _cell_index(frame):
+    return pd.MultiIndex.from_frame(frame[SERIES_KEYS + ['year_month']])
+
+
+def update_monthly_data(monthly_data, new_transactions):
+    """Merge newly appended transactions into an existing monthly aggregate.
+
+    Only the delta is grouped; existing cells it touches are combined with the
+    delta's sums/counts (first-seen attributes win). Returns the updated
+    aggregate and the (product_id, shop_id, year_month) cells that changed.
+    """
+    print("Updating monthly sales data...")
 
+    delta = _aggregate_monthly(new_transactions)
+    touched = _cell_index(monthly_data).isin(_cell_index(delta))
+
+    combined = pd.concat([monthly_data[touched], delta], ignore_index=True)
+    combined['price_sum'] = combined['avg_price'] * combined['price_count']
+    combined = combined.groupby(SERIES_KEYS + ['year_month'], sort=False, observed=True).agg(
+        monthly_quantity=('monthly_quantity', 'sum'),
+        monthly_revenue=('monthly_revenue', 'sum'),
+        price_sum=('price_sum', 'sum'),
+        price_count=('price_count', 'sum'),
+        product_name=('product_name', 'first'),
+        category=('category', 'first'),
+        city=('city', 'first'),
+        standard_price=('standard_price', 'first')
+    ).reset_index()
+    combined['avg_price'] = combined['price_sum'] / combined['price_count'].where(combined['price_count'] > 0)
+    combined = combined[monthly_data.columns]
+
+    updated = pd.concat([monthly_data[~touched], combined], ignore_index=True)
+    updated = updated.sort_values(SERIES_KEYS + ['year_month'], ignore_index=True)
+    affected = delta[SERIES_KEYS + ['year_month']]
+
+    print(f"✅ Merged {len(delta)} monthly cells into {len(updated)} monthly records.")
+    return updated, affected
+
+
+def _ensure_period(monthly_data):
     if not isinstance(monthly_data['year_month'].dtype, pd.PeriodDtype):
         monthly_data['year_month'] = monthly_data['year_month'].astype('period[M]')
+    return monthly_data
+
 
+def _add_row_features(monthly_data, origin=None):
+    """Calendar, lag, trend and price features for (product, shop, month) rows."""
     monthly_data['month_date'] = monthly_data['year_month'].dt.to_timestamp()
     monthly_data['month'] = monthly_data['month_date'].dt.month
     monthly_data['year'] = monthly_data['month_date'].dt.year
 
-    # Lag features
-    monthly_data['last_month_qty'] = monthly_data.groupby(['product_id', 'shop_id'])['monthly_quantity'].shift(1)
-    monthly_data['last_2_months_qty'] = monthly_data.groupby(['product_id', 'shop_id'])['monthly_quantity'].shift(2)
-    monthly_data['last_3_months_qty'] = monthly_data.groupby(['product_id', 'shop_id'])['monthly_quantity'].shift(3)
+    # Lag features: calendar lags in one pass (months without sales count as zero)
+    monthly_data = add_lag_features(monthly_data, origin=origin)
 
-    monthly_data['avg_last_3_months'] = monthly_data[['last_month_qty', 'last_2_months_qty', 'last_3_months_qty']].mean(axis=1)
-    monthly_data['trend'] = monthly_data['last_month_qty'] - monthly_data['last_2_months_qty']
     monthly_data['price_difference'] = monthly_data['avg_price'] - monthly_data['standard_price']
 
-    monthly_data['is_holiday_month'] = monthly_data['month'].isin([1, 4, 10, 11, 12]).astype(int)
-    monthly_data['is_summer'] = monthly_data['month'].isin([3, 4, 5, 6]).astype(int)
+    monthly_data['is_holiday_month'] = monthly_data['month'].isin(HOLIDAY_MONTHS).astype(int)
+    monthly_data['is_summer'] = monthly_data['month'].isin(SUMMER_MONTHS).astype(int)
+    return monthly_data
+
+
+def encode_categories(feature_data, monthly_data):
+    """Category/city codes over every value seen in the monthly aggregate."""
+    for column in ['category', 'city']:
+        categories = pd.Categorical(monthly_data[column]).categories
+        feature_data[f'{column}_code'] = pd.Categorical(feature_data[column], categories=categories).codes
+    return feature_data
+
+
+def create_features(monthly_data):
+    """Create lag, trend, and encoded features."""
+    print("Creating features...")
+
+    monthly_data = _ensure_period(monthly_data.copy())
+    monthly_data = _add_row_features(monthly_data)
 
     # Encoding
-    monthly_data['category_code'] = pd.Categorical(monthly_data['category']).codes
-    monthly_data['city_code'] = pd.Categorical(monthly_data['city']).codes
+    monthly_data = encode_categories(monthly_data, monthly_data)
 
     # Drop NA from lags
-    monthly_data = monthly_data.dropna(subset=['last_month_qty', 'last_2_months_qty', 'last_3_months_qty'])
+    monthly_data = monthly_data.dropna(subset=LAG_COLUMNS)
 
     print(f"✅ Feature set created with {len(monthly_data)} rows.")
     return monthly_data
 
 
-def train_model(data, target_col='monthly_quantity'):
-    """Train a basic RandomForest model."""
-    print("Training model...")
+def update_features(feature_data, monthly_data, affected):
+    """Recompute features only for the series and months touched by an update.
 
-    # Define features to use
-    features = [
-        'last_month_qty', 'last_2_months_qty', 'last_3_months_qty',
-        'avg_last_3_months', 'trend', 'price_difference',
-        'is_holiday_month', 'is_summer', 'category_code', 'city_code'
-    ]
+    ``monthly_data``/``affected`` come from ``update_monthly_data``. Lags are
+    calendar months, so a row is rebuilt when its own cell or one of the cells
+    up to ``max lag`` months before it was touched, or when it sits near the
+    series start and a late cell moved that start earlier; other rows are kept.
+    """
+    print("Updating features...")
 
-    X = data[features]
-    y = data[target_col]
+    depth = max(required_lags())
+    monthly_data = _ensure_period(monthly_data.copy())
+    first_affected = affected.groupby(SERIES_KEYS, observed=True)['year_month'].min().rename('first_affected')
 
-    # Split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # Affected series only, from `depth` months before their first touched month
+    series = monthly_data.join(first_affected, on=SERIES_KEYS, how='inner')
+    months = pd.Series(month_ordinals(series['year_month']), index=series.index)
+    by_series = [series['product_id'], series['shop_id']]
+    origin = months.groupby(by_series, observed=True).transform('min').to_numpy()
+    untouched = ~_cell_index(series).isin(_cell_index(affected))
+    old_origin = months.where(untouched).groupby(by_series, observed=True).transform('min')
+    near_origin = (months < old_origin + depth).to_numpy()
+    in_window = (months >= month_ordinals(series['first_affected']) - depth).to_numpy()
+    window = series[in_window].drop(columns='first_affected')
+    window = _add_row_features(window, origin=origin[in_window])
 
-    # Model
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
+    # Touched cells plus the cells whose lag window reaches back to one of them
+    reach = pd.concat([affected.assign(year_month=affected['year_month'] + k) for k in range(depth + 1)])
+    rebuilt = window[_cell_index(window).isin(_cell_index(reach)) | near_origin[in_window]]
+
+    # Replace every stale row for the rebuilt cells, then re-encode over the full aggregate
+    kept = feature_data[~_cell_index(feature_data).isin(_cell_index(rebuilt))]
+    rebuilt = rebuilt.dropna(subset=LAG_COLUMNS)
+    updated = pd.concat([kept, rebuilt]).sort_values(SERIES_KEYS + ['year_month'])
+    updated = encode_categories(updated, monthly_data)
 
-    # Evaluate
-    y_pred = model.predict(X_test)
+    print(f"✅ Rebuilt {len(rebuilt)} feature rows; feature set has {len(updated)} rows.")
+    return updated
+
+
+# ---------------------------
+# Trainers
+# ---------------------------
+def _random_forest(n_jobs):
+    return RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
+
+
+def _hist_gradient_boosting(n_jobs):
+    # Histogram-based boosting from scikit-learn; it has no n_jobs, its OpenMP threads are
+    # capped by thread_budget(n_jobs) around fit and predict
+    return HistGradientBoostingRegressor(max_iter=300, learning_rate=0.05, random_state=42)
+
+
+def _xgboost(n_jobs):
+    from xgboost import XGBRegressor
+    return XGBRegressor(n_estimators=300, learning_rate=0.05, max_depth=6,
+                        tree_method='hist', n_jobs=n_jobs, random_state=42)
+
+
+def _lightgbm(n_jobs):
+    from lightgbm import LGBMRegressor
+    return LGBMRegressor(n_estimators=300, learning_rate=0.05, num_leaves=31,
+                         n_jobs=n_jobs, random_state=42, verbose=-1)
+
+
+# model_type -> (factory(n_jobs) returning an unfitted regressor, module it needs)
+TRAINERS = {
+    'Random Forest': (_random_forest, 'sklearn'),
+    'HistGradientBoosting': (_hist_gradient_boosting, 'sklearn'),
+    'XGBoost': (_xgboost, 'xgboost'),
+    'LightGBM': (_lightgbm, 'lightgbm'),
+}
+
+
+def register_trainer(model_type, factory, module='sklearn'):
+    """Plug in another tabular regressor: ``factory(n_jobs)`` returns an unfitted model."""
+    TRAINERS[model_type] = (factory, module)
+
+
+def available_trainers():
+    """Trainer names whose library is installed."""
+    return [name for name, (_, module) in TRAINERS.items() if importlib.util.find_spec(module)]
+
+
+def make_model(model_type='Random Forest', n_jobs=-1):
+    """Unfitted regressor for ``model_type``."""
+    if model_type not in TRAINERS:
+        raise ValueError(
+            f"'{model_type}' is not a tabular regressor over the lag features; "
+            f"choose one of {', '.join(TRAINERS)}"
+        )
+    factory, module = TRAINERS[model_type]
+    if importlib.util.find_spec(module) is None:
+        raise ImportError(f"{model_type} needs the '{module}' package (pip install {module})")
+    return factory(n_jobs)
+
+
+def thread_budget(n_jobs):
+    """Cap OpenMP threads at ``n_jobs`` for a ``with`` block (no cap for ``None`` or negative values).
+
+    Trainers without an ``n_jobs`` parameter (HistGradientBoosting) otherwise
+    use every core, even inside a process-pool worker given a share of them.
+    """
+    if n_jobs is None or n_jobs < 1:
+        return nullcontext()
+    return threadpool_limits(limits=n_jobs, user_api='openmp')
+
+
+def holdout_mask(data, test_size=0.2):
+    """Boolean mask of the most recent months holding about ``test_size`` of the rows.
+
+    Whole months are held out, so no row from a test month is used for
+    training. Returns ``None`` when the data spans a single month.
+    """
+    months = month_ordinals(data['year_month'])
+    unique, counts = np.unique(months, return_counts=True)
+    if len(unique) < 2:
+        return None
+    # Number of latest months whose share of the rows is closest to test_size
+    share = np.cumsum(counts[::-1]) / len(months)
+    n_test_months = min(int(np.argmin(np.abs(share - test_size))) + 1, len(unique) - 1)
+    return months >= unique[-n_test_months]
+
+
+def train_model(data, target_col='monthly_quantity', return_metrics=False,
+                model_type='Random Forest', n_jobs=-1):
+    """Train the selected model on earlier months (optionally also returning metrics on the latest ones).
+
+    ``data`` is a feature frame or a ``FeatureMatrix``; from a matrix the
+    train and hold-out sets are zero-copy slices of the mapped file.
+    """
+    print(f"Training {model_type} model...")
+
+    if isinstance(data, FeatureMatrix):
+        X, y = data.frame(), data.target()
+        test = holdout_mask(data.index)
+    else:
+        X = data[FEATURES]
+        y = data[target_col]
+        test = holdout_mask(data) if 'year_month' in data.columns else None
+
+    # Split by time: the latest months are the hold-out, so no future month leaks into training
+    if test is not None and isinstance(data, FeatureMatrix):
+        # Matrix rows are sorted by month: the hold-out is the tail and both sets are views
+        cut = len(data) - int(test.sum())
+        X_train, X_test, y_train, y_test = X.iloc[:cut], X.iloc[cut:], y[:cut], y[cut:]
+    elif test is not None:
+        X_train, X_test, y_train, y_test = X[~test], X[test], y[~test], y[test]
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Model
+    start = time.perf_counter()
+    model = make_model(model_type, n_jobs=n_jobs)
+    with thread_budget(n_jobs):
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        # Evaluate
+        y_pred = model.predict(X_test)
     rmse = np.sqrt(mean_squared_error(y_test, y_pred))
     r2 = r2_score(y_test, y_pred)
 
-    print(f"✅ Model trained. RMSE: {rmse:.2f}, R²: {r2:.2f}")
+    print(f"✅ Model trained in {fit_seconds:.2f}s. RMSE: {rmse:.2f}, R²: {r2:.2f}")
 
+    if return_metrics:
+        return model, {'rmse': rmse, 'r2': r2, 'n_train': len(X_train), 'n_test': len(X_test),
+                       'fit_seconds': fit_seconds}
     return model
 
 
+def _train_candidate(args):
+    data, target_col, model_type, n_jobs = args
+    start = time.perf_counter()
+    try:
+        model, metrics = train_model(data, target_col, return_metrics=True,
+                                     model_type=model_type, n_jobs=n_jobs)
+    except (ImportError, ValueError) as e:
+        return {'model_type': model_type, 'error': str(e)}
+    return {'model_type': model_type, 'model': model, 'wall_seconds': time.perf_counter() - start,
+            **metrics}
+
+
+def train_candidates(data, model_types, target_col='monthly_quantity', max_workers=None):
+    """Fit several model types concurrently in a process pool.
+
+    Cores are split between the workers so the per-model ``n_jobs`` does not
+    oversubscribe the machine. Returns one result dict per model type (model,
+    metrics, wall time, or ``error``), in the order requested. Workers map
+    one feature matrix by path (``data`` may already be one) instead of
+    each receiving a pickled copy of the frame.
+    """
+    model_types = list(model_types)
+    max_workers = max_workers or min(len(model_types), os.cpu_count() or 1)
+    n_jobs = max(1, (os.cpu_count() or 1) // max_workers)
+
+    with shared_matrix(data, FEATURES, target_col) as matrix, ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(_train_candidate, [(matrix, target_col, m, n_jobs) for m in model_types])
+        return list(results)
+
+
+def pick_fastest(results, tolerance=0.05):
+    """Fastest successful candidate whose RMSE is within ``tolerance`` of the best one."""
+    fitted = [r for r in results if 'error' not in r]
+    if not fitted:
+        return None
+    best_rmse = min(r['rmse'] for r in fitted)
+    eligible = [r for r in fitted if r['rmse'] <= best_rmse * (1 + tolerance)]
+    return min(eligible, key=lambda r: r['wall_seconds'])
+
+
 def predict_next_month(model, data):
     """Use trained model to predict future month sales."""
     print("Predicting next month's sales...")
 
-    features = [
-        'last_month_qty', 'last_2_months_qty', 'last_3_months_qty',
-        'avg_last_3_months', 'trend', 'price_difference',
-        'is_holiday_month', 'is_summer', 'category_code', 'city_code'
-    ]
-
-    data['predicted_quantity'] = model.predict(data[features])
+    data['predicted_quantity'] = model.predict(data[FEATURES])
     print(f"✅ Predictions added to dataframe.")
     return data
 
@@ -124,18 +462,34 @@ def predict_next_month(model, data):
 # Example usage
 if __name__ == '__main__':
     # Load your dataset here (CSV, database, etc.)
+    from forecasting import forecast_catalog
+    from model_registry import ModelRegistry, feature_encodings
+    from pipeline_cache import file_bytes, fingerprint
+
     try:
-        df = pd.read_csv('data/retail_data.csv')  # change path if needed
+        data_path = 'data/retail_data.csv'  # change path if needed
+        df = pd.read_csv(data_path)
 
         # Step-by-step pipeline
         monthly = prepare_monthly_data(df)
         features = create_features(monthly)
-        model = train_model(features)
+
+        # Warm start: reuse the registered model when this exact dataset was trained before
+        registry = ModelRegistry()
+        key = fingerprint(file_bytes(data_path), 'monthly_quantity', 'Random Forest', TRAINING_SCHEME)
+        entry = registry.load(key)
+        if entry is not None:
+            model, meta = entry
+            print(f"✅ Loaded registered model {key[:12]} (RMSE: {meta['metrics']['rmse']:.2f}).")
+        else:
+            model, metrics = train_model(features, return_metrics=True)
+            registry.save(key, model, FEATURES, feature_encodings(features), metrics)
+            print(f"✅ Registered model {key[:12]} in {registry.root}.")
         result = predict_next_month(model, features)
 
-        # Save result
+        # Save result, plus a 3-month forecast for every product/shop
         result.to_csv("data/monthly_predictions.csv", index=False)
-        joblib.dump(model, "models/sales_forecast_model.pkl")
+        forecast_catalog(model, monthly, horizon=3).to_csv("data/monthly_forecast.csv", index=False)
         print("✅ Finished pipeline and saved predictions & model.")
     except Exception as e:
         print("❌ Error occurred:", e)
@@ -0,0 +1,76 @@
+import numpy as np
+
+from feature_engine import SERIES_KEYS
+
+
+def _block_starts(changed, n):
+    """Start offsets of the runs in a sorted array of length n, given ``values[1:] != values[:-1]``."""
+    if n == 0:
+        return np.array([], dtype=int)
+    return np.flatnonzero(np.r_[True, changed])
+
+
+class SeriesIndex:
+    """Row-offset index over a frame of (product_id, shop_id, month) rows.
+
+    The frame is sorted once by series and month, so every series is a
+    contiguous block: looking one up is a dict hit plus an ``iloc`` slice
+    instead of a boolean scan of the whole frame. Products are contiguous too
+    (they lead the sort); shops get an array of row positions.
+    """
+
+    def __init__(self, frame, order_by='year_month'):
+        sort_cols = SERIES_KEYS + ([order_by] if order_by in frame.columns else [])
+        self.frame = frame.sort_values(sort_cols, ignore_index=True, kind='stable')
+
+        products = self.frame['product_id'].to_numpy()
+        shops = self.frame['shop_id'].to_numpy()
+        n = len(self.frame)
+
+        # Block boundaries wherever product (or product and shop) changes
+        series_starts = _block_starts((products[1:] != products[:-1]) | (shops[1:] != shops[:-1]), n)
+        series_stops = np.append(series_starts[1:], n)[:len(series_starts)].astype(int)
+        self._series = {
+            (products[a], shops[a]): (a, b) for a, b in zip(series_starts.tolist(), series_stops.tolist())
+        }
+
+        product_starts = _block_starts(products[1:] != products[:-1], n)
+        product_stops = np.append(product_starts[1:], n)[:len(product_starts)].astype(int)
+        self._products = {
+            products[a]: (a, b) for a, b in zip(product_starts.tolist(), product_stops.tolist())
+        }
+
+        shop_order = np.argsort(shops, kind='stable')
+        shop_values = shops[shop_order]
+        shop_starts = _block_starts(shop_values[1:] != shop_values[:-1], n)
+        self._shops = dict(zip(shop_values[shop_starts], np.split(shop_order, shop_starts[1:])))
+
+        # One row per series: the latest month
+        self.latest = self.frame.iloc[series_stops - 1].set_index(SERIES_KEYS)
+
+    def __contains__(self, key):
+        return tuple(key) in self._series
+
+    def __len__(self):
+        return len(self._series)
+
+    def keys(self):
+        return self._series.keys()
+
+    def series(self, product_id, shop_id):
+        """All rows of one series in month order (empty frame if unknown)."""
+        start, stop = self._series.get((product_id, shop_id), (0, 0))
+        return self.frame.iloc[start:stop]
+
+    def latest_row(self, product_id, shop_id):
+        """Most recent row of one series, or ``None``."""
+        bounds = self._series.get((product_id, shop_id))
+        return None if bounds is None else self.frame.iloc[bounds[1] - 1]
+
+    def for_product(self, product_id):
+        start, stop = self._products.get(product_id, (0, 0))
+        return self.frame.iloc[start:stop]
+
+    def for_shop(self, shop_id):
+        positions = self._shops.get(shop_id)
+        return self.frame.iloc[positions] if positions is not None else self.frame.iloc[0:0]
@@ -0,0 +1,355 @@
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_ROOT = os.path.join(tempfile.gettempdir(), 'market-fit-store')
+META_FILE = 'meta.json'
+LEASE_DIR = 'leases'
+LOCK_FILE = '.lock'
+
+
+@contextmanager
+def root_lock(root, timeout=30.0, stale_seconds=60.0):
+    """Lock shared by every process using ``root``: exclusive creation of ``<root>/.lock``.
+
+    Plain file creation works on every platform (unlike fcntl). A lock file
+    older than ``stale_seconds`` was left by a crashed process and is broken.
+    """
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, LOCK_FILE)
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > stale_seconds:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f'Timed out waiting for {path}')
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+
+def _process_alive(pid):
+    if os.name != 'posix':
+        return True  # no cheap, safe check: keep the lease (files stay until an explicit prune)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def live_leases(version_dir):
+    """PIDs of the running processes holding a lease on a stored version."""
+    try:
+        pids = [int(name) for name in os.listdir(os.path.join(version_dir, LEASE_DIR)) if name.isdigit()]
+    except FileNotFoundError:
+        return []
+    return [pid for pid in pids if _process_alive(pid)]
+
+
+def write_frame(path, frame):
+    """Write every column of ``frame`` as its own ``.npy`` file plus a ``meta.json`` describing them.
+
+    Text columns are stored as categorical codes, monthly periods as int64
+    ordinals and a non-default index as ``index.npy``, so every column can be
+    memory-mapped back without parsing.
+    """
+    os.makedirs(path, exist_ok=True)
+    columns = []
+    for i, name in enumerate(frame.columns):
+        series = frame[name]
+        if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            series = series.astype('category')
+        entry = {'name': name, 'file': f'{i}.npy'}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry['kind'] = 'category'
+            entry['categories'] = series.cat.categories.tolist()
+            entry['ordered'] = bool(series.cat.ordered)
+            values = series.cat.codes.to_numpy()
+        elif isinstance(series.dtype, pd.PeriodDtype):
+            entry['kind'] = 'period'
+            entry['dtype'] = str(series.dtype)
+            values = series.array.asi8
+        else:
+            entry['kind'] = 'array'
+            values = series.to_numpy()
+        np.save(os.path.join(path, entry['file']), np.ascontiguousarray(values), allow_pickle=False)
+        columns.append(entry)
+
+    has_index = not frame.index.equals(pd.RangeIndex(len(frame)))
+    if has_index:
+        np.save(os.path.join(path, 'index.npy'), frame.index.to_numpy(), allow_pickle=False)
+    with open(os.path.join(path, META_FILE), 'w') as f:
+        json.dump({'rows': len(frame), 'columns': columns, 'index': has_index}, f)
+
+
+def read_frame(path):
+    """Frame over the memory-mapped column files written by ``write_frame`` (no data is copied).
+
+    The arrays are read-only maps of the files, so every process that opens
+    the same path shares one copy of the pages through the OS page cache.
+    """
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    columns = {}
+    for entry in meta['columns']:
+        values = np.load(os.path.join(path, entry['file']), mmap_mode='r')
+        if entry['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, categories=pd.Index(entry['categories']),
+                                              ordered=entry['ordered'], validate=False)
+        elif entry['kind'] == 'period':
+            values = pd.arrays.PeriodArray(values, dtype=pd.api.types.pandas_dtype(entry['dtype']))
+        columns[entry['name']] = values
+    index = np.load(os.path.join(path, 'index.npy'), mmap_mode='r') if meta['index'] else None
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+class SharedStore:
+    """Process-wide, reference-counted store of dataset versions.
+
+    A version (``key``, e.g. the content fingerprint of the uploaded files)
+    is built once by whichever caller asks first: its frames are written
+    under ``<root>/<key>/`` as column files and every caller, in this or any
+    other process, gets read-only memory-mapped views of them. Other values
+    (fitted models, small tables) are kept in memory and joblib-dumped next
+    to the frames. Objects derived from a version (``DatasetHandle.derive``)
+    are built once per process.
+
+    ``acquire`` returns a handle holding one reference; closing it, or letting
+    it be garbage-collected with the session that held it, releases it. Once
+    more than ``max_idle`` versions are unreferenced, the least recently used
+    ones are dropped from memory.
+
+    Reference counts are per process, so each process that has a version
+    open also keeps a lease file (``<key>/leases/<pid>``). Files are deleted
+    only when the last live lease goes, under a lock on the root. Evicting a
+    version in one process never pulls it from under another server, the API
+    or a pool worker. ``prune`` removes versions left without leases, e.g.
+    after a crash.
+    """
+
+    def __init__(self, root=None, max_idle=2):
+        self.root = root or os.environ.get('SHARED_STORE_DIR', DEFAULT_ROOT)
+        self.max_idle = max_idle
+        self._versions = OrderedDict()
+        self._lock = threading.RLock()
+        self._building = {}
+        atexit.register(self.close)
+
+    def version_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def __contains__(self, key):
+        return key in self._versions or os.path.exists(os.path.join(self.version_dir(key), META_FILE))
+
+    def acquire(self, key, build=None):
+        """Handle on version ``key``; ``build()`` -> ``{name: value}`` runs only if no process stored it yet."""
+        with self._lock:
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            with self._lock:
+                entry = self._versions.get(key)
+            if entry is None:
+                entry = self._open(key, build)
+            with self._lock:
+                self._versions.setdefault(key, entry)
+                self._versions[key]['refs'] += 1
+                self._versions[key]['last_used'] = time.time()
+                self._versions.move_to_end(key)
+        return DatasetHandle(self, key)
+
+    def _open(self, key, build):
+        path = self.version_dir(key)
+        meta = os.path.join(path, META_FILE)
+        while True:
+            if not os.path.exists(meta):
+                if build is None:
+                    raise KeyError(key)
+                self._write(path, build())
+            with root_lock(self.root):
+                # Re-checked under the lock: the last other holder may have just deleted it
+                if os.path.exists(meta):
+                    os.makedirs(os.path.join(path, LEASE_DIR), exist_ok=True)
+                    open(self._lease_path(key), 'w').close()
+                    break
+        with open(meta) as f:
+            names = json.load(f)
+        values = {name: read_frame(os.path.join(path, name)) for name in names['frames']}
+        values.update({name: joblib.load(os.path.join(path, f'{name}.joblib')) for name in names['objects']})
+        return {'values': values, 'derived': {}, 'refs': 0, 'last_used': time.time()}
+
+    def _write(self, path, values):
+        # Same scratch-dir-and-rename pattern as the model registry: readers never see half a version
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=self.root)
+        try:
+            frames = [n for n, v in values.items() if isinstance(v, pd.DataFrame)]
+            objects = [n for n in values if n not in frames]
+            for name in frames:
+                write_frame(os.path.join(tmp_dir, name), values[name])
+            for name in objects:
+                joblib.dump(values[name], os.path.join(tmp_dir, f'{name}.joblib'))
+            with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+                json.dump({'frames': frames, 'objects': objects}, f)
+            with root_lock(self.root):
+                if os.path.exists(path):
+                    shutil.rmtree(tmp_dir)  # another process finished first
+                else:
+                    os.replace(tmp_dir, path)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def get(self, key, name):
+        with self._lock:
+            return self._versions[key]['values'][name]
+
+    def names(self, key):
+        with self._lock:
+            return list(self._versions[key]['values'])
+
+    def derive(self, key, name, compute):
+        """Value computed once per process from version ``key`` and shared by every handle on it."""
+        with self._lock:
+            entry = self._versions[key]
+            building = self._building.setdefault((key, name), threading.Lock())
+        with building:
+            if name not in entry['derived']:
+                entry['derived'][name] = compute()
+            return entry['derived'][name]
+
+    def release(self, key):
+        with self._lock:
+            entry = self._versions.get(key)
+            if entry is None:
+                return
+            entry['refs'] = max(entry['refs'] - 1, 0)
+            entry['last_used'] = time.time()
+            self._evict()
+
+    def _lease_path(self, key):
+        return os.path.join(self.version_dir(key), LEASE_DIR, str(os.getpid()))
+
+    def _evict(self):
+        idle = [k for k, e in self._versions.items() if e['refs'] == 0]
+        for key in idle[:max(len(idle) - self.max_idle, 0)]:
+            del self._versions[key]
+            self._drop_lease(key)
+
+    def _drop_lease(self, key):
+        """Give up this process's lease on ``key``; delete its files if no other live process holds one."""
+        with root_lock(self.root):
+            try:
+                os.remove(self._lease_path(key))
+            except FileNotFoundError:
+                pass
+            if not live_leases(self.version_dir(key)):
+                shutil.rmtree(self.version_dir(key), ignore_errors=True)
+
+    def prune(self):
+        """Delete stored versions that no live process holds (e.g. left behind by a crash); returns their keys."""
+        if not os.path.isdir(self.root):
+            return []
+        removed = []
+        with self._lock, root_lock(self.root):
+            for key in os.listdir(self.root):
+                path = self.version_dir(key)
+                if key.startswith('.') or key in self._versions or not os.path.isdir(path):
+                    continue
+                if not live_leases(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed.append(key)
+        return removed
+
+    def close(self):
+        """Drop every version from this process, giving up its leases (runs at interpreter exit)."""
+        with self._lock:
+            for key in list(self._versions):
+                del self._versions[key]
+                self._drop_lease(key)
+
+    def stats(self):
+        """References, holding processes, idle time and mapped bytes of the versions open in this process."""
+        now = time.time()
+        with self._lock:
+            return {
+                key: {
+                    'refs': entry['refs'],
+                    'processes': len(live_leases(self.version_dir(key))),
+                    'idle_seconds': 0.0 if entry['refs'] else now - entry['last_used'],
+                    'frames': {n: int(v.memory_usage(deep=False).sum())
+                               for n, v in entry['values'].items() if isinstance(v, pd.DataFrame)},
+                    'derived': list(entry['derived']),
+                }
+                for key, entry in self._versions.items()
+            }
+
+
+class DatasetHandle:
+    """One reference to a stored dataset version; values are read-only views.
+
+    Released by ``close()``, the ``with`` block or garbage collection. Pickling
+    a handle (e.g. to a process-pool worker) sends only the store root and key;
+    the worker reopens the memory-mapped files instead of receiving a copy.
+    """
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+        self._finalizer = weakref.finalize(self, store.release, key)
+
+    def __getitem__(self, name):
+        return self.store.get(self.key, name)
+
+    def keys(self):
+        return self.store.names(self.key)
+
+    def derive(self, name, compute):
+        return self.store.derive(self.key, name, compute)
+
+    def close(self):
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __reduce__(self):
+        return open_handle, (self.store.root, self.key)
+
+
+def open_handle(root, key):
+    """Reopen a stored version by root and key (used when a handle is unpickled in another process)."""
+    target = store if os.path.abspath(root) == os.path.abspath(store.root) else SharedStore(root)
+    return target.acquire(key)
+
+
+# Shared by every session of the dashboards and the API within one process
+store = SharedStore()
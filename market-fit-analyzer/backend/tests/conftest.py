@@ -0,0 +1,58 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Shared store and model registry go to a scratch folder, set before any backend module reads them
+SCRATCH_DIR = tempfile.mkdtemp(prefix='market-fit-tests-')
+os.environ['SHARED_STORE_DIR'] = os.path.join(SCRATCH_DIR, 'store')
+os.environ['MODEL_REGISTRY_DIR'] = os.path.join(SCRATCH_DIR, 'models')
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+
+def bundled(name):
+    return os.path.join(BACKEND_DIR, f'{name}.csv')
+
+
+@pytest.fixture(scope='session')
+def bundled_files():
+    """Paths of the bundled transactions, products and shops CSVs."""
+    return bundled('transactions'), bundled('products'), bundled('shops')
+
+
+@pytest.fixture(scope='session')
+def bundled_monthly(bundled_files):
+    """Monthly aggregate of the bundled CSVs."""
+    from product_performance import load_data, prepare_monthly_data
+    data, _, _ = load_data(*bundled_files)
+    return prepare_monthly_data(data)
+
+
+@pytest.fixture(scope='session')
+def bundled_features(bundled_monthly):
+    """Model feature rows of the bundled CSVs, as the pipeline trains on them."""
+    from product_performance import create_features
+    return create_features(bundled_monthly)
+
+
+@pytest.fixture(scope='session')
+def text_id_dir(tmp_path_factory):
+    """The bundled CSVs with product IDs like 'P-1' and shop IDs like 'S-1'."""
+    folder = tmp_path_factory.mktemp('text-ids')
+    frames = {name: pd.read_csv(bundled(name)) for name in ('transactions', 'products', 'shops')}
+    for name, frame in frames.items():
+        if 'product_id' in frame.columns:
+            frame['product_id'] = 'P-' + frame['product_id'].astype(str)
+        if 'shop_id' in frame.columns:
+            frame['shop_id'] = 'S-' + frame['shop_id'].astype(str)
+        frame.to_csv(folder / f'{name}.csv', index=False)
+    return folder
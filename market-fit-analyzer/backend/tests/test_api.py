@@ -0,0 +1,70 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('httpx')  # needed by fastapi.testclient
+from fastapi.testclient import TestClient  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def client(text_id_dir):
+    """API serving forecasts for the bundled data with text product and shop IDs."""
+    os.environ['FORECAST_DATA_DIR'] = str(text_id_dir)
+    sys.path.insert(0, os.path.join(BACKEND_DIR, 'prediction'))
+    api = importlib.reload(sys.modules['api']) if 'api' in sys.modules else importlib.import_module('api')
+    with TestClient(api.app) as client:
+        yield client
+    os.environ.pop('FORECAST_DATA_DIR')
+
+
+def test_catalog_lists_text_ids(client):
+    series = client.get('/catalog').json()['series']
+    assert ['P-1', 'S-1'] in series
+    assert all(isinstance(p, str) and isinstance(s, str) for p, s in series)
+
+
+def test_every_catalog_series_can_be_forecast(client):
+    for product_id, shop_id in client.get('/catalog').json()['series'][:5]:
+        response = client.get(f'/forecast/{product_id}/{shop_id}')
+        assert response.status_code == 200
+        body = response.json()
+        assert (body['product_id'], body['shop_id']) == (product_id, shop_id)
+        assert len(body['forecast']) == 3
+
+
+def test_forecast_ids_are_matched_like_ingestion(client):
+    assert client.get('/forecast/%20P-1%20/S-1').json()['product_id'] == 'P-1'
+    assert client.get('/forecast/P-unknown/S-1').status_code == 404
+
+
+def test_hierarchy_filters_by_text_shop_id(client):
+    response = client.get('/hierarchy/category_shop', params={'shop_id': 'S-1'})
+    assert response.status_code == 200
+    assert {row['shop_id'] for row in response.json()['forecast']} == {'S-1'}
+    assert client.get('/hierarchy/category_shop', params={'shop_id': 'S-unknown'}).status_code == 404
+
+
+def test_optimize_prices_filters_by_text_ids(client):
+    response = client.post('/optimize-prices', json={'n_prices': 5, 'product_ids': ['P-1'], 'shop_ids': ['S-1']})
+    assert response.status_code == 200
+    assert [(r['product_id'], r['shop_id']) for r in response.json()['prices']] == [('P-1', 'S-1')]
+
+
+def test_batch_forecast_with_text_ids(client):
+    response = client.post('/batch', json={'queries': [
+        {'query': 'forecast', 'params': {'product_id': 'P-1', 'shop_id': 'S-1'}},
+        {'query': 'forecast', 'params': {'product_id': 'P-unknown', 'shop_id': 'S-1'}},
+    ]})
+    first, second = response.json()['results']
+    assert first['ok'] and first['result']['product_id'] == 'P-1'
+    assert second == {'ok': False, 'error': 'not found'}
+
+
+def test_non_positive_prices_are_rejected(client):
+    product = client.get('/catalog').json()['products'][0]
+    assert client.get(f'/products/{product}/price-sensitivity', params={'price': 0}).status_code == 422
+    assert client.post('/optimize-prices', json={'n_prices': 0}).status_code == 422
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+from compact_forest import CompactForest, compact_predictor
+from product_performance import FEATURES, holdout_mask
+
+
+@pytest.fixture(scope='module')
+def fitted(bundled_features):
+    """A small forest trained on the pipeline's own lag features, with its hold-out rows."""
+    test = holdout_mask(bundled_features)
+    X, y = bundled_features[FEATURES], bundled_features['monthly_quantity']
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X[~test], y[~test])
+    return model, X[test]
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_predictions_match_sklearn(fitted, dtype):
+    model, X_test = fitted
+    compact = CompactForest.from_sklearn(model, dtype=dtype)
+    # float32 only rounds leaf values; every row must take sklearn's branches
+    np.testing.assert_allclose(compact.predict(X_test), model.predict(X_test), rtol=0, atol=1e-4)
+
+
+def test_float32_thresholds_never_round_up(fitted):
+    model, _ = fitted
+    compact = CompactForest.from_sklearn(model, dtype=np.float32)
+    thresholds = np.concatenate([e.tree_.threshold[e.tree_.children_left != -1] for e in model.estimators_])
+    exported = compact.threshold[~compact._is_leaf].astype(np.float64)
+    assert compact.threshold.dtype == np.float32
+    assert (exported <= thresholds).all()
+
+
+def test_quantized_leaves_stay_within_one_step(fitted):
+    model, X_test = fitted
+    compact = CompactForest.from_sklearn(model, dtype=np.float32, leaf_bits=8)
+    diff = np.abs(compact.predict(X_test) - model.predict(X_test))
+    assert diff.max() <= compact.value_scale / 2 + 1e-6
+
+
+def test_save_and_load_round_trip(fitted, tmp_path):
+    model, X_test = fitted
+    path = tmp_path / 'forest.npz'
+    CompactForest.from_sklearn(model, dtype=np.float32).save(path)
+    loaded = CompactForest.load(path)
+    assert loaded.features == FEATURES
+    np.testing.assert_array_equal(loaded.predict(X_test), CompactForest.from_sklearn(model, dtype=np.float32).predict(X_test))
+
+
+def test_compact_predictor_routes_by_batch_size(fitted):
+    model, X_test = fitted
+    predict = compact_predictor(model, max_rows=4)
+    np.testing.assert_allclose(predict(X_test.iloc[:4]), model.predict(X_test.iloc[:4]), atol=1e-9)
+    np.testing.assert_allclose(predict(X_test), model.predict(X_test), atol=1e-9)
+
+
+def test_extra_trees_are_compacted(fitted, bundled_features):
+    _, X_test = fitted
+    X, y = bundled_features[FEATURES], bundled_features['monthly_quantity']
+    model = ExtraTreesRegressor(n_estimators=5, random_state=0).fit(X, y)
+    np.testing.assert_allclose(CompactForest.from_sklearn(model).predict(X_test), model.predict(X_test), atol=1e-9)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from feature_engine import SERIES_KEYS, compute_lag_features, feature_names, required_lags
+from forecasting import latest_state, step_features
+
+
+def test_step_features_match_training_lags(bundled_monthly):
+    series, history, last_month = latest_state(bundled_monthly)
+    target = pd.Period(ordinal=last_month + 1, freq='M')
+    X = step_features(series, {k: history[:, k - 1] for k in required_lags()}, target)
+
+    # The same features as the training path computes for an appended next-month row
+    upcoming = series[SERIES_KEYS].assign(year_month=target, monthly_quantity=0.0)
+    cells = pd.concat([bundled_monthly[SERIES_KEYS + ['year_month', 'monthly_quantity']], upcoming],
+                      ignore_index=True)
+    expected = compute_lag_features(cells)
+    for name in feature_names():
+        np.testing.assert_array_equal(X[name].to_numpy(), expected[name][-len(upcoming):], err_msg=name)
+
+
+def test_months_before_a_series_starts_are_nan():
+    monthly = pd.DataFrame({
+        'product_id': [1, 1, 1, 2],
+        'shop_id': [1, 1, 1, 1],
+        'year_month': pd.PeriodIndex(['2024-01', '2024-02', '2024-04', '2024-04'], freq='M'),
+        'monthly_quantity': [3.0, 4.0, 5.0, 6.0],
+        'avg_price': 10.0, 'standard_price': 10.0,
+        'product_name': ['a', 'a', 'a', 'b'], 'category': 'x', 'city': 'y',
+    })
+    _, history, _ = latest_state(monthly, depth=4)
+    # Series 1 has a gap in March (zero); series 2 starts in April
+    np.testing.assert_array_equal(history[0], [5.0, 0.0, 4.0, 3.0])
+    np.testing.assert_array_equal(history[1], [6.0, np.nan, np.nan, np.nan])
+    _, history, _ = latest_state(monthly, depth=4, before_start=0.0)
+    np.testing.assert_array_equal(history[1], [6.0, 0.0, 0.0, 0.0])
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_engine import SERIES_KEYS
+from hierarchy import METHODS, UNKNOWN, Hierarchy, hierarchical_forecast
+
+
+def monthly_frame(n_products=4, n_shops=3, n_months=15, seed=0):
+    """Monthly aggregate with every (product, shop) series over ``n_months`` months."""
+    rng = np.random.default_rng(seed)
+    keys = pd.MultiIndex.from_product([range(1, n_products + 1), range(1, n_shops + 1)], names=SERIES_KEYS)
+    months = pd.period_range('2023-01', periods=n_months, freq='M')
+    frame = keys.to_frame(index=False).merge(pd.DataFrame({'year_month': months}), how='cross')
+    frame['monthly_quantity'] = rng.poisson(10, len(frame)).astype(float)
+    frame['avg_price'] = 100.0
+    frame['standard_price'] = 100.0
+    frame['product_name'] = 'p' + frame['product_id'].astype(str)
+    frame['category'] = pd.Categorical(np.where(frame['product_id'] % 2 == 0, 'Dairy', 'Snacks'))
+    frame['city'] = pd.Categorical(np.where(frame['shop_id'] == 1, 'Pokhara', 'Kathmandu'))
+    return frame
+
+
+def bottom_forecast(monthly, horizon=3):
+    """Forecast frame shaped like forecast_catalog's output, with a constant prediction per series."""
+    series = monthly[SERIES_KEYS].drop_duplicates().sort_values(SERIES_KEYS).reset_index(drop=True)
+    start = monthly['year_month'].max() + 1
+    forecast = series.loc[np.repeat(series.index, horizon)].reset_index(drop=True)
+    forecast['year_month'] = [start + h for h in range(horizon)] * len(series)
+    forecast['horizon'] = np.tile(np.arange(1, horizon + 1), len(series))
+    forecast['predicted_quantity'] = 5.0
+    return forecast
+
+
+def with_missing_attributes(monthly):
+    """Shop 3 missing from shops.csv and product 4 missing from products.csv, as after the left merges."""
+    monthly = monthly.copy()
+    monthly.loc[monthly['shop_id'] == 3, 'city'] = np.nan
+    monthly.loc[monthly['product_id'] == 4, 'category'] = np.nan
+    return monthly
+
+
+def test_summing_matrix_covers_every_series():
+    series = monthly_frame().drop_duplicates(SERIES_KEYS)
+    hierarchy = Hierarchy(series)
+    bottom = np.arange(hierarchy.n_bottom, dtype=float)[:, None]
+    levels = hierarchy.split(hierarchy.aggregate(bottom))
+    assert levels['chain'][0, 0] == bottom.sum()
+    assert levels['city'].sum() == bottom.sum()
+    assert levels['category_shop'].sum() == bottom.sum()
+
+
+def test_missing_attributes_get_an_unknown_node():
+    series = with_missing_attributes(monthly_frame()).drop_duplicates(SERIES_KEYS)
+    hierarchy = Hierarchy(series)
+    assert UNKNOWN in hierarchy.nodes['city']['city'].tolist()
+    assert UNKNOWN in hierarchy.nodes['category_shop']['category'].tolist()
+    bottom = np.ones((hierarchy.n_bottom, 1))
+    levels = hierarchy.split(hierarchy.aggregate(bottom))
+    assert levels['city'].sum() == hierarchy.n_bottom
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_reconciliation_with_missing_attributes(method):
+    monthly = with_missing_attributes(monthly_frame())
+    levels = hierarchical_forecast(bottom_forecast(monthly), monthly, method=method)
+
+    chain = levels['chain'].set_index('horizon')['predicted_quantity']
+    for level in ('city', 'category_shop', 'sku_shop'):
+        totals = levels[level].groupby('horizon')['predicted_quantity'].sum()
+        np.testing.assert_allclose(totals.to_numpy(), chain.loc[totals.index].to_numpy())
+    unknown_city = levels['city'][levels['city']['city'] == UNKNOWN]
+    assert len(unknown_city) == 3
+
+
+def test_hierarchy_sums_history_from_zero_before_a_series_starts():
+    monthly = monthly_frame()
+    # Series (1, 1) starts in the last month: its earlier months must not turn aggregates into NaN
+    monthly = monthly[~((monthly['product_id'] == 1) & (monthly['shop_id'] == 1)
+                        & (monthly['year_month'] < monthly['year_month'].max()))]
+    levels = hierarchical_forecast(bottom_forecast(monthly), monthly, method='ols')
+    assert levels['chain']['base_forecast'].notna().all()
@@ -0,0 +1,88 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingestion import TRANSACTION_SCHEMA, iter_transaction_chunks, load_tables, match_id, read_table
+from product_performance import stream_monthly_data
+
+HEADER = 'transaction_id,shop_id,product_id,transaction_type,quantity,unit_price,total_amount,payment_method,transaction_time'
+
+
+def transactions_csv(rows):
+    return ('\n'.join([HEADER] + rows) + '\n').encode()
+
+
+def test_blank_and_fractional_quantities_are_kept():
+    content = transactions_csv([
+        '1,1,1,sale,,10,0,cash,2024-01-01',
+        '2,1,2,sale,2.5,10,25,cash,2024-01-02',
+        '3,2,1,sale,3,10,30,card,2024-02-01',
+    ])
+    frame = read_table(content, TRANSACTION_SCHEMA)
+    assert frame['quantity'].dtype == np.float64
+    assert np.isnan(frame['quantity'].iloc[0])
+    assert frame['quantity'].iloc[1:].tolist() == [2.5, 3.0]
+    assert frame['product_id'].dtype == np.int32
+
+
+def test_load_tables_types_bundled_ids_as_int32(bundled_files):
+    data, products, shops = load_tables(*bundled_files)
+    for frame in (data, products):
+        assert frame['product_id'].dtype == np.int32
+    for frame in (data, shops):
+        assert frame['shop_id'].dtype == np.int32
+    assert isinstance(data['city'].dtype, pd.CategoricalDtype)
+
+
+def test_load_tables_shares_categories_for_text_ids(text_id_dir):
+    data, products, _ = load_tables(*(text_id_dir / f'{n}.csv' for n in ('transactions', 'products', 'shops')))
+    assert isinstance(data['product_id'].dtype, pd.CategoricalDtype)
+    assert data['product_id'].dtype == products['product_id'].dtype
+    assert data['product_name'].notna().all()
+
+
+def test_chunks_type_ids_per_chunk():
+    rows = [f'{i},{1 + i % 3},{1 + i % 4},sale,2,10,20,cash,2024-01-05' for i in range(20)]
+    rows.append('20,2,P-9,sale,1.5,10,15,cash,2024-02-01')  # non-integer ID after the first chunks
+    chunks = list(iter_transaction_chunks(io.BytesIO(transactions_csv(rows)), chunksize=8))
+    assert chunks[0]['product_id'].dtype == np.int32
+    assert chunks[-1]['product_id'].tolist() == ['1', '2', '3', '4', 'P-9']
+    assert chunks[-1]['quantity'].tolist() == [2.0, 2.0, 2.0, 2.0, 1.5]
+
+
+def test_stream_handles_late_text_ids_and_fractional_quantities():
+    rows = [f'{i},{1 + i % 3},{1 + i % 4},sale,{1.5 if i % 7 == 0 else 2},10,20,cash,2024-0{1 + i % 3}-05'
+            for i in range(300)]
+    rows += ['300,2,P-9,sale,1,10,10,cash,2024-02-01', '301, 03 ,1,sale,,10,10,cash,2024-02-01']
+    products = pd.DataFrame({'product_id': ['1', '2', '3', '4', 'P-9'], 'product_name': list('abcde'),
+                             'category': ['x'] * 5, 'standard_price': [10.0] * 5})
+    shops = pd.DataFrame({'shop_id': [1, 2, 3], 'city': ['K', 'L', 'M']})
+
+    monthly = stream_monthly_data(io.BytesIO(transactions_csv(rows)), products, shops, chunksize=50)
+    expected = sum(1.5 if i % 7 == 0 else 2 for i in range(300)) + 1
+    assert monthly['monthly_quantity'].sum() == pytest.approx(expected)
+    assert monthly.loc[monthly['product_id'] == 'P-9', 'product_name'].tolist() == ['e']
+    assert monthly['product_name'].notna().all()
+
+
+def test_stream_matches_in_memory_aggregate(bundled_files, bundled_monthly):
+    transactions, products, shops = bundled_files
+    streamed = stream_monthly_data(transactions, products, shops, chunksize=700)
+    assert streamed['product_id'].dtype == np.int32
+    pd.testing.assert_frame_equal(bundled_monthly[streamed.columns].reset_index(drop=True), streamed,
+                                  check_dtype=False, check_categorical=False)
+
+
+@pytest.mark.parametrize('value, dtype, expected', [
+    ('7', np.int32, 7),
+    (' 7 ', np.int32, 7),
+    (7, np.int32, 7),
+    ('P-7', np.int32, None),
+    ('7.5', np.int32, None),
+    (' P-7 ', pd.CategoricalDtype(['P-7']), 'P-7'),
+    (7, pd.CategoricalDtype(['7']), '7'),
+])
+def test_match_id(value, dtype, expected):
+    assert match_id(value, dtype) == expected